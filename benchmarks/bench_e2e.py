@@ -0,0 +1,188 @@
+"""
+Measures end-to-end latency and throughput of SSEClient and AsyncSSEClient against a local
+SSE server, with many concurrent clients.
+
+Run directly, for instance::
+
+    python -m benchmarks.bench_e2e --sync-clients 50 --async-clients 200 --events 5000 --rate 500
+
+For each kind of client, this reports the publish-to-consume latency percentiles, the events
+consumed per second across all clients, the client process CPU time per consumed event, and the
+memory allocated per connection. The server runs in a separate process, so its CPU time is not
+included. ``--output`` and ``--compare`` work as in ``benchmarks.bench_parser``.
+"""
+
+import argparse
+import asyncio
+import sys
+import threading
+import time
+import tracemalloc
+from typing import Dict, List
+
+from benchmarks.results import Results, report_comparison, save_results
+from benchmarks.sse_load_server import SSELoadServer
+from ld_eventsource import SSEClient
+from ld_eventsource.config import ErrorStrategy
+
+
+def _latency_ns(data: str, now_ns: int) -> int:
+    return now_ns - int(data[:data.index(' ')])
+
+
+class _ClientGroup:
+    """
+    Runs a number of clients of one kind, each reading a fixed number of events and recording
+    the latency of each.
+    """
+
+    def __init__(self, kind: str, count: int, url: str, events: int):
+        self.kind = kind
+        self.count = count
+        self.url = url
+        self.events = events
+        self.latencies: List[int] = []
+        self.consumed = 0
+        self.connected = threading.Event()
+        self.finished = threading.Event()
+        self.__lock = threading.Lock()
+        self.__unconnected = count
+        self.__unfinished = count
+        self.__threads: List[threading.Thread] = []
+
+    def start(self):
+        if self.kind == 'sync':
+            self.__threads = [threading.Thread(target=self.__run_sync, daemon=True) for _ in range(self.count)]
+        else:
+            self.__threads = [threading.Thread(target=lambda: asyncio.run(self.__run_async()), daemon=True)]
+        for thread in self.__threads:
+            thread.start()
+        self.connected.wait()
+
+    def join(self, timeout: float):
+        deadline = time.monotonic() + timeout
+        for thread in self.__threads:
+            thread.join(max(0, deadline - time.monotonic()))
+
+    def __client_connected(self):
+        with self.__lock:
+            self.__unconnected -= 1
+            if self.__unconnected == 0:
+                self.connected.set()
+
+    def __client_finished(self, latencies: List[int]):
+        with self.__lock:
+            self.latencies.extend(latencies)
+            self.consumed += len(latencies)
+            self.__unfinished -= 1
+            if self.__unfinished == 0:
+                self.finished.set()
+
+    def __run_sync(self):
+        latencies: List[int] = []
+        with SSEClient(self.url, error_strategy=ErrorStrategy.always_fail()) as client:
+            client.start()
+            self.__client_connected()
+            for event in client.events:
+                latencies.append(_latency_ns(event.data, time.monotonic_ns()))
+                if len(latencies) == self.events:
+                    break
+        self.__client_finished(latencies)
+
+    async def __run_async(self):
+        from ld_eventsource.async_client import AsyncSSEClient
+
+        async def run_one():
+            latencies: List[int] = []
+            async with AsyncSSEClient(self.url) as client:
+                await client.start()
+                self.__client_connected()
+                async for event in client.events:
+                    latencies.append(_latency_ns(event.data, time.monotonic_ns()))
+                    if len(latencies) == self.events:
+                        break
+            self.__client_finished(latencies)
+
+        await asyncio.gather(*(run_one() for _ in range(self.count)))
+
+
+def _percentile(sorted_values: List[int], fraction: float) -> float:
+    if not sorted_values:
+        return float('nan')
+    index = min(len(sorted_values) - 1, int(fraction * len(sorted_values)))
+    return sorted_values[index] / 1e6
+
+
+def _measure(kind: str, server: SSELoadServer, args) -> Dict[str, float]:
+    count = args.sync_clients if kind == 'sync' else args.async_clients
+    group = _ClientGroup(kind, count, server.url, args.events)
+
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    group.start()
+    server.wait_for_subscribers(count)
+    allocated = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+
+    cpu_start = time.process_time()
+    wall_start = time.perf_counter()
+    server.publish(args.events, args.rate, args.payload_size)
+    group.finished.wait(args.timeout)
+    wall = time.perf_counter() - wall_start
+    cpu = time.process_time() - cpu_start
+    group.join(5)
+
+    latencies = sorted(group.latencies)
+    if group.consumed < count * args.events:
+        print('warning: %s clients only consumed %d of %d events' % (
+            kind, group.consumed, count * args.events
+        ), file=sys.stderr)
+    return {
+        'events_per_sec': group.consumed / wall,
+        'latency_ms_p50': _percentile(latencies, 0.5),
+        'latency_ms_p90': _percentile(latencies, 0.9),
+        'latency_ms_p99': _percentile(latencies, 0.99),
+        'latency_ms_p999': _percentile(latencies, 0.999),
+        'latency_ms_max': latencies[-1] / 1e6 if latencies else float('nan'),
+        'cpu_us_per_event': cpu / max(1, group.consumed) * 1e6,
+        'kb_per_connection': allocated / count / 1024,
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0].strip())
+    parser.add_argument('--sync-clients', type=int, default=20, help='number of SSEClient instances')
+    parser.add_argument('--async-clients', type=int, default=100, help='number of AsyncSSEClient instances')
+    parser.add_argument('--events', type=int, default=2000, help='events published to each client')
+    parser.add_argument('--rate', type=float, default=0, help='events per second; 0 means as fast as possible')
+    parser.add_argument('--payload-size', type=int, default=100, help='bytes of padding in each event')
+    parser.add_argument('--timeout', type=float, default=120, help='maximum seconds to wait for clients')
+    parser.add_argument('--output', help='write results to this JSON file')
+    parser.add_argument('--compare', help='compare results against this JSON baseline')
+    parser.add_argument('--threshold', type=float, default=0.1, help='allowed regression, as a fraction')
+    args = parser.parse_args(argv)
+
+    results: Results = {}
+    with SSELoadServer() as server:
+        for kind in ('sync', 'async'):
+            if (args.sync_clients if kind == 'sync' else args.async_clients) == 0:
+                continue
+            name = '%s/clients=%d/rate=%g/payload=%d' % (
+                kind, args.sync_clients if kind == 'sync' else args.async_clients, args.rate, args.payload_size
+            )
+            results[name] = _measure(kind, server, args)
+            print(name)
+            for metric, value in results[name].items():
+                print('    %-20s %12.3f' % (metric, value))
+
+    if args.output:
+        save_results(args.output, results, 'bench_e2e')
+    if args.compare:
+        print()
+        if not report_comparison(args.compare, results, args.threshold):
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
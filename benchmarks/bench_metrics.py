@@ -0,0 +1,224 @@
+"""
+Measures the cost of the metrics surface of SSEClient and AsyncSSEClient.
+
+Run with ``make bench-metrics``, or directly::
+
+    python -m benchmarks.bench_metrics [--output FILE] [--compare FILE]
+
+Each client reads the same in-memory stream with metrics disabled (the default), with a
+``MetricsSink`` whose methods do nothing, and with an ``InMemoryMetricsSink``. The timings show
+what enabling metrics costs.
+
+With metrics disabled, the client must not take any measurements per event. A timing difference
+of a few percent is lost in the noise of a whole client, so this is checked directly instead:
+each client reads two streams of different lengths with metrics disabled, while every call to a
+clock function from ``ld_eventsource`` is counted, and the run fails if the longer stream makes
+more calls.
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+from logging import Logger
+from typing import AsyncIterator, Callable, Dict, List, Optional, Tuple
+
+from benchmarks.bench_parser import _parse_sync, _realistic_events, _split_even
+from benchmarks.results import Results, report_comparison, save_results
+from ld_eventsource import SSEClient
+from ld_eventsource.async_client import AsyncSSEClient
+from ld_eventsource.config import (ConnectionClient, ConnectionResult,
+                                   ConnectStrategy)
+from ld_eventsource.config.async_connect_strategy import (
+    AsyncConnectionClient, AsyncConnectionResult, AsyncConnectStrategy)
+from ld_eventsource.metrics import InMemoryMetricsSink, MetricsSink
+
+
+class _ChunksConnectStrategy(ConnectStrategy):
+    def __init__(self, chunks: List[bytes]):
+        self.__chunks = chunks
+
+    def create_client(self, logger: Logger) -> ConnectionClient:
+        return _ChunksConnectionClient(self.__chunks)
+
+
+class _ChunksConnectionClient(ConnectionClient):
+    def __init__(self, chunks: List[bytes]):
+        self.__chunks = chunks
+
+    def connect(self, last_event_id: Optional[str]) -> ConnectionResult:
+        return ConnectionResult(iter(self.__chunks), None)
+
+
+class _AsyncChunksConnectStrategy(AsyncConnectStrategy):
+    def __init__(self, chunks: List[bytes]):
+        self.__chunks = chunks
+
+    def create_client(self, logger: Logger) -> AsyncConnectionClient:
+        return _AsyncChunksConnectionClient(self.__chunks)
+
+
+class _AsyncChunksConnectionClient(AsyncConnectionClient):
+    def __init__(self, chunks: List[bytes]):
+        self.__chunks = chunks
+
+    async def connect(self, last_event_id: Optional[str]) -> AsyncConnectionResult:
+        return AsyncConnectionResult(self.__stream(), None)
+
+    async def __stream(self) -> AsyncIterator[bytes]:
+        for chunk in self.__chunks:
+            yield chunk
+
+
+SINKS: Dict[str, Callable[[], Optional[MetricsSink]]] = {
+    'disabled': lambda: None,
+    'noop_sink': MetricsSink,
+    'in_memory_sink': InMemoryMetricsSink,
+}
+
+
+def _read_sync(chunks: List[bytes], metrics: Optional[MetricsSink]) -> int:
+    count = 0
+    with SSEClient(_ChunksConnectStrategy(chunks), metrics=metrics) as client:
+        for _ in client.events:
+            count += 1
+    return count
+
+
+async def _read_async_coroutine(chunks: List[bytes], metrics: Optional[MetricsSink]) -> int:
+    count = 0
+    async with AsyncSSEClient(_AsyncChunksConnectStrategy(chunks), metrics=metrics) as client:
+        async for _ in client.events:
+            count += 1
+    return count
+
+
+def _read_async(chunks: List[bytes], metrics: Optional[MetricsSink]) -> int:
+    return asyncio.run(_read_async_coroutine(chunks, metrics))
+
+
+CLIENTS: Dict[str, Callable[[List[bytes], Optional[MetricsSink]], int]] = {
+    'sync': _read_sync,
+    'async': _read_async,
+}
+
+
+def _best_time(repeat: int, fn: Callable[[], object]) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+class _CountingTime:
+    """Stands in for the ``time`` module, counting calls to its clock functions."""
+
+    CLOCKS = ('perf_counter', 'perf_counter_ns', 'monotonic', 'monotonic_ns', 'time', 'time_ns')
+
+    def __init__(self):
+        self.calls = 0
+
+    def __getattr__(self, name: str):
+        value = getattr(time, name)
+        if name not in _CountingTime.CLOCKS:
+            return value
+
+        def counted():
+            self.calls += 1
+            return value()
+
+        return counted
+
+
+def _clock_calls(read: Callable[[List[bytes], Optional[MetricsSink]], int], chunks: List[bytes]) -> int:
+    # Replaces the time module in every ld_eventsource module that imported it.
+    counter = _CountingTime()
+    patched = [
+        module for name, module in list(sys.modules.items())
+        if name.startswith('ld_eventsource') and getattr(module, 'time', None) is time
+    ]
+    for module in patched:
+        setattr(module, 'time', counter)
+    try:
+        read(chunks, None)
+    finally:
+        for module in patched:
+            setattr(module, 'time', time)
+    return counter.calls
+
+
+def check_disabled(size: int) -> Dict[str, Tuple[int, int]]:
+    """
+    Returns, for each client, the number of clock calls made while reading a stream of ``size``
+    events and one of ``2 * size`` events with metrics disabled.
+    """
+    short = _split_even(_realistic_events(size).encode())
+    long = _split_even(_realistic_events(2 * size).encode())
+    return {
+        client_name: (_clock_calls(read, short), _clock_calls(read, long))
+        for client_name, read in CLIENTS.items()
+    }
+
+
+def run(size: int, repeat: int) -> Results:
+    chunks = _split_even(_realistic_events(size).encode())
+    results: Results = {}
+    parser_time = _best_time(repeat, lambda: _parse_sync(chunks))
+    for client_name, read in CLIENTS.items():
+        for sink_name, make_sink in SINKS.items():
+            name = '%s/%s' % (client_name, sink_name)
+            best = _best_time(repeat, lambda: read(chunks, make_sink()))
+            results[name] = {
+                'events_per_sec': size / best,
+                'ns_per_event': best / size * 1e9,
+            }
+            print('%-28s %12.0f events/s %9.0f ns/event' % (
+                name, results[name]['events_per_sec'], results[name]['ns_per_event']
+            ))
+    results['sync/parser_only'] = {'events_per_sec': size / parser_time, 'ns_per_event': parser_time / size * 1e9}
+    return results
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0].strip())
+    parser.add_argument('--size', type=int, default=20000, help='number of events in the stream')
+    parser.add_argument('--repeat', type=int, default=5, help='runs per benchmark; the fastest is kept')
+    parser.add_argument('--output', help='write results to this JSON file')
+    parser.add_argument('--compare', help='compare results against this JSON baseline')
+    parser.add_argument('--threshold', type=float, default=0.1, help='allowed regression, as a fraction')
+    args = parser.parse_args(argv)
+
+    results = run(args.size, args.repeat)
+    disabled = results['sync/disabled']['ns_per_event']
+    parser_only = results['sync/parser_only']['ns_per_event']
+    overhead = disabled / parser_only - 1
+    print()
+    print('client overhead over the bare parser with metrics disabled: %.1f%%' % (overhead * 100))
+    for sink_name in SINKS:
+        if sink_name != 'disabled':
+            print('cost of %s: %+.0f ns/event' % (
+                sink_name, results['sync/%s' % sink_name]['ns_per_event'] - disabled
+            ))
+
+    if args.output:
+        save_results(args.output, results, 'bench_metrics')
+    status = 0
+    print()
+    for client_name, (short, long) in check_disabled(args.size).items():
+        print('%s clock calls with metrics disabled: %d for %d events, %d for %d events' % (
+            client_name, short, args.size, long, 2 * args.size
+        ))
+        if long > short:
+            print('%s client takes measurements per event with metrics disabled' % client_name, file=sys.stderr)
+            status = 1
+    if args.compare:
+        print()
+        if not report_comparison(args.compare, results, args.threshold):
+            status = 1
+    return status
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,180 @@
+"""
+Measures the throughput of the SSE parser, synchronous and asynchronous, over a matrix of
+payload shapes, line endings, and chunkings.
+
+Run with ``make bench``, or directly::
+
+    python -m benchmarks.bench_parser [--filter TEXT] [--output FILE] [--compare FILE]
+
+With ``--compare``, the run fails if any benchmark's throughput is lower than in the baseline
+file by more than ``--threshold``.
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+from random import Random
+from typing import AsyncIterator, Callable, Dict, Iterable, List, Tuple
+
+from benchmarks.results import Results, report_comparison, save_results
+from ld_eventsource.actions import Event
+from ld_eventsource.async_reader import (_AsyncBufferedLineReader,
+                                         _AsyncSSEReader)
+from ld_eventsource.reader import _BufferedLineReader, _SSEReader
+
+_CHUNK_SIZE = 10000  # the same as the chunk size used by the HTTP implementations
+
+
+def _tiny_events(n: int) -> str:
+    return ''.join('data: %d\n\n' % i for i in range(n))
+
+
+def _huge_line_event(n: int) -> str:
+    return 'event: put\ndata: ' + 'x' * (n * 100) + '\n\n'
+
+
+def _many_data_lines_events(n: int) -> str:
+    event = 'event: put\n' + ''.join('data: line %d of a multi-line value\n' % i for i in range(100)) + '\n'
+    return event * max(1, n // 100)
+
+
+def _comment_heavy_events(n: int) -> str:
+    return ''.join(':heartbeat\n' * 20 + 'id: %d\nevent: patch\ndata: {"key":"flag-%d"}\n\n' % (i, i) for i in range(n // 20))
+
+
+def _realistic_events(n: int) -> str:
+    return ''.join(
+        'id: %d\nevent: patch\ndata: {"path":"/flags/flag-%d","data":{"key":"flag-%d","version":%d,"on":true}}\n\n'
+        % (i, i % 500, i % 500, i) for i in range(n)
+    )
+
+
+SHAPES: Dict[str, Callable[[int], str]] = {
+    'tiny': _tiny_events,
+    'huge_line': _huge_line_event,
+    'many_data_lines': _many_data_lines_events,
+    'comment_heavy': _comment_heavy_events,
+    'realistic': _realistic_events,
+}
+
+
+def _split_even(data: bytes) -> List[bytes]:
+    return [data[i:i + _CHUNK_SIZE] for i in range(0, len(data), _CHUNK_SIZE)]
+
+
+def _split_adversarial(data: bytes) -> List[bytes]:
+    # Small chunks of pseudo-random size, with every \r\n split across two chunks, which
+    # exercises the partial-line and pending-\r paths of the line reader.
+    random = Random(0)
+    chunks = []
+    start = 0
+    while start < len(data):
+        end = min(len(data), start + random.randint(1, 64))
+        if data[end:end + 2] == b'\r\n':
+            end += 1
+        chunks.append(data[start:end])
+        start = end
+    return chunks
+
+
+CHUNKINGS: Dict[str, Callable[[bytes], List[bytes]]] = {
+    'even': _split_even,
+    'adversarial': _split_adversarial,
+}
+
+ENDINGS = {'lf': '\n', 'crlf': '\r\n'}
+
+
+def _parse_sync(chunks: List[bytes]) -> int:
+    count = 0
+    for _ in _SSEReader(_BufferedLineReader.lines_from(chunks)).events_and_comments():
+        count += 1
+    return count
+
+
+async def _chunks_async(chunks: List[bytes]) -> AsyncIterator[bytes]:
+    for chunk in chunks:
+        yield chunk
+
+
+async def _parse_async_coroutine(chunks: List[bytes]) -> int:
+    count = 0
+    reader = _AsyncSSEReader(_AsyncBufferedLineReader.lines_from(_chunks_async(chunks)))
+    async for _ in reader.events_and_comments():
+        count += 1
+    return count
+
+
+def _parse_async(chunks: List[bytes]) -> int:
+    return asyncio.run(_parse_async_coroutine(chunks))
+
+
+READERS: Dict[str, Callable[[List[bytes]], int]] = {
+    'sync': _parse_sync,
+    'async': _parse_async,
+}
+
+
+def _count_events(text: str) -> int:
+    reader = _SSEReader(_BufferedLineReader.lines_from([text.encode()]))
+    return sum(1 for item in reader.events_and_comments() if isinstance(item, Event))
+
+
+def _cases(size: int) -> Iterable[Tuple[str, List[bytes], int]]:
+    for shape_name, shape in SHAPES.items():
+        text = shape(size)
+        events = _count_events(text)
+        for ending_name, ending in ENDINGS.items():
+            data = text.replace('\n', ending).encode()
+            for chunking_name, chunking in CHUNKINGS.items():
+                name = '%s/%s/%s' % (shape_name, ending_name, chunking_name)
+                yield name, chunking(data), events
+
+
+def run(size: int, repeat: int, name_filter: str) -> Results:
+    results: Results = {}
+    for case_name, chunks, events in _cases(size):
+        total_bytes = sum(len(c) for c in chunks)
+        for reader_name, parse in READERS.items():
+            name = '%s/%s' % (case_name, reader_name)
+            if name_filter not in name:
+                continue
+            best = float('inf')
+            for _ in range(repeat):
+                start = time.perf_counter()
+                parse(chunks)
+                best = min(best, time.perf_counter() - start)
+            results[name] = {
+                'events_per_sec': events / best,
+                'mb_per_sec': total_bytes / best / 1e6,
+            }
+            print('%-48s %12.0f events/s %9.1f MB/s' % (
+                name, results[name]['events_per_sec'], results[name]['mb_per_sec']
+            ))
+    return results
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0].strip())
+    parser.add_argument('--size', type=int, default=20000, help='approximate number of events per payload')
+    parser.add_argument('--repeat', type=int, default=5, help='runs per benchmark; the fastest is kept')
+    parser.add_argument('--filter', default='', help='only run benchmarks whose name contains this')
+    parser.add_argument('--output', help='write results to this JSON file')
+    parser.add_argument('--compare', help='compare results against this JSON baseline')
+    parser.add_argument('--threshold', type=float, default=0.1, help='allowed regression, as a fraction')
+    args = parser.parse_args(argv)
+
+    results = run(args.size, args.repeat, args.filter)
+    if args.output:
+        save_results(args.output, results, 'bench_parser')
+    if args.compare:
+        print()
+        if not report_comparison(args.compare, results, args.threshold):
+            print('throughput regressed by more than %d%%' % (args.threshold * 100), file=sys.stderr)
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,75 @@
+"""
+Helpers for saving benchmark results as JSON baselines and comparing later runs against them.
+
+A results file maps each benchmark name to a dict of measurements. Every measurement name says
+which direction is better: names ending in ``_per_sec`` are throughputs (higher is better), and
+everything else is a cost (lower is better).
+"""
+
+import json
+import platform
+import sys
+from typing import Dict, List, Tuple
+
+Results = Dict[str, Dict[str, float]]
+
+
+def save_results(path: str, results: Results, tool: str):
+    document = {
+        'tool': tool,
+        'python': platform.python_version(),
+        'implementation': platform.python_implementation(),
+        'machine': platform.machine(),
+        'results': results,
+    }
+    with open(path, 'w') as f:
+        json.dump(document, f, indent=2, sort_keys=True)
+        f.write('\n')
+
+
+def load_results(path: str) -> Results:
+    with open(path) as f:
+        return json.load(f)['results']
+
+
+def _higher_is_better(metric: str) -> bool:
+    return metric.endswith('_per_sec')
+
+
+def compare_results(baseline: Results, current: Results) -> List[Tuple[str, str, float, float, float]]:
+    """
+    Returns a row for every measurement present in both result sets, as (benchmark, metric,
+    baseline, current, change). The change is positive for an improvement and negative for a
+    regression, as a fraction of the baseline.
+    """
+    rows = []
+    for name in sorted(baseline):
+        if name not in current:
+            continue
+        for metric, old in sorted(baseline[name].items()):
+            new = current[name].get(metric)
+            if new is None or old == 0:
+                continue
+            change = (new - old) / old
+            if not _higher_is_better(metric):
+                change = -change
+            rows.append((name, metric, old, new, change))
+    return rows
+
+
+def report_comparison(baseline_path: str, current: Results, threshold: float) -> bool:
+    """
+    Prints a comparison table and returns False if any measurement regressed by more than
+    ``threshold`` (a fraction, such as 0.1 for 10%).
+    """
+    rows = compare_results(load_results(baseline_path), current)
+    ok = True
+    for name, metric, old, new, change in rows:
+        regressed = change < -threshold
+        ok = ok and not regressed
+        print('%-48s %-16s %14.1f %14.1f %+8.1f%%%s' % (
+            name, metric, old, new, change * 100, '  REGRESSION' if regressed else ''
+        ))
+    if not rows:
+        print('no benchmarks in common with %s' % baseline_path, file=sys.stderr)
+    return ok
@@ -0,0 +1,67 @@
+"""
+Compares retry delay strategies for a fleet of clients that all lose their connection at once.
+
+Run with ``make simulate-fleet``, or directly::
+
+    python -m benchmarks.simulate_fleet [--clients N] [--outage START END] [--capacity N]
+        [--retry-after SECONDS] [--max-delay SECONDS]
+
+This uses :func:`ld_eventsource.simulation.simulate_reconnects()`, so it does no I/O and runs
+in about a second. For each strategy it prints the peak number of connection attempts in one
+second, the total number of failed attempts, and how long after the outage every client was
+connected again.
+"""
+
+import argparse
+import time
+from typing import Callable, List, Tuple
+
+from ld_eventsource.config import RetryDelayStrategy
+from ld_eventsource.simulation import simulate_reconnects
+
+
+def _strategies(max_delay: float) -> List[Tuple[str, Callable[[int], RetryDelayStrategy]]]:
+    return [
+        ('default', lambda i: RetryDelayStrategy.default(max_delay=max_delay)),
+        ('default, jitter 0.5', lambda i: RetryDelayStrategy.default(
+            max_delay=max_delay, jitter_multiplier=0.5)),
+        ('full jitter', lambda i: RetryDelayStrategy.full_jitter(max_delay=max_delay, seed=i)),
+        ('decorrelated jitter', lambda i: RetryDelayStrategy.decorrelated_jitter(
+            max_delay=max_delay, seed=i)),
+        ('retry-after + full jitter', lambda i: RetryDelayStrategy.retry_after(
+            RetryDelayStrategy.full_jitter(max_delay=max_delay, seed=i))),
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--clients', type=int, default=5000)
+    parser.add_argument('--outage', type=float, nargs=2, default=(60, 120), metavar=('START', 'END'))
+    parser.add_argument('--capacity', type=int, default=500,
+                        help='connections the server accepts per second')
+    parser.add_argument('--retry-after', type=float, default=5,
+                        help='Retry-After value sent when over capacity')
+    parser.add_argument('--max-delay', type=float, default=30)
+    parser.add_argument('--max-time', type=float, default=3600)
+    args = parser.parse_args()
+
+    print("%-28s %10s %10s %12s %8s" % ('strategy', 'peak/s', 'failed', 'recovery (s)', 'run (s)'))
+    for name, strategy in _strategies(args.max_delay):
+        start = time.perf_counter()
+        result = simulate_reconnects(
+            strategy,
+            clients=args.clients,
+            outages=[tuple(args.outage)],
+            capacity=args.capacity,
+            retry_after=args.retry_after,
+            max_time=args.max_time,
+        )
+        elapsed = time.perf_counter() - start
+        recovery = '-' if result.time_to_recovery is None else '%.1f' % result.time_to_recovery
+        print("%-28s %10d %10d %12s %8.2f" % (
+            name, result.peak_attempts_per_second, result.failed_attempts, recovery, elapsed
+        ))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,136 @@
+"""
+A minimal, high-throughput SSE server for benchmarks, built directly on asyncio streams.
+
+The server runs in a separate process, so that its CPU use is not counted against the clients
+being measured, and it is controlled from the parent process through a pipe. Every event it
+publishes carries the ``time.monotonic_ns()`` at which it was published as the first word of its
+data; on Linux the monotonic clock is shared by all processes, so a client can compute the
+publish-to-consume latency by subtracting that from its own clock.
+"""
+
+import asyncio
+import multiprocessing
+import time
+from multiprocessing.connection import Connection
+from typing import Set
+
+_RESPONSE_HEAD = (
+    b'HTTP/1.1 200 OK\r\n'
+    b'Content-Type: text/event-stream\r\n'
+    b'Cache-Control: no-cache\r\n'
+    b'Transfer-Encoding: chunked\r\n'
+    b'\r\n'
+)
+
+# When publishing as fast as possible, wait for the clients to drain their sockets after this many
+# events, so that a slow client cannot make the server buffer an unbounded amount of data.
+_DRAIN_EVERY = 100
+
+
+class _Server:
+    def __init__(self):
+        self.subscribers: Set[asyncio.StreamWriter] = set()
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            await reader.readuntil(b'\r\n\r\n')
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError):
+            writer.close()
+            return
+        writer.write(_RESPONSE_HEAD)
+        self.subscribers.add(writer)
+        try:
+            await reader.read()  # returns when the client disconnects
+        except ConnectionError:
+            pass
+        finally:
+            self.subscribers.discard(writer)
+            writer.close()
+
+    async def publish(self, count: int, rate: float, payload_size: int):
+        padding = 'x' * payload_size
+        start = time.monotonic()
+        for i in range(count):
+            body = ('id: %d\ndata: %d %s\n\n' % (i, time.monotonic_ns(), padding)).encode()
+            frame = b'%x\r\n%s\r\n' % (len(body), body)
+            for writer in self.subscribers:
+                writer.write(frame)
+            if rate > 0:
+                delay = start + (i + 1) / rate - time.monotonic()
+                if delay > 0:
+                    await self.drain()
+                    await asyncio.sleep(delay)
+            elif i % _DRAIN_EVERY == _DRAIN_EVERY - 1:
+                await self.drain()
+        await self.drain()
+
+    async def drain(self):
+        writers = list(self.subscribers)
+        results = await asyncio.gather(*(w.drain() for w in writers), return_exceptions=True)
+        for writer, result in zip(writers, results):
+            if isinstance(result, Exception):
+                self.subscribers.discard(writer)
+
+    async def serve(self, conn: Connection):
+        server = await asyncio.start_server(self.handle, '127.0.0.1', 0, backlog=4096)
+        conn.send(server.sockets[0].getsockname()[1])
+        loop = asyncio.get_running_loop()
+        while True:
+            command = await loop.run_in_executor(None, conn.recv)
+            if command[0] == 'subscribers':
+                conn.send(len(self.subscribers))
+            elif command[0] == 'publish':
+                await self.publish(*command[1:])
+                conn.send('published')
+            elif command[0] == 'stop':
+                server.close()
+                for writer in list(self.subscribers):
+                    writer.close()
+                conn.send('stopped')
+                return
+
+
+def _run_server(conn: Connection):
+    asyncio.run(_Server().serve(conn))
+
+
+class SSELoadServer:
+    """
+    Starts the server in a child process. Use as a context manager::
+
+        with SSELoadServer() as server:
+            ... connect clients to server.url ...
+            server.wait_for_subscribers(10)
+            server.publish(10000)
+    """
+
+    def __enter__(self):
+        self.__conn, child_conn = multiprocessing.Pipe()
+        self.__process = multiprocessing.Process(target=_run_server, args=(child_conn,), daemon=True)
+        self.__process.start()
+        self.url = 'http://127.0.0.1:%d/stream' % self.__conn.recv()
+        return self
+
+    def __exit__(self, type, value, traceback):
+        self.__conn.send(('stop',))
+        self.__conn.recv()
+        self.__process.join(5)
+
+    def subscribers(self) -> int:
+        self.__conn.send(('subscribers',))
+        return self.__conn.recv()
+
+    def wait_for_subscribers(self, count: int, timeout: float = 30):
+        deadline = time.monotonic() + timeout
+        while self.subscribers() < count:
+            if time.monotonic() > deadline:
+                raise TimeoutError('only %d of %d clients connected' % (self.subscribers(), count))
+            time.sleep(0.01)
+
+    def publish(self, count: int, rate: float = 0, payload_size: int = 100):
+        """
+        Sends ``count`` events to every connected client, at ``rate`` events per second, or as
+        fast as the clients can take them if ``rate`` is zero. Returns when all have been sent.
+        """
+        self.__conn.send(('publish', count, rate, payload_size))
+        self.__conn.recv()
@@ -26,11 +26,13 @@ class Event(Action):
         data: str = '',
         id: Optional[str] = None,
         last_event_id: Optional[str] = None,
+        received_at: Optional[float] = None,
     ):
         self._event = event
         self._data = data
         self._id = id
         self._last_event_id = last_event_id
+        self._received_at = received_at
 
     @property
     def event(self) -> str:
@@ -60,6 +62,19 @@ class Event(Action):
         """
         return self._last_event_id
 
+    @property
+    def received_at(self) -> Optional[float]:
+        """
+        The ``time.monotonic()`` value at which the data that completed this event was received,
+        or ``None`` if the client was not configured with ``receive_timestamps``.
+
+        This is taken once for each chunk of data read from the stream, so all of the events
+        that were completed by the same chunk have the same value. Subtracting it from the
+        current ``time.monotonic()`` tells you how long the event waited before being processed.
+        It is not included in comparisons of events.
+        """
+        return self._received_at
+
     def __eq__(self, other):
         if not isinstance(other, Event):
             return False
@@ -105,6 +120,86 @@ class Comment(Action):
         return ":" + self._comment
 
 
+class ConnectionTimings:
+    """
+    How long each phase of a connection attempt took, in seconds.
+
+    These are available from :attr:`.Start.timings`, and from :attr:`.Fault.timings` if a
+    connection attempt failed. Each phase is ``None`` if it did not happen, such as when an
+    existing pooled connection was reused, or if the :class:`.ConnectStrategy` could not measure
+    it separately, in which case it is included in an earlier phase. The default HTTP strategies
+    can only measure the individual phases if they created their own connection pool or session,
+    rather than using one that was passed to them; :attr:`total` is always available.
+
+    If the request was redirected, each phase is the sum over all of the requests.
+    """
+
+    def __init__(
+        self,
+        dns: Optional[float] = None,
+        connect: Optional[float] = None,
+        tls: Optional[float] = None,
+        time_to_first_byte: Optional[float] = None,
+        total: Optional[float] = None,
+    ):
+        self._dns = dns
+        self._connect = connect
+        self._tls = tls
+        self._time_to_first_byte = time_to_first_byte
+        self._total = total
+
+    @property
+    def dns(self) -> Optional[float]:
+        """
+        The time taken to resolve the host name. If this is ``None`` but :attr:`connect` is not,
+        resolution was not measured separately and is included in :attr:`connect`.
+        """
+        return self._dns
+
+    @property
+    def connect(self) -> Optional[float]:
+        """
+        The time taken to establish the TCP connection.
+        """
+        return self._connect
+
+    @property
+    def tls(self) -> Optional[float]:
+        """
+        The time taken by the TLS handshake. If this is ``None`` for a secure connection, the
+        handshake was not measured separately and is included in :attr:`connect`.
+        """
+        return self._tls
+
+    @property
+    def time_to_first_byte(self) -> Optional[float]:
+        """
+        The time from when the request was sent until the response headers were received.
+        """
+        return self._time_to_first_byte
+
+    @property
+    def total(self) -> Optional[float]:
+        """
+        The time taken by the whole connection attempt.
+        """
+        return self._total
+
+    def __eq__(self, other):
+        return isinstance(other, ConnectionTimings) and (
+            self._dns == other._dns
+            and self._connect == other._connect
+            and self._tls == other._tls
+            and self._time_to_first_byte == other._time_to_first_byte
+            and self._total == other._total
+        )
+
+    def __repr__(self):
+        return "ConnectionTimings(dns=%s, connect=%s, tls=%s, time_to_first_byte=%s, total=%s)" % (
+            self._dns, self._connect, self._tls, self._time_to_first_byte, self._total
+        )
+
+
 class Start(Action):
     """
     Indicates that :class:`.SSEClient` has successfully connected to a stream.
@@ -118,8 +213,15 @@ class Start(Action):
     emitted with the headers from the new connection, which may differ from the previous one.
     """
 
-    def __init__(self, headers: Optional[Headers] = None):
+    def __init__(
+        self,
+        headers: Optional[Headers] = None,
+        timings: Optional[ConnectionTimings] = None,
+        downtime: Optional[float] = None,
+    ):
         self._headers = headers
+        self._timings = timings
+        self._downtime = downtime
 
     @property
     def headers(self) -> Optional[Headers]:
@@ -132,6 +234,22 @@ class Start(Action):
         """
         return self._headers
 
+    @property
+    def timings(self) -> Optional[ConnectionTimings]:
+        """
+        How long each phase of the successful connection attempt took.
+        """
+        return self._timings
+
+    @property
+    def downtime(self) -> Optional[float]:
+        """
+        The time in seconds from when the previous connection was lost until this connection
+        was made, including any retry delays and failed attempts in between; or ``None`` if
+        this is the first connection.
+        """
+        return self._downtime
+
 
 class Fault(Action):
     """
@@ -148,8 +266,15 @@ class Fault(Action):
     or :class:`.HTTPContentTypeError`), they are accessible via the :attr:`headers` property.
     """
 
-    def __init__(self, error: Optional[Exception]):
+    def __init__(
+        self,
+        error: Optional[Exception],
+        timings: Optional[ConnectionTimings] = None,
+        recent_bytes: Optional[bytes] = None,
+    ):
         self.__error = error
+        self.__timings = timings
+        self.__recent_bytes = recent_bytes
 
     @property
     def error(self) -> Optional[Exception]:
@@ -176,3 +301,20 @@ class Fault(Action):
         if isinstance(self.__error, ExceptionWithHeaders):
             return self.__error.headers
         return None
+
+    @property
+    def timings(self) -> Optional[ConnectionTimings]:
+        """
+        If this Fault is for a failed connection attempt, how long each phase of the attempt
+        took before it failed; or ``None`` if an existing connection failed or ended.
+        """
+        return self.__timings
+
+    @property
+    def recent_bytes(self) -> Optional[bytes]:
+        """
+        If the client was created with a ``wire_tap_size``, and this Fault is for a connection
+        that failed or ended, the last raw bytes that were received on that connection, up to
+        that size; otherwise ``None``.
+        """
+        return self.__recent_bytes
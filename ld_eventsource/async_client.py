@@ -3,13 +3,23 @@ import logging
 import time
 from typing import AsyncIterable, Optional, Union
 
-from ld_eventsource.actions import Action, Event, Fault, Start
+from ld_eventsource.actions import (Action, ConnectionTimings, Event, Fault,
+                                    Start)
 from ld_eventsource.async_reader import (_AsyncBufferedLineReader,
                                          _AsyncSSEReader)
+from ld_eventsource.coalescing import EventKey, _CoalescingBuffer
 from ld_eventsource.config.async_connect_strategy import (
     AsyncConnectionClient, AsyncConnectionResult, AsyncConnectStrategy)
+from ld_eventsource.config.checkpoint_store import CheckpointStore
+from ld_eventsource.config.clock import Clock
 from ld_eventsource.config.error_strategy import ErrorStrategy
 from ld_eventsource.config.retry_delay_strategy import RetryDelayStrategy
+from ld_eventsource.governor import AsyncReconnectGovernor
+from ld_eventsource.metrics import MetricsSink, ServerTimestamp, _StreamMeter
+from ld_eventsource.profiling import StageProfiler
+from ld_eventsource.reader import _AckWindow, _ChunkTimestamps, _WireTap
+from ld_eventsource.structured_logging import (_error_name, _fields,
+                                               _log_reconnect, _timings_fields)
 
 
 class AsyncSSEClient:
@@ -48,6 +58,18 @@ class AsyncSSEClient:
         error_strategy: Optional[ErrorStrategy] = None,
         last_event_id: Optional[str] = None,
         logger: Optional[logging.Logger] = None,
+        checkpoint_store: Optional[CheckpointStore] = None,
+        explicit_ack: bool = False,
+        metrics: Optional[MetricsSink] = None,
+        receive_timestamps: bool = False,
+        server_timestamp: Optional[ServerTimestamp] = None,
+        profiler: Optional[StageProfiler] = None,
+        stream_key: Optional[str] = None,
+        wire_tap_size: int = 0,
+        min_server_retry_delay: float = 0,
+        max_server_retry_delay: Optional[float] = None,
+        reconnect_governor: Optional[AsyncReconnectGovernor] = None,
+        clock: Optional[Clock] = None,
     ):
         """
         Creates an async client instance.
@@ -58,9 +80,43 @@ class AsyncSSEClient:
         :param retry_delay_reset_threshold: minimum connection time before resetting retry delay
         :param error_strategy: allows customization of the behavior after a stream failure
         :param last_event_id: if provided, the ``Last-Event-Id`` value will be preset to this
-        :param logger: if provided, log messages will be written here
+        :param logger: if provided, log messages will be written here; the records carry
+            structured fields as described in :mod:`ld_eventsource.structured_logging`
+        :param checkpoint_store: if provided, the last event ID is persisted here as events are
+            received; if ``last_event_id`` is not specified, the initial ``Last-Event-Id`` is
+            loaded from the store (see :class:`.CheckpointStore`)
+        :param explicit_ack: if true, :attr:`last_event_id` only advances when you call
+            :meth:`ack()`, rather than as soon as each event is parsed
+        :param metrics: if provided, the client reports metrics about its connections, reads,
+            and parsing here (see :class:`.MetricsSink`); if not, no measurements are taken
+        :param receive_timestamps: if true, each :class:`.Event` has a :attr:`.Event.received_at`
+            timestamp
+        :param server_timestamp: if provided along with ``metrics``, this function is called for
+            each event to get the time at which the server sent it, and the difference from the
+            time at which it was received is recorded as :attr:`.MetricsSink.EVENT_LATENCY`; this
+            implies ``receive_timestamps``
+        :param profiler: if provided, the time spent in each stage of reading the stream is
+            measured here (see :class:`.StageProfiler`)
+        :param stream_key: a name for this stream in the ``sse_stream`` field of log records; if
+            not specified, and ``connect`` is a URL string, the URL is used
+        :param wire_tap_size: if greater than zero, the client keeps this many of the most recent
+            raw bytes received on each connection, for debugging; they are available from
+            :attr:`recent_bytes` and :attr:`.Fault.recent_bytes`
+        :param min_server_retry_delay: the lowest base retry delay, in seconds, that the server
+            can set with a ``retry:`` field
+        :param max_server_retry_delay: if provided, the highest base retry delay, in seconds,
+            that the server can set with a ``retry:`` field
+        :param reconnect_governor: if provided, each connection attempt waits for permission from
+            this, so that the attempts of all the clients sharing it are limited (see
+            :class:`.AsyncReconnectGovernor`)
+        :param clock: the source of time for retry delays and for deciding when to reset the
+            retry delay strategy; if not specified, the system's monotonic clock is used (see
+            :class:`.Clock`); a ``reconnect_governor`` has its own ``clock`` parameter, which
+            should be given the same clock
         """
         if isinstance(connect, str):
+            if stream_key is None:
+                stream_key = connect
             connect = AsyncConnectStrategy.http(connect)
         elif not isinstance(connect, AsyncConnectStrategy):
             raise TypeError("connect must be either a string or AsyncConnectStrategy")
@@ -70,13 +126,28 @@ class AsyncSSEClient:
             retry_delay_strategy or RetryDelayStrategy.default()
         )
         self.__retry_delay_reset_threshold = retry_delay_reset_threshold
+        self.__min_server_retry_delay = min_server_retry_delay
+        self.__max_server_retry_delay = max_server_retry_delay
+        self.__reconnect_governor = reconnect_governor
+        self.__clock = clock or Clock()
         self.__current_retry_delay_strategy = self.__base_retry_delay_strategy
-        self.__next_retry_delay = 0
+        self.__next_retry_delay: float = 0
 
         self.__base_error_strategy = error_strategy or ErrorStrategy.always_fail()
         self.__current_error_strategy = self.__base_error_strategy
 
+        self.__checkpoint_store = checkpoint_store
+        if last_event_id is None and checkpoint_store is not None:
+            last_event_id = checkpoint_store.load()
         self.__last_event_id = last_event_id
+        self.__ack_window = _AckWindow() if explicit_ack else None
+        self.__metrics = metrics
+        self.__server_timestamp = server_timestamp if metrics is not None else None
+        self.__receive_timestamps = receive_timestamps or self.__server_timestamp is not None
+        self.__profiler = profiler
+        self.__stream_key = stream_key
+        self.__attempt = 0
+        self.__wire_tap = _WireTap(wire_tap_size) if wire_tap_size > 0 else None
 
         if logger is None:
             logger = logging.getLogger('launchdarkly-eventsource-async.null')
@@ -86,8 +157,9 @@ class AsyncSSEClient:
 
         self.__connection_client: AsyncConnectionClient = connect.create_client(logger)
         self.__connection_result: Optional[AsyncConnectionResult] = None
-        self._retry_reset_baseline: float = 0
-        self.__disconnected_time: float = 0
+        self._retry_reset_baseline: Optional[float] = None
+        self.__disconnected_time: Optional[float] = None
+        self.__connection_lost_time: Optional[float] = None
 
         self.__closed = False
         self.__interrupted = False
@@ -105,6 +177,8 @@ class AsyncSSEClient:
         self.__closed = True
         await self.interrupt()
         await self.__connection_client.close()
+        if self.__checkpoint_store is not None:
+            self.__checkpoint_store.flush()
 
     async def interrupt(self):
         """
@@ -112,6 +186,7 @@ class AsyncSSEClient:
         """
         if self.__connection_result:
             self.__interrupted = True
+            self.__connection_lost_time = self.__clock.now()
             await self.__connection_result.close()
             self.__connection_result = None
             self._compute_next_retry_delay()
@@ -133,6 +208,23 @@ class AsyncSSEClient:
         """
         return self._events_generator()
 
+    def coalesced_events(self, key: EventKey) -> AsyncIterable[Event]:
+        """
+        An async iterable series of :class:`.Event` objects in which superseded events are
+        collapsed.
+
+        The stream is read by a background task, and each event is placed in a buffer that holds
+        at most one pending event per key, as computed by ``key``. A newer event replaces an older
+        pending event with the same key, and events are delivered in the order in which their keys
+        first arrived. See :meth:`.SSEClient.coalesced_events` for details.
+
+        The background task can only read ahead while the consumer is awaiting something, and it
+        is cancelled when you stop iterating.
+
+        :param key: a function that returns the coalescing key for an event
+        """
+        return self._coalesced_events_generator(key)
+
     async def _all_generator(self):
         while True:
             while self.__connection_result is None:
@@ -141,12 +233,47 @@ class AsyncSSEClient:
                     yield result
 
             current_result = self.__connection_result
-            lines = _AsyncBufferedLineReader.lines_from(current_result.stream)
-            reader = _AsyncSSEReader(lines, self.__last_event_id, None)
+            stream = current_result.stream
+            profiler = None if self.__profiler is None else self.__profiler._start_connection()
+            meter = None if self.__metrics is None else _StreamMeter(self.__metrics)
+            if meter is not None:
+                stream = meter.async_chunks(stream)
+            timestamps = _ChunkTimestamps() if self.__receive_timestamps else None
+            if timestamps is not None:
+                stream = timestamps.async_chunks(stream)
+            wire_tap = self.__wire_tap
+            if wire_tap is not None:
+                wire_tap.reset()
+                stream = wire_tap.async_chunks(stream)
+            if profiler is not None:
+                # Outermost, so that the client's own work on each chunk counts as reading it.
+                stream = profiler.async_read(stream)
+            lines = _AsyncBufferedLineReader.lines_from(stream)
+            if profiler is not None:
+                lines = profiler.async_split(lines)
+            build_event = Event if profiler is None else profiler.build()
+            reader = _AsyncSSEReader(
+                lines, self.__last_event_id, self._set_retry, timestamps, build_event
+            )
+            items = reader.events_and_comments()
+            if meter is not None:
+                items = meter.async_items(items)
+            if profiler is not None:
+                items = profiler.async_parse(items)
+            ack_window = self.__ack_window
+            checkpoint_store = self.__checkpoint_store
+            server_timestamp = self.__server_timestamp
             error: Optional[Exception] = None
             try:
-                async for ec in reader.events_and_comments():
-                    self.__last_event_id = reader.last_event_id
+                async for ec in items:
+                    if server_timestamp is not None and isinstance(ec, Event):
+                        self._record_latency(ec, server_timestamp, timestamps.wall_clock_offset)
+                    if ack_window is None:
+                        self.__last_event_id = reader.last_event_id
+                        if checkpoint_store is not None and isinstance(ec, Event) and ec.id is not None:
+                            checkpoint_store.update(ec.id)
+                    elif isinstance(ec, Event) and ec.id is not None:
+                        ack_window.received(ec.id)
                     yield ec
                     if self.__interrupted:
                         break
@@ -155,20 +282,29 @@ class AsyncSSEClient:
                     return
                 error = e
             finally:
-                self.__last_event_id = reader.last_event_id
+                if ack_window is None:
+                    self.__last_event_id = reader.last_event_id
+                if checkpoint_store is not None:
+                    checkpoint_store.flush()
+                if meter is not None:
+                    meter.end()
+                if profiler is not None:
+                    profiler.end()
+                if self.__connection_result is not None:
+                    self.__connection_lost_time = self.__clock.now()
                 await current_result.close()
                 self.__connection_result = None
 
-            self._compute_next_retry_delay()
+            self._compute_next_retry_delay(error)
             fail_or_continue, self.__current_error_strategy = (
                 self.__current_error_strategy.apply(error)
             )
             if fail_or_continue == ErrorStrategy.FAIL:
                 if error is None:
-                    yield Fault(None)
+                    yield Fault(None, None, self.recent_bytes)
                     return
                 raise error
-            yield Fault(error)
+            yield Fault(error, None, self.recent_bytes)
             continue
 
     async def _events_generator(self):
@@ -176,6 +312,52 @@ class AsyncSSEClient:
             if isinstance(item, Event):
                 yield item
 
+    async def _coalesced_events_generator(self, key: EventKey):
+        buffer = _CoalescingBuffer(key)
+        ready = asyncio.Event()
+        finished = False
+        error: Optional[Exception] = None
+
+        async def pump():
+            nonlocal finished, error
+            try:
+                async for event in self._events_generator():
+                    buffer.put(event)
+                    ready.set()
+            except Exception as e:
+                error = e
+            finally:
+                finished = True
+                ready.set()
+
+        task = asyncio.ensure_future(pump())
+        try:
+            while True:
+                if len(buffer) == 0:
+                    if finished:
+                        if error is not None:
+                            raise error
+                        return
+                    ready.clear()
+                    await ready.wait()
+                    continue
+                yield buffer.pop()
+        finally:
+            task.cancel()
+
+    def _record_latency(self, event: Event, server_timestamp: ServerTimestamp, wall_clock_offset: float):
+        sent = server_timestamp(event)
+        if sent is not None and self.__metrics is not None and event.received_at is not None:
+            self.__metrics.record(MetricsSink.EVENT_LATENCY, event.received_at + wall_clock_offset - sent)
+
+    @property
+    def recent_bytes(self) -> Optional[bytes]:
+        """
+        The raw bytes most recently received, if ``wire_tap_size`` was set. See
+        :attr:`.SSEClient.recent_bytes`.
+        """
+        return None if self.__wire_tap is None else self.__wire_tap.snapshot()
+
     @property
     def next_retry_delay(self) -> float:
         """
@@ -183,50 +365,117 @@ class AsyncSSEClient:
         """
         return self.__next_retry_delay
 
-    def _compute_next_retry_delay(self):
-        if self.__retry_delay_reset_threshold > 0 and self._retry_reset_baseline != 0:
-            now = time.time()
+    def _set_retry(self, milliseconds: int):
+        # Called when the server sends a retry: field. The new base delay applies from the next
+        # reconnection, so the backoff starts over from it.
+        delay = max(milliseconds / 1000, self.__min_server_retry_delay, 0)
+        if self.__max_server_retry_delay is not None:
+            delay = min(delay, self.__max_server_retry_delay)
+        if delay != self.__base_retry_delay:
+            self.__base_retry_delay = delay
+            self.__current_retry_delay_strategy = self.__base_retry_delay_strategy
+
+    def _compute_next_retry_delay(self, error: Optional[Exception] = None):
+        if self.__retry_delay_reset_threshold > 0 and self._retry_reset_baseline is not None:
+            now = self.__clock.now()
             connection_duration = now - self._retry_reset_baseline
             if connection_duration >= self.__retry_delay_reset_threshold:
                 self.__current_retry_delay_strategy = self.__base_retry_delay_strategy
                 self._retry_reset_baseline = now
         self.__next_retry_delay, self.__current_retry_delay_strategy = (
-            self.__current_retry_delay_strategy.apply(self.__base_retry_delay)
+            self.__current_retry_delay_strategy.apply_for_error(self.__base_retry_delay, error)
         )
+        if self.__metrics is not None:
+            self.__metrics.gauge(MetricsSink.NEXT_RETRY_DELAY, self.__next_retry_delay)
 
     async def _try_start(self, can_return_fault: bool):
         if self.__connection_result is not None:
             return None
+        metrics = self.__metrics
+        governor = self.__reconnect_governor
         while True:
             if self.__next_retry_delay > 0:
                 delay = (
                     self.__next_retry_delay
-                    if self.__disconnected_time == 0
+                    if self.__disconnected_time is None
                     else self.__next_retry_delay
-                    - (time.time() - self.__disconnected_time)
+                    - (self.__clock.now() - self.__disconnected_time)
                 )
                 if delay > 0:
-                    self.__logger.info("Will reconnect after delay of %fs" % delay)
-                    await asyncio.sleep(delay)
+                    _log_reconnect(
+                        self.__logger, "Will reconnect after delay of %fs", delay,
+                        stream=self.__stream_key, attempt=self.__attempt + 1, delay=delay,
+                    )
+                    await self.__clock.async_sleep(delay)
+                    if metrics is not None:
+                        metrics.record(MetricsSink.RETRY_DELAY_TIME, delay)
+            self.__attempt += 1
+            refusal = self.__current_error_strategy.before_attempt()
+            connect_start = time.perf_counter()
             try:
-                self.__connection_result = await self.__connection_client.connect(
-                    self.__last_event_id
-                )
+                if refusal is not None:
+                    raise refusal
+                if metrics is not None:
+                    metrics.increment(MetricsSink.CONNECT_ATTEMPTS)
+                if governor is not None:
+                    await governor._acquire()
+                    connect_start = time.perf_counter()
+                try:
+                    self.__connection_result = await self.__connection_client.connect(
+                        self.__last_event_id
+                    )
+                finally:
+                    if governor is not None:
+                        governor._release()
             except Exception as e:
-                self.__disconnected_time = time.time()
-                self._compute_next_retry_delay()
+                # If the ErrorStrategy refused the attempt, nothing was sent over the network.
+                timings = None if e is refusal else self._connect_timings(connect_start)
+                if metrics is not None and e is not refusal:
+                    metrics.increment(MetricsSink.CONNECT_FAILURES)
+                _log_reconnect(
+                    self.__logger, "Connection attempt %d failed: %s", self.__attempt, e,
+                    stream=self.__stream_key, attempt=self.__attempt, error=_error_name(e),
+                    timings=_timings_fields(timings),
+                )
+                self.__disconnected_time = self.__clock.now()
+                self._compute_next_retry_delay(e)
                 fail_or_continue, self.__current_error_strategy = (
                     self.__current_error_strategy.apply(e)
                 )
                 if fail_or_continue == ErrorStrategy.FAIL:
                     raise e
                 if can_return_fault:
-                    return Fault(e)
+                    return Fault(e, timings)
                 continue
-            self._retry_reset_baseline = time.time()
+            timings = self._connect_timings(connect_start)
+            if metrics is not None:
+                metrics.increment(MetricsSink.CONNECTIONS)
+                metrics.record(MetricsSink.CONNECT_TIME, timings.total or 0)
+            downtime = None
+            if self.__connection_lost_time is not None:
+                downtime = self.__clock.now() - self.__connection_lost_time
+                self.__connection_lost_time = None
+            if self.__logger.isEnabledFor(logging.INFO):
+                self.__logger.info(
+                    "Connected to stream after %d attempt(s)", self.__attempt,
+                    extra=_fields(
+                        stream=self.__stream_key, attempt=self.__attempt,
+                        timings=_timings_fields(timings), downtime=downtime,
+                    ),
+                )
+            self.__attempt = 0
+            self._retry_reset_baseline = self.__clock.now()
+            self.__disconnected_time = None
+            self.__current_error_strategy.on_connected()
             self.__current_error_strategy = self.__base_error_strategy
             self.__interrupted = False
-            return Start(self.__connection_result.headers)
+            return Start(self.__connection_result.headers, timings, downtime)
+
+    def _connect_timings(self, connect_start: float) -> ConnectionTimings:
+        timings = self.__connection_client.last_connect_timings
+        if timings is None:
+            timings = ConnectionTimings(total=time.perf_counter() - connect_start)
+        return timings
 
     @property
     def last_event_id(self) -> Optional[str]:
@@ -235,6 +484,24 @@ class AsyncSSEClient:
         """
         return self.__last_event_id
 
+    def ack(self, event: Union[Event, str]):
+        """
+        Acknowledges that an event, and every event received before it, has been processed.
+
+        This has no effect unless the ``explicit_ack`` parameter was set. See
+        :meth:`.SSEClient.ack()` for details.
+
+        :param event: the last processed event, or its ID
+        """
+        if self.__ack_window is None:
+            return
+        last_event_id = event.last_event_id if isinstance(event, Event) else event
+        if last_event_id is None or not self.__ack_window.ack(last_event_id):
+            return  # already acknowledged, or not received from the stream
+        self.__last_event_id = last_event_id
+        if self.__checkpoint_store is not None:
+            self.__checkpoint_store.update(last_event_id)
+
     async def __aenter__(self):
         return self
 
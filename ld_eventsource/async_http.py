@@ -1,12 +1,17 @@
 import asyncio
+import time
 from logging import Logger
+from types import SimpleNamespace
 from typing import AsyncIterator, Callable, Optional, Tuple
 from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
 
 import aiohttp
 
+from ld_eventsource.actions import ConnectionTimings
 from ld_eventsource.errors import (Headers, HTTPContentTypeError,
                                    HTTPStatusError)
+from ld_eventsource.http import _ConnectionTimingsRecorder
+from ld_eventsource.structured_logging import _log_reconnect
 
 _CHUNK_SIZE = 10000
 
@@ -47,6 +52,53 @@ class _AsyncHttpConnectParams:
         return self.__query_params
 
 
+# The sessions that _AsyncHttpClientImpl creates report connection phases through this trace
+# config to the _ConnectionTimingsRecorder passed as each request's trace_request_ctx. aiohttp
+# resolves the host name as part of creating a connection, and does not report the TLS handshake
+# separately, so the connect phase is the connection creation time minus the DNS time and
+# includes any handshake.
+
+async def _on_dns_resolvehost_start(session, context: SimpleNamespace, params):
+    context.dns_start = time.perf_counter()
+
+
+async def _on_dns_resolvehost_end(session, context: SimpleNamespace, params):
+    dns = time.perf_counter() - context.dns_start
+    context.dns = getattr(context, 'dns', 0) + dns
+    context.trace_request_ctx.add('dns', dns)
+
+
+async def _on_connection_create_start(session, context: SimpleNamespace, params):
+    context.dns = 0
+    context.connection_start = time.perf_counter()
+
+
+async def _on_connection_create_end(session, context: SimpleNamespace, params):
+    elapsed = time.perf_counter() - context.connection_start
+    context.trace_request_ctx.add('connect', elapsed - context.dns)
+
+
+async def _on_request_headers_sent(session, context: SimpleNamespace, params):
+    context.request_sent = time.perf_counter()
+
+
+async def _on_request_end(session, context: SimpleNamespace, params):
+    request_sent = getattr(context, 'request_sent', None)
+    if request_sent is not None:
+        context.trace_request_ctx.add('time_to_first_byte', time.perf_counter() - request_sent)
+
+
+def _timing_trace_config() -> aiohttp.TraceConfig:
+    config = aiohttp.TraceConfig()
+    config.on_dns_resolvehost_start.append(_on_dns_resolvehost_start)
+    config.on_dns_resolvehost_end.append(_on_dns_resolvehost_end)
+    config.on_connection_create_start.append(_on_connection_create_start)
+    config.on_connection_create_end.append(_on_connection_create_end)
+    config.on_request_headers_sent.append(_on_request_headers_sent)
+    config.on_request_end.append(_on_request_end)
+    return config
+
+
 class _AsyncHttpClientImpl:
     def __init__(self, params: _AsyncHttpConnectParams, logger: Logger):
         self.__params = params
@@ -54,17 +106,31 @@ class _AsyncHttpClientImpl:
         self.__session: Optional[aiohttp.ClientSession] = params.session
         self.__session_lock = asyncio.Lock()
         self.__logger = logger
+        self.__last_timings: Optional[ConnectionTimings] = None
+
+    @property
+    def last_timings(self) -> Optional[ConnectionTimings]:
+        return self.__last_timings
 
     async def _get_session(self) -> aiohttp.ClientSession:
         if self.__session is not None:
             return self.__session
         async with self.__session_lock:
             if self.__session is None:
-                self.__session = aiohttp.ClientSession()
+                self.__session = aiohttp.ClientSession(trace_configs=[_timing_trace_config()])
         return self.__session
 
     async def connect(
         self, last_event_id: Optional[str]
+    ) -> Tuple[AsyncIterator[bytes], Callable, Headers]:
+        recorder = _ConnectionTimingsRecorder()
+        try:
+            return await self.__connect(last_event_id, recorder)
+        finally:
+            self.__last_timings = recorder.finish()
+
+    async def __connect(
+        self, last_event_id: Optional[str], recorder: _ConnectionTimingsRecorder
     ) -> Tuple[AsyncIterator[bytes], Callable, Headers]:
         url = self.__params.url
         if self.__params.query_params is not None:
@@ -75,7 +141,7 @@ class _AsyncHttpClientImpl:
                 query.update(qp)
                 url_parts[3] = urlencode(query)
                 url = urlunsplit(url_parts)
-        self.__logger.info("Connecting to stream at %s" % url)
+        _log_reconnect(self.__logger, "Connecting to stream at %s", url, url=url)
 
         headers = self.__params.headers.copy() if self.__params.headers else {}
         headers['Cache-Control'] = 'no-cache'
@@ -96,6 +162,9 @@ class _AsyncHttpClientImpl:
         if 'timeout' not in request_options:
             request_options['timeout'] = aiohttp.ClientTimeout(total=None)
 
+        if self.__external_session is None:
+            request_options['trace_request_ctx'] = recorder
+
         session = await self._get_session()
         resp = await session.get(url, **request_options)
 
@@ -1,6 +1,7 @@
 from typing import AsyncIterator, Callable, Optional
 
 from ld_eventsource.actions import Comment, Event
+from ld_eventsource.reader import _ChunkTimestamps
 
 
 class _AsyncBufferedLineReader:
@@ -18,6 +19,9 @@ class _AsyncBufferedLineReader:
             if len(chunk) == 0:
                 continue
 
+            if not isinstance(chunk, bytes):
+                # See _BufferedLineReader.lines_from().
+                chunk = bytes(chunk)
             lines = chunk.splitlines()
             if last_char_was_cr:
                 last_char_was_cr = False
@@ -43,10 +47,14 @@ class _AsyncSSEReader:
         lines_source: AsyncIterator[str],
         last_event_id: Optional[str] = None,
         set_retry: Optional[Callable[[int], None]] = None,
+        timestamps: Optional[_ChunkTimestamps] = None,
+        event_factory: Callable[..., Event] = Event,
     ):
         self._lines_source = lines_source
         self._last_event_id = last_event_id
         self._set_retry = set_retry
+        self._timestamps = timestamps
+        self._event_factory = event_factory
 
     @property
     def last_event_id(self):
@@ -56,16 +64,19 @@ class _AsyncSSEReader:
         event_type = ""
         event_data = None
         event_id = None
+        timestamps = self._timestamps
+        event_factory = self._event_factory
         async for line in self._lines_source:
             if line == "":
                 if event_data is not None:
                     if event_id is not None:
                         self._last_event_id = event_id
-                    yield Event(
+                    yield event_factory(
                         "message" if event_type == "" else event_type,
                         event_data,
                         event_id,
                         self._last_event_id,
+                        None if timestamps is None else timestamps.latest,
                     )
                 event_type = ""
                 event_data = None
@@ -0,0 +1,146 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from typing import AsyncIterable, List, Optional, Sequence, Union
+
+from ld_eventsource.actions import Event
+from ld_eventsource.async_client import AsyncSSEClient
+from ld_eventsource.config.async_connect_strategy import AsyncConnectStrategy
+from ld_eventsource.config.error_strategy import ErrorStrategy
+from ld_eventsource.redundant import PathStats, _MergeWindow
+
+
+def _path_client(
+    path: Union[str, AsyncConnectStrategy, AsyncSSEClient], logger: Optional[logging.Logger]
+) -> AsyncSSEClient:
+    if isinstance(path, AsyncSSEClient):
+        return path
+    return AsyncSSEClient(connect=path, error_strategy=ErrorStrategy.always_continue(), logger=logger)
+
+
+class AsyncRedundantSSEClient:
+    """
+    The async equivalent of :class:`.RedundantSSEClient`: reads the same stream through two or
+    more independent paths, and delivers each event as soon as the first copy of it arrives.
+
+    .. caution::
+        This feature is experimental and should NOT be considered ready for production
+        use. It may change or be removed without notice and is not subject to backwards
+        compatibility guarantees.
+
+    Each path is an :class:`.AsyncSSEClient` that is read by its own task, with its own
+    connection, retry delay, and error handling. See :class:`.RedundantSSEClient` for how
+    events are matched across paths.
+
+    :param paths: the clients, URLs, or strategies that provide the same stream
+    :param dedup_window: how many recent event IDs are remembered for dropping duplicates
+    :param logger: if provided, the logger for the clients created for URLs and strategies
+    """
+
+    QUEUE_SIZE = 100
+
+    def __init__(
+        self,
+        paths: Sequence[Union[str, AsyncConnectStrategy, AsyncSSEClient]],
+        dedup_window: int = 1000,
+        logger: Optional[logging.Logger] = None,
+    ):
+        if not paths:
+            raise ValueError("at least one path is required")
+        self.__clients = [_path_client(path, logger) for path in paths]
+        self.__stats = [PathStats() for _ in paths]
+        self.__window = _MergeWindow(self.__stats, dedup_window)
+        self.__items: Optional[asyncio.Queue] = None
+        self.__tasks: List[asyncio.Task] = []
+        self.__closed = False
+        self.__last_event_id: Optional[str] = None
+
+    @property
+    def clients(self) -> List[AsyncSSEClient]:
+        """The client for each path, in the order in which the paths were given."""
+        return list(self.__clients)
+
+    @property
+    def path_stats(self) -> List[PathStats]:
+        """The statistics for each path, in the order in which the paths were given."""
+        return list(self.__stats)
+
+    @property
+    def last_event_id(self) -> Optional[str]:
+        """The ID of the last delivered event that had one."""
+        return self.__last_event_id
+
+    @property
+    def events(self) -> AsyncIterable[Event]:
+        """
+        An async iterable series of the :class:`.Event` objects received on any path, each
+        delivered once, in the order in which their first copies arrived.
+        """
+        return self._events_generator()
+
+    async def close(self):
+        """
+        Permanently shuts down this client and the client of every path.
+        """
+        self.__closed = True
+        for task in self.__tasks:
+            task.cancel()
+        for client in self.__clients:
+            await client.close()
+        if self.__items is not None:
+            try:
+                self.__items.put_nowait((None, None, 0.0))
+            except asyncio.QueueFull:
+                pass  # the reader is not waiting, so it will see that the client was closed
+
+    async def _events_generator(self):
+        if self.__items is None:
+            self.__items = asyncio.Queue(AsyncRedundantSSEClient.QUEUE_SIZE)
+            self.__tasks = [
+                asyncio.create_task(self.__read_path(i, client))
+                for i, client in enumerate(self.__clients)
+            ]
+        items = self.__items
+        remaining = len(self.__clients)
+        error: Optional[Exception] = None
+        window = self.__window
+        while remaining > 0 and not self.__closed:
+            path, item, arrived = await items.get()
+            if path is None:
+                continue
+            if isinstance(item, Event):
+                if window.arrive(path, item, arrived):
+                    if item.id:
+                        self.__last_event_id = item.id
+                    yield item
+            else:
+                remaining -= 1
+                if item is not None:
+                    error = item
+        if error is not None and not self.__closed:
+            raise error
+
+    async def __read_path(self, path: int, client: AsyncSSEClient):
+        assert self.__items is not None
+        outcome: Optional[Exception] = None
+        try:
+            async for item in client.all:
+                if self.__closed:
+                    return
+                if isinstance(item, Event):
+                    await self.__items.put((path, item, time.monotonic()))
+        except Exception as e:
+            outcome = e
+        if not self.__closed:
+            await self.__items.put((path, outcome, 0.0))
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, type, value, traceback):
+        await self.close()
+
+
+__all__ = ['AsyncRedundantSSEClient']
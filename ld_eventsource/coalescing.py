@@ -0,0 +1,47 @@
+from collections import OrderedDict
+from typing import Callable, Hashable, Optional
+
+from ld_eventsource.actions import Event
+
+EventKey = Callable[[Event], Optional[Hashable]]
+"""
+A callable that extracts a coalescing key from an :class:`.Event`, as used by
+:meth:`.SSEClient.coalesced_events`.
+
+Events that produce the same key supersede each other; only the newest one is delivered. If the
+callable returns ``None``, the event is never coalesced with any other event.
+"""
+
+
+class _CoalescingBuffer:
+    """
+    Holds at most one pending event per key. Putting an event whose key is already pending
+    replaces the pending event but keeps its original position, so events are delivered in the
+    order in which their keys first arrived.
+    """
+
+    def __init__(self, key: EventKey):
+        self.__key = key
+        self.__pending: OrderedDict = OrderedDict()
+        self.__superseded = 0
+
+    def __len__(self) -> int:
+        return len(self.__pending)
+
+    @property
+    def superseded(self) -> int:
+        """
+        The number of events that were dropped because a newer event had the same key.
+        """
+        return self.__superseded
+
+    def put(self, event: Event):
+        k = self.__key(event)
+        if k is None:
+            k = object()  # a unique key, so this event can never be replaced
+        elif k in self.__pending:
+            self.__superseded += 1
+        self.__pending[k] = event
+
+    def pop(self) -> Event:
+        return self.__pending.popitem(last=False)[1]
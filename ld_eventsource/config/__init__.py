@@ -1,4 +1,8 @@
+from .checkpoint_store import CheckpointStore
+from .circuit_breaker import CircuitBreaker
+from .clock import Clock, VirtualClock
 from .connect_strategy import (ConnectionClient, ConnectionResult,
                                ConnectStrategy)
-from .error_strategy import ErrorStrategy
+from .error_strategy import ErrorStrategy, ErrorStrategyBuilder
+from .fault_injection import FaultInjection
 from .retry_delay_strategy import RetryDelayStrategy
@@ -1,9 +1,21 @@
 from __future__ import annotations
 
+import asyncio
+import time
 from logging import Logger
-from typing import AsyncIterator, Callable, Optional
-
+from typing import AsyncIterator, Callable, List, Optional, Sequence, Union
+
+from ld_eventsource.actions import ConnectionTimings
+from ld_eventsource.async_reader import _AsyncBufferedLineReader
+from ld_eventsource.config.clock import Clock
+from ld_eventsource.config.failover import _EndpointSelector
+from ld_eventsource.config.fault_injection import (FaultInjection,
+                                                   _disconnected,
+                                                   _FaultInjector, _refused)
+from ld_eventsource.config.rotation import (_BLOCK, _CLOSED, _CONNECTED, _END,
+                                            _async_event_blocks, _RecentIds)
 from ld_eventsource.errors import Headers
+from ld_eventsource.journal import _CHUNK, _JournalReplay, _JournalWriter
 
 
 class AsyncConnectStrategy:
@@ -59,6 +71,131 @@ class AsyncConnectStrategy:
             _AsyncHttpConnectParams(url, headers, session, aiohttp_request_options, query_params)
         )
 
+    @staticmethod
+    def record(
+        inner: AsyncConnectStrategy,
+        path: str,
+        compress: bool = False,
+        max_buffered_chunks: int = 1000,
+    ) -> AsyncConnectStrategy:
+        """
+        Wraps another strategy so that everything it reads is also recorded to a journal file.
+
+        The file is written by a background thread, so recording never blocks the event loop.
+        See :meth:`.ConnectStrategy.record()` for details.
+
+        :param inner: the strategy that makes the actual connections
+        :param path: the journal file path
+        :param compress: true to compress each chunk with zlib
+        :param max_buffered_chunks: the maximum number of records waiting to be written
+        """
+        return _AsyncRecordingConnectStrategy(inner, path, compress, max_buffered_chunks)
+
+    @staticmethod
+    def replay(
+        path: str, speed: Optional[float] = None, clock: Optional[Clock] = None
+    ) -> AsyncConnectStrategy:
+        """
+        Creates a strategy that reads a stream from a journal made by :meth:`record()`, instead of
+        from the network. See :meth:`.ConnectStrategy.replay()` for details.
+
+        :param path: the journal file path
+        :param speed: if ``None`` or zero, chunks are provided as fast as they are read; otherwise,
+            the original timing within each connection is reproduced, scaled by this factor
+        :param clock: the source of time for reproducing the original timing (see
+            :class:`.Clock`)
+        """
+        return _AsyncReplayConnectStrategy(path, speed, clock or Clock())
+
+    @staticmethod
+    def inject_faults(inner: AsyncConnectStrategy, faults: FaultInjection) -> AsyncConnectStrategy:
+        """
+        Wraps another strategy so that its connections have faults injected into them at random.
+        Delays are awaited with :meth:`.Clock.async_sleep()`, so they do not block the event
+        loop. See :meth:`.ConnectStrategy.inject_faults()` for details.
+
+        :param inner: the strategy that makes the actual connections
+        :param faults: what to inject
+        """
+        return _AsyncFaultInjectingConnectStrategy(inner, faults)
+
+    @staticmethod
+    def failover(
+        endpoints: Sequence[Union[str, AsyncConnectStrategy]],
+        failure_penalty: float = 10,
+        failure_half_life: float = 60,
+        latency_margin: float = 0.05,
+        clock: Optional[Clock] = None,
+    ) -> AsyncConnectStrategy:
+        """
+        Creates a strategy that can connect to any of several equivalent endpoints, and picks the
+        healthiest one for each connection attempt. URLs use the default ``aiohttp`` behavior of
+        :meth:`http()`. See :meth:`.ConnectStrategy.failover()` for details.
+
+        :param endpoints: the stream URLs, or strategies, in order of preference
+        :param failure_penalty: how much a recent failure adds to an endpoint's score, in seconds
+            of connect time
+        :param failure_half_life: how quickly failures are forgotten, in seconds
+        :param latency_margin: how much lower, in seconds, the score of an endpoint must be to be
+            chosen over an earlier one in the list
+        :param clock: the source of time for aging failures (see :class:`.Clock`)
+        """
+        if not endpoints:
+            raise ValueError("at least one endpoint is required")
+        return _AsyncFailoverConnectStrategy(
+            [AsyncConnectStrategy.http(e) if isinstance(e, str) else e for e in endpoints],
+            failure_penalty,
+            failure_half_life,
+            latency_margin,
+            clock or Clock(),
+        )
+
+    @staticmethod
+    def hedged(
+        inner: AsyncConnectStrategy,
+        hedge_delay: float,
+        alternate: Optional[AsyncConnectStrategy] = None,
+    ) -> AsyncConnectStrategy:
+        """
+        Wraps another strategy so that a slow connection attempt is hedged with a second one,
+        made in parallel after ``hedge_delay`` seconds. See :meth:`.ConnectStrategy.hedged()` for
+        details. The attempts are tasks on the event loop, and a losing attempt that is still in
+        progress is cancelled.
+
+        :param inner: the strategy that makes the first attempt, and the second one if
+            ``alternate`` is not specified
+        :param hedge_delay: how long to wait for the first attempt before starting the second,
+            in seconds
+        :param alternate: if provided, the strategy for the second attempt
+        """
+        return _AsyncHedgedConnectStrategy(inner, hedge_delay, alternate)
+
+    @staticmethod
+    def rotating(
+        inner: AsyncConnectStrategy,
+        max_connection_age: float,
+        max_overlap: float = 10,
+        dedup_window: int = 1000,
+        clock: Optional[Clock] = None,
+    ) -> AsyncConnectStrategy:
+        """
+        Wraps another strategy so that each connection is replaced with a new one once it is
+        ``max_connection_age`` seconds old, without a gap in the stream. Each connection is read
+        by its own task. See :meth:`.ConnectStrategy.rotating()` for details.
+
+        :param inner: the strategy that makes the actual connections
+        :param max_connection_age: how long a connection is used before it is replaced, in
+            seconds
+        :param max_overlap: the longest time for which two connections are read at once, in
+            seconds
+        :param dedup_window: how many recent event IDs are remembered for dropping duplicates
+        :param clock: the source of time for the age of connections and the length of the
+            overlap (see :class:`.Clock`)
+        """
+        return _AsyncRotatingConnectStrategy(
+            inner, max_connection_age, max_overlap, dedup_window, clock or Clock()
+        )
+
 
 class AsyncConnectionClient:
     """
@@ -81,6 +218,14 @@ class AsyncConnectionClient:
         """
         raise NotImplementedError("AsyncConnectionClient base class cannot be used by itself")
 
+    @property
+    def last_connect_timings(self) -> Optional[ConnectionTimings]:
+        """
+        How long each phase of the most recent call to :meth:`connect()` took, whether it
+        succeeded or failed. See :attr:`.ConnectionClient.last_connect_timings`.
+        """
+        return None
+
     async def close(self):
         """
         Does whatever is necessary to release resources when the AsyncSSEClient is closed.
@@ -164,8 +309,526 @@ class _AsyncHttpConnectionClient(AsyncConnectionClient):
         stream, closer, headers = await self.__impl.connect(last_event_id)
         return AsyncConnectionResult(stream, closer, headers)
 
+    @property
+    def last_connect_timings(self) -> Optional[ConnectionTimings]:
+        return self.__impl.last_timings
+
     async def close(self):
         await self.__impl.close()
 
 
+class _AsyncRecordingConnectStrategy(AsyncConnectStrategy):
+    def __init__(
+        self, inner: AsyncConnectStrategy, path: str, compress: bool, max_buffered_chunks: int
+    ):
+        self.__inner = inner
+        self.__path = path
+        self.__compress = compress
+        self.__max_buffered_chunks = max_buffered_chunks
+
+    def create_client(self, logger: Logger) -> AsyncConnectionClient:
+        return _AsyncRecordingConnectionClient(
+            self.__inner.create_client(logger),
+            _JournalWriter(self.__path, self.__compress, self.__max_buffered_chunks),
+        )
+
+
+class _AsyncRecordingConnectionClient(AsyncConnectionClient):
+    def __init__(self, inner: AsyncConnectionClient, journal: _JournalWriter):
+        self.__inner = inner
+        self.__journal = journal
+
+    async def connect(self, last_event_id: Optional[str]) -> AsyncConnectionResult:
+        journal = self.__journal
+        try:
+            result = await self.__inner.connect(last_event_id)
+        except Exception as e:
+            journal.record_failure(e)
+            raise
+        journal.record_start(result.headers)
+        ended = False
+
+        def end(error: Optional[BaseException]):
+            nonlocal ended
+            if not ended:
+                ended = True
+                journal.record_end(error)
+
+        async def stream():
+            try:
+                async for chunk in result.stream:
+                    journal.record(_CHUNK, chunk)
+                    yield chunk
+            except Exception as e:
+                end(e)
+                raise
+            end(None)
+
+        async def close():
+            end(None)
+            await result.close()
+
+        return AsyncConnectionResult(stream(), close, result.headers)
+
+    @property
+    def last_connect_timings(self) -> Optional[ConnectionTimings]:
+        return self.__inner.last_connect_timings
+
+    async def close(self):
+        try:
+            await self.__inner.close()
+        finally:
+            # Waiting for the writer thread to drain its queue should not block the event loop.
+            await asyncio.to_thread(self.__journal.close)
+
+
+class _AsyncReplayConnectStrategy(AsyncConnectStrategy):
+    def __init__(self, path: str, speed: Optional[float], clock: Clock):
+        self.__path = path
+        self.__speed = speed
+        self.__clock = clock
+
+    def create_client(self, logger: Logger) -> AsyncConnectionClient:
+        return _AsyncReplayConnectionClient(_JournalReplay(self.__path), self.__speed, self.__clock)
+
+
+class _AsyncReplayConnectionClient(AsyncConnectionClient):
+    def __init__(self, replay: _JournalReplay, speed: Optional[float], clock: Clock):
+        self.__replay = replay
+        self.__speed = speed
+        self.__clock = clock
+
+    async def connect(self, last_event_id: Optional[str]) -> AsyncConnectionResult:
+        headers, start_timestamp = self.__replay.next_connection()
+        return AsyncConnectionResult(self.__stream(start_timestamp), None, headers)
+
+    async def __stream(self, start_timestamp: float) -> AsyncIterator:
+        speed = self.__speed
+        clock = self.__clock
+        start_time = clock.now()
+        for record in self.__replay.chunks():
+            if speed:
+                delay = (record.timestamp - start_timestamp) / speed - (clock.now() - start_time)
+                if delay > 0:
+                    await clock.async_sleep(delay)
+            yield record.payload
+
+    async def close(self):
+        self.__replay.close()
+
+
+class _AsyncFaultInjectingConnectStrategy(AsyncConnectStrategy):
+    def __init__(self, inner: AsyncConnectStrategy, faults: FaultInjection):
+        self.__inner = inner
+        self.__faults = faults
+
+    def create_client(self, logger: Logger) -> AsyncConnectionClient:
+        return _AsyncFaultInjectingConnectionClient(
+            self.__inner.create_client(logger), self.__faults._injector()
+        )
+
+
+class _AsyncFaultInjectingConnectionClient(AsyncConnectionClient):
+    def __init__(self, inner: AsyncConnectionClient, injector: _FaultInjector):
+        self.__inner = inner
+        self.__injector = injector
+
+    async def connect(self, last_event_id: Optional[str]) -> AsyncConnectionResult:
+        injector = self.__injector
+        refuse, delay = injector.plan_connect()
+        if delay > 0:
+            await injector.clock.async_sleep(delay)
+        if refuse:
+            raise _refused()
+        result = await self.__inner.connect(last_event_id)
+
+        async def stream():
+            async for chunk in result.stream:
+                delay, pieces, disconnect = injector.plan_chunk(chunk)
+                if delay > 0:
+                    await injector.clock.async_sleep(delay)
+                for piece in pieces:
+                    yield piece
+                if disconnect:
+                    raise _disconnected()
+
+        return AsyncConnectionResult(stream(), result.close, result.headers)
+
+    @property
+    def last_connect_timings(self) -> Optional[ConnectionTimings]:
+        return self.__inner.last_connect_timings
+
+    async def close(self):
+        await self.__inner.close()
+
+
+class _AsyncFailoverConnectStrategy(AsyncConnectStrategy):
+    def __init__(
+        self,
+        endpoints: List[AsyncConnectStrategy],
+        failure_penalty: float,
+        failure_half_life: float,
+        latency_margin: float,
+        clock: Clock,
+    ):
+        self.__endpoints = endpoints
+        self.__failure_penalty = failure_penalty
+        self.__failure_half_life = failure_half_life
+        self.__latency_margin = latency_margin
+        self.__clock = clock
+
+    def create_client(self, logger: Logger) -> AsyncConnectionClient:
+        return _AsyncFailoverConnectionClient(
+            [e.create_client(logger) for e in self.__endpoints],
+            _EndpointSelector(
+                len(self.__endpoints),
+                self.__failure_half_life,
+                self.__failure_penalty,
+                self.__latency_margin,
+                self.__clock,
+            ),
+            logger,
+        )
+
+
+class _AsyncFailoverConnectionClient(AsyncConnectionClient):
+    def __init__(
+        self, inners: List[AsyncConnectionClient], selector: _EndpointSelector, logger: Logger
+    ):
+        self.__inners = inners
+        self.__selector = selector
+        self.__logger = logger
+        self.__current: Optional[int] = None
+
+    async def connect(self, last_event_id: Optional[str]) -> AsyncConnectionResult:
+        selector = self.__selector
+        index = selector.choose()
+        if self.__current is not None and index != self.__current:
+            self.__logger.warning(
+                "Failing over from stream endpoint %d to endpoint %d", self.__current + 1, index + 1
+            )
+        self.__current = index
+        inner = self.__inners[index]
+        start = time.perf_counter()
+        try:
+            result = await inner.connect(last_event_id)
+        except Exception:
+            selector.record_failure(index)
+            raise
+        timings = inner.last_connect_timings
+        selector.record_success(
+            index,
+            timings.total if timings is not None and timings.total is not None
+            else time.perf_counter() - start,
+        )
+
+        async def stream():
+            try:
+                async for chunk in result.stream:
+                    yield chunk
+            except Exception:
+                selector.record_failure(index)
+                raise
+
+        return AsyncConnectionResult(stream(), result.close, result.headers)
+
+    @property
+    def last_connect_timings(self) -> Optional[ConnectionTimings]:
+        if self.__current is None:
+            return None
+        return self.__inners[self.__current].last_connect_timings
+
+    async def close(self):
+        for inner in self.__inners:
+            await inner.close()
+
+
+class _AsyncHedgedConnectStrategy(AsyncConnectStrategy):
+    def __init__(
+        self,
+        inner: AsyncConnectStrategy,
+        hedge_delay: float,
+        alternate: Optional[AsyncConnectStrategy],
+    ):
+        self.__inner = inner
+        self.__hedge_delay = hedge_delay
+        self.__alternate = alternate
+
+    def create_client(self, logger: Logger) -> AsyncConnectionClient:
+        # Each attempt needs its own client, since they can be in progress at the same time.
+        return _AsyncHedgedConnectionClient(
+            self.__inner.create_client(logger),
+            (self.__alternate or self.__inner).create_client(logger),
+            self.__hedge_delay,
+            logger,
+        )
+
+
+def _discard_attempt(task: asyncio.Future):
+    # Closes the connection of an attempt that lost the race, if it succeeded anyway.
+    if task.cancelled() or task.exception() is not None:
+        return
+    asyncio.ensure_future(task.result().close())
+
+
+class _AsyncHedgedConnectionClient(AsyncConnectionClient):
+    def __init__(
+        self,
+        primary: AsyncConnectionClient,
+        secondary: AsyncConnectionClient,
+        hedge_delay: float,
+        logger: Logger,
+    ):
+        self.__clients = (primary, secondary)
+        self.__hedge_delay = hedge_delay
+        self.__logger = logger
+        # The timings of the winning attempt of the last race, or of the primary attempt if every
+        # attempt failed, since its error is the one that is raised.
+        self.__timings: Optional[ConnectionTimings] = None
+
+    async def connect(self, last_event_id: Optional[str]) -> AsyncConnectionResult:
+        self.__timings = None
+        timings: List[Optional[ConnectionTimings]] = [None, None]
+
+        async def attempt(index: int) -> AsyncConnectionResult:
+            # The client is shared with the attempts of other races, which may still be in
+            # progress, so its timings are read as soon as this attempt is over.
+            client = self.__clients[index]
+            try:
+                return await client.connect(last_event_id)
+            finally:
+                timings[index] = client.last_connect_timings
+
+        tasks = [asyncio.ensure_future(attempt(0))]
+        winner: Optional[int] = None
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=self.__hedge_delay)
+            if not done:
+                self.__logger.info(
+                    "Connection attempt did not succeed within %fs; starting a hedged attempt",
+                    self.__hedge_delay,
+                )
+                tasks.append(asyncio.ensure_future(attempt(1)))
+            while True:
+                for i, task in enumerate(tasks):
+                    if task.done() and task.exception() is None:
+                        winner = i
+                        break
+                if winner is not None or all(task.done() for task in tasks):
+                    break
+                await asyncio.wait(
+                    [task for task in tasks if not task.done()],
+                    return_when=asyncio.FIRST_COMPLETED,
+                )
+        finally:
+            for i, task in enumerate(tasks):
+                if i != winner:
+                    task.cancel()
+                    task.add_done_callback(_discard_attempt)
+        self.__timings = timings[0 if winner is None else winner]
+        if winner is None:
+            raise tasks[0].exception() or ConnectionError("hedged connection attempts failed")
+        if len(tasks) == 2:
+            self.__logger.info("Hedged connection attempt %d won", winner + 1)
+        return tasks[winner].result()
+
+    @property
+    def last_connect_timings(self) -> Optional[ConnectionTimings]:
+        return self.__timings
+
+    async def close(self):
+        for client in self.__clients:
+            await client.close()
+
+
+class _AsyncRotatingConnectStrategy(AsyncConnectStrategy):
+    def __init__(
+        self,
+        inner: AsyncConnectStrategy,
+        max_connection_age: float,
+        max_overlap: float,
+        dedup_window: int,
+        clock: Clock,
+    ):
+        self.__inner = inner
+        self.__max_connection_age = max_connection_age
+        self.__max_overlap = max_overlap
+        self.__dedup_window = dedup_window
+        self.__clock = clock
+
+    def create_client(self, logger: Logger) -> AsyncConnectionClient:
+        return _AsyncRotatingConnectionClient(
+            self.__inner.create_client(logger),
+            self.__max_connection_age,
+            self.__max_overlap,
+            self.__dedup_window,
+            self.__clock,
+            logger,
+        )
+
+
+class _AsyncRotationReader:
+    # Reads the events of one connection in its own task and puts them on a shared queue,
+    # after first making the connection if it was not given one.
+
+    def __init__(
+        self,
+        items: asyncio.Queue,
+        result: Optional[AsyncConnectionResult],
+        client: Optional[AsyncConnectionClient] = None,
+        last_event_id: Optional[str] = None,
+    ):
+        self.__items = items
+        self.__result = result
+        self.__client = client
+        self.__last_event_id = last_event_id
+        self.__task = asyncio.ensure_future(self.__run())
+
+    async def __run(self):
+        try:
+            if self.__result is None and self.__client is not None:
+                self.__result = await self.__client.connect(self.__last_event_id)
+                await self.__items.put((self, _CONNECTED, None))
+            if self.__result is None:
+                return
+            lines = _AsyncBufferedLineReader.lines_from(self.__result.stream)
+            async for item in _async_event_blocks(lines):
+                await self.__items.put((self, _BLOCK, item))
+            await self.__items.put((self, _END, None))
+        except Exception as e:
+            await self.__items.put((self, _END, e))
+
+    async def stop(self):
+        self.__task.cancel()
+        if self.__result is not None:
+            await self.__result.close()
+
+
+class _AsyncRotatingConnectionClient(AsyncConnectionClient):
+    QUEUE_SIZE = 100
+
+    def __init__(
+        self,
+        inner: AsyncConnectionClient,
+        max_connection_age: float,
+        max_overlap: float,
+        dedup_window: int,
+        clock: Clock,
+        logger: Logger,
+    ):
+        self.__inner = inner
+        self.__max_connection_age = max_connection_age
+        self.__max_overlap = max_overlap
+        self.__dedup_window = dedup_window
+        self.__clock = clock
+        self.__logger = logger
+
+    async def connect(self, last_event_id: Optional[str]) -> AsyncConnectionResult:
+        result = await self.__inner.connect(last_event_id)
+        items: asyncio.Queue = asyncio.Queue(_AsyncRotatingConnectionClient.QUEUE_SIZE)
+        readers: List[_AsyncRotationReader] = [_AsyncRotationReader(items, result)]
+        closed = False
+
+        async def close():
+            nonlocal closed
+            closed = True
+            for reader in readers:
+                await reader.stop()
+            try:
+                items.put_nowait((None, _CLOSED, None))
+            except asyncio.QueueFull:
+                pass  # the stream is not waiting, so it will see that it was closed
+
+        def is_closed() -> bool:
+            return closed
+
+        return AsyncConnectionResult(
+            self.__stream(items, readers, last_event_id, is_closed), close, result.headers
+        )
+
+    async def __stream(
+        self,
+        items: asyncio.Queue,
+        readers: List[_AsyncRotationReader],
+        last_event_id: Optional[str],
+        is_closed: Callable[[], bool],
+    ) -> AsyncIterator[bytes]:
+        recent = _RecentIds(self.__dedup_window)
+        recent.last = last_event_id
+        current = readers[0]
+        candidate: Optional[_AsyncRotationReader] = None
+        candidate_connected = False
+        clock = self.__clock
+        rotate_at = clock.now() + self.__max_connection_age
+        overlap_until = 0.0
+        try:
+            while not is_closed():
+                now = clock.now()
+                if candidate is None and now >= rotate_at:
+                    self.__logger.info("Rotating stream connection")
+                    candidate = _AsyncRotationReader(items, None, self.__inner, recent.last)
+                    readers.append(candidate)
+                    candidate_connected = False
+                    overlap_until = now + self.__max_overlap
+                try:
+                    reader, kind, payload = await asyncio.wait_for(
+                        items.get(),
+                        max((rotate_at if candidate is None else overlap_until) - now, 0),
+                    )
+                except asyncio.TimeoutError:
+                    if candidate is None or clock.now() < overlap_until:
+                        continue  # a virtual clock may not have reached the deadline yet
+                    reader, kind, payload = None, None, None
+                switch, abandon = False, False
+                if reader is None and kind is None:
+                    # The overlap is over; use the new connection only if it is ready.
+                    switch, abandon = candidate_connected, not candidate_connected
+                elif reader is current and kind == _BLOCK:
+                    block, event_id = payload
+                    if recent.add(event_id):
+                        yield block
+                elif reader is current and kind == _END:
+                    if candidate is None:
+                        if payload is not None:
+                            raise payload
+                        return
+                    switch = True
+                elif reader is candidate and kind == _CONNECTED:
+                    candidate_connected = True
+                elif reader is candidate and kind == _BLOCK:
+                    block, event_id = payload
+                    # Until the new connection is known to have caught up, an event without an ID
+                    # may be one that was already passed on.
+                    if event_id is not None:
+                        if recent.add(event_id):
+                            yield block
+                        switch = True
+                elif reader is candidate and kind == _END:
+                    abandon = True
+                if candidate is not None and abandon:
+                    self.__logger.warning(
+                        "Could not rotate stream connection: %s", payload or "timed out"
+                    )
+                    await candidate.stop()
+                    readers.remove(candidate)
+                    candidate = None
+                    rotate_at = clock.now() + self.__max_connection_age
+                elif candidate is not None and switch:
+                    self.__logger.info("Switched to the new stream connection")
+                    await current.stop()
+                    readers.remove(current)
+                    current, candidate = candidate, None
+                    rotate_at = clock.now() + self.__max_connection_age
+        finally:
+            for reader in readers:
+                await reader.stop()
+
+    @property
+    def last_connect_timings(self) -> Optional[ConnectionTimings]:
+        return self.__inner.last_connect_timings
+
+    async def close(self):
+        await self.__inner.close()
+
+
 __all__ = ['AsyncConnectStrategy', 'AsyncConnectionClient', 'AsyncConnectionResult']
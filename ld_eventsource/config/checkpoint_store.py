@@ -0,0 +1,309 @@
+from __future__ import annotations
+
+import logging
+import mmap
+import os
+import struct
+import tempfile
+import threading
+import time
+import zlib
+from typing import Optional, Tuple
+
+
+class CheckpointStore:
+    """
+    Base class of strategies for persisting :attr:`.SSEClient.last_event_id` so that a stream can
+    be resumed after the process restarts.
+
+    When a store is passed to :class:`.SSEClient` and the ``last_event_id`` parameter is not
+    specified, the client calls :meth:`load()` once at creation time and sends the result as the
+    ``Last-Event-Id`` of the first connection. After that, it calls :meth:`update()` whenever
+    an event with an ID is received, and :meth:`flush()` whenever a connection ends or the
+    client is closed.
+
+    :meth:`update()` is called on the same thread that is reading events, once for every event
+    that has an ID, so implementations should make it as cheap as possible and defer any real
+    I/O to :meth:`flush()` or to a bounded schedule of their own.
+
+    A store is stateful and should only be used by one client at a time. The client does not
+    close the store; it can be reused by a later client instance.
+    """
+
+    def load(self) -> Optional[str]:
+        """
+        Returns the last event ID that was persisted, or ``None`` if there is none.
+        """
+        return None
+
+    def update(self, last_event_id: str):
+        """
+        Records the latest event ID. The implementation may persist it immediately or later.
+
+        :param last_event_id: the ID of the most recent event
+        """
+        pass
+
+    def flush(self):
+        """
+        Persists the most recent ID passed to :meth:`update()`, if it has not already been
+        persisted.
+        """
+        pass
+
+    def close(self):
+        """
+        Flushes any pending ID and releases resources held by the store.
+        """
+        self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, type, value, traceback):
+        self.close()
+
+    @staticmethod
+    def mmap_file(
+        path: str,
+        write_interval: float = 1,
+        write_every: int = 0,
+        fsync: bool = False,
+        max_id_length: int = 1024,
+        logger: Optional[logging.Logger] = None,
+    ) -> CheckpointStore:
+        """
+        Creates a store that keeps the last event ID in a small memory-mapped file.
+
+        Writing the ID only copies it into the mapped pages, which the operating system writes
+        back to disk on its own schedule; the ID therefore survives a crash of the process even
+        if ``fsync`` is false, but might not survive a crash of the whole machine. Writes are
+        further limited so that a burst of events does not turn into a burst of writes: an ID
+        is only written if ``write_interval`` seconds have passed since the previous write, or
+        if ``write_every`` IDs have been received since then, whichever comes first. An ID that
+        is held back is written by a timer once ``write_interval`` has elapsed, even if no more
+        events arrive, so the persisted ID is never more than ``write_interval`` seconds behind.
+        The pending ID is always written when a connection ends or the client is closed.
+
+        The file holds two alternating copies of the ID, each with a checksum, so a write that
+        is interrupted partway through cannot corrupt the previous checkpoint. IDs longer than
+        ``max_id_length`` bytes in UTF-8 are not persisted, leaving the previous checkpoint in
+        place, and a warning is logged each time one is skipped. If an existing file was
+        created with a different ``max_id_length``, it is replaced by a file of the new size
+        that holds the same checkpoint; the new file is written and synced under a temporary
+        name first, so the checkpoint is not lost if the process stops partway through. If that
+        checkpoint is too long for the new size, a ``ValueError`` is raised and the file is left
+        unchanged.
+
+        :param path: the file path; the file is created if it does not exist
+        :param write_interval: the minimum time between writes, in seconds; zero means that every
+            ID is written
+        :param write_every: if greater than zero, an ID is written after this many IDs have been
+            received even if ``write_interval`` has not elapsed
+        :param fsync: true to force each write through to disk immediately
+        :param max_id_length: the largest ID, in bytes, that can be persisted
+        :param logger: where to log a warning when an ID cannot be persisted; if not specified,
+            the ``launchdarkly-eventsource`` logger is used
+        """
+        return _MmapFileCheckpointStore(
+            path, write_interval, write_every, fsync, max_id_length,
+            logger or logging.getLogger('launchdarkly-eventsource'),
+        )
+
+
+# Each slot is a header (magic, sequence number, payload length, CRC-32 of payload) followed by
+# up to max_id_length bytes of payload. The slot with the highest valid sequence number wins.
+# The file is exactly two slots long, so the slot size of an existing file is half its size.
+_SLOT_HEADER = struct.Struct('<4sQII')
+_SLOT_MAGIC = b'LDCP'
+
+
+def _read_slot(buffer: mmap.mmap, offset: int, slot_size: int) -> Optional[Tuple[int, str]]:
+    magic, sequence, length, crc = _SLOT_HEADER.unpack_from(buffer, offset)
+    if magic != _SLOT_MAGIC or length > slot_size - _SLOT_HEADER.size:
+        return None
+    payload_offset = offset + _SLOT_HEADER.size
+    payload = buffer[payload_offset:payload_offset + length]
+    if zlib.crc32(payload) != crc:
+        return None
+    try:
+        return (sequence, payload.decode())
+    except UnicodeDecodeError:
+        return None
+
+
+def _write_slot(buffer, slot_size: int, sequence: int, payload: bytes):
+    offset = (sequence % 2) * slot_size
+    # Write the payload before the header, so that the header's checksum only matches once the
+    # whole slot is in place.
+    payload_offset = offset + _SLOT_HEADER.size
+    buffer[payload_offset:payload_offset + len(payload)] = payload
+    buffer[offset:payload_offset] = _SLOT_HEADER.pack(_SLOT_MAGIC, sequence, len(payload), zlib.crc32(payload))
+
+
+def _existing_checkpoint(path: str) -> Tuple[int, Optional[Tuple[int, str]]]:
+    # Returns the size of the file, if it exists, and the checkpoint in it, read with the slot
+    # size that it was written with.
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except FileNotFoundError:
+        return (0, None)
+    try:
+        file_size = os.fstat(fd).st_size
+        if file_size == 0:
+            return (0, None)
+        with mmap.mmap(fd, file_size, access=mmap.ACCESS_READ) as existing:
+            return (file_size, _read_checkpoint(existing, file_size // 2))
+    finally:
+        os.close(fd)
+
+
+def _replace_file(path: str, content: bytes):
+    # Replaces the file atomically: a crash leaves either the old file or the complete new one.
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, temp_path = tempfile.mkstemp(dir=directory, prefix='.checkpoint-')
+    try:
+        os.write(fd, content)
+        os.fsync(fd)
+        os.close(fd)
+        fd = -1
+        os.replace(temp_path, path)
+    except BaseException:
+        if fd >= 0:
+            os.close(fd)
+        os.unlink(temp_path)
+        raise
+    if hasattr(os, 'O_DIRECTORY'):
+        dir_fd = os.open(directory, os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
+
+
+def _read_checkpoint(buffer: mmap.mmap, slot_size: int) -> Optional[Tuple[int, str]]:
+    # Returns the sequence number and ID of the newest valid slot, if any.
+    if slot_size < _SLOT_HEADER.size:
+        return None
+    newest = None
+    for slot in range(2):
+        found = _read_slot(buffer, slot * slot_size, slot_size)
+        if found is not None and (newest is None or found[0] >= newest[0]):
+            newest = found
+    return newest
+
+
+class _MmapFileCheckpointStore(CheckpointStore):
+    def __init__(
+        self,
+        path: str,
+        write_interval: float,
+        write_every: int,
+        fsync: bool,
+        max_id_length: int,
+        logger: logging.Logger,
+    ):
+        self.__write_interval = write_interval
+        self.__write_every = write_every
+        self.__fsync = fsync
+        self.__logger = logger
+        self.__slot_size = _SLOT_HEADER.size + max_id_length
+
+        size = 2 * self.__slot_size
+        file_size, found = _existing_checkpoint(path)
+        if file_size not in (0, size):
+            # The file was created with another max_id_length, so move its checkpoint into a file
+            # of the new size.
+            content = bytearray(size)
+            if found is not None:
+                payload = found[1].encode()
+                if len(payload) > max_id_length:
+                    raise ValueError(
+                        "checkpoint in %s is longer than max_id_length (%d)" % (path, max_id_length)
+                    )
+                _write_slot(content, self.__slot_size, found[0], payload)
+            _replace_file(path, bytes(content))
+
+        fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            if os.fstat(fd).st_size < size:
+                os.ftruncate(fd, size)
+            self.__map: Optional[mmap.mmap] = mmap.mmap(fd, size)
+        finally:
+            os.close(fd)
+
+        self.__sequence = 0
+        self.__written: Optional[str] = None
+        found = _read_checkpoint(self.__map, self.__slot_size)
+        if found is not None:
+            self.__sequence, self.__written = found
+        self.__pending: Optional[str] = None
+        self.__pending_count = 0
+        self.__last_write_time = float('-inf')
+        # update() can be called on the reading thread while the timer writes on its own thread.
+        self.__lock = threading.Lock()
+        self.__timer: Optional[threading.Timer] = None
+
+    def load(self) -> Optional[str]:
+        return self.__written
+
+    def update(self, last_event_id: str):
+        with self.__lock:
+            self.__pending = last_event_id
+            self.__pending_count += 1
+            elapsed = time.monotonic() - self.__last_write_time
+            if (
+                self.__write_every > 0 and self.__pending_count >= self.__write_every
+            ) or elapsed >= self.__write_interval:
+                self.__write()
+            elif self.__timer is None:
+                self.__timer = threading.Timer(self.__write_interval - elapsed, self.__write_when_due)
+                self.__timer.daemon = True
+                self.__timer.start()
+
+    def flush(self):
+        with self.__lock:
+            self.__write()
+
+    def __write_when_due(self):
+        with self.__lock:
+            self.__timer = None
+            self.__write()
+
+    def __write(self):
+        # Must be called with the lock held.
+        pending = self.__pending
+        if pending is None or self.__map is None:
+            return
+        self.__pending = None
+        self.__pending_count = 0
+        self.__last_write_time = time.monotonic()
+        if pending == self.__written:
+            return
+        payload = pending.encode()
+        if len(payload) > self.__slot_size - _SLOT_HEADER.size:
+            self.__logger.warning(
+                "Event ID of %d bytes is longer than the checkpoint's max_id_length (%d); "
+                "the stream would resume from the previous checkpoint, %r",
+                len(payload), self.__slot_size - _SLOT_HEADER.size, self.__written,
+            )
+            return
+        self.__sequence += 1
+        _write_slot(self.__map, self.__slot_size, self.__sequence, payload)
+        if self.__fsync:
+            self.__map.flush()
+        self.__written = pending
+
+    def close(self):
+        with self.__lock:
+            if self.__timer is not None:
+                self.__timer.cancel()
+                self.__timer = None
+            self.__write()
+            if self.__map is not None:
+                self.__map.flush()
+                self.__map.close()
+                self.__map = None
+
+
+__all__ = ['CheckpointStore']
@@ -0,0 +1,140 @@
+from __future__ import annotations
+
+import threading
+from collections import deque
+from typing import Deque, Optional, Tuple
+
+from ld_eventsource.config.clock import Clock
+
+
+class CircuitBreaker:
+    """
+    Tracks the failures of connections to an endpoint, and stops clients from connecting to it
+    for a while if too many of them fail.
+
+    A circuit breaker is used through :meth:`.ErrorStrategy.circuit_breaker()`. It can, and
+    usually should, be shared by all of the clients that connect to the same endpoint, so that
+    they all stop as soon as it is known to be down, and a single probe decides when they can
+    all start again. It is safe to share between threads, and between :class:`.SSEClient` and
+    :class:`.AsyncSSEClient` instances.
+
+    The breaker is in one of three states:
+
+    * :const:`CLOSED`: Connection attempts are allowed. The outcome of every attempt in the last
+      ``window`` seconds is remembered; once at least ``min_attempts`` of them have been made and
+      the fraction that failed reaches ``failure_rate``, the breaker opens.
+    * :const:`OPEN`: Connection attempts are not made. Instead, a client fails immediately with a
+      :class:`.CircuitOpenError`, which it reports as a :class:`.Fault` without any network
+      activity. After ``open_time`` seconds, the breaker becomes half-open.
+    * :const:`HALF_OPEN`: Up to ``max_probes`` attempts at a time are allowed through as probes,
+      and all others fail as if the breaker were open. If a probe connects successfully, the
+      breaker closes and forgets the previous failures; if it fails, the breaker opens again.
+
+    A failure is any error that the client passes to its :class:`.ErrorStrategy`, whether the
+    connection attempt failed or an established stream broke; a success is a connection attempt
+    that succeeded.
+
+    :param failure_rate: the fraction of attempts, from 0.0 to 1.0, that must fail to open the
+        breaker
+    :param min_attempts: the number of attempts that must have been made in the window before
+        the failure rate is considered
+    :param window: how long, in seconds, the outcome of an attempt is remembered
+    :param open_time: how long, in seconds, the breaker stays open before allowing probes
+    :param max_probes: how many probes can be in progress at once while half-open
+    :param clock: the source of time for the window and the open time (see :class:`.Clock`)
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half-open'
+
+    def __init__(
+        self,
+        failure_rate: float = 0.5,
+        min_attempts: int = 5,
+        window: float = 60,
+        open_time: float = 30,
+        max_probes: int = 1,
+        clock: Optional[Clock] = None,
+    ):
+        self.__failure_rate = failure_rate
+        self.__min_attempts = min_attempts
+        self.__window = window
+        self.__open_time = open_time
+        self.__max_probes = max_probes
+        self.__clock = clock or Clock()
+        self.__lock = threading.Lock()
+        self.__state = CircuitBreaker.CLOSED
+        self.__outcomes: Deque[Tuple[float, bool]] = deque()
+        self.__failures = 0
+        self.__opened_time = 0.0
+        self.__probes = 0
+
+    @property
+    def state(self) -> str:
+        """
+        The current state: :const:`CLOSED`, :const:`OPEN`, or :const:`HALF_OPEN`.
+        """
+        with self.__lock:
+            self.__update_state(self.__clock.now())
+            return self.__state
+
+    def _allow(self) -> bool:
+        with self.__lock:
+            self.__update_state(self.__clock.now())
+            if self.__state == CircuitBreaker.CLOSED:
+                return True
+            if self.__state == CircuitBreaker.HALF_OPEN and self.__probes < self.__max_probes:
+                self.__probes += 1
+                return True
+            return False
+
+    def _record_success(self):
+        with self.__lock:
+            if self.__state == CircuitBreaker.CLOSED:
+                self.__add_outcome(self.__clock.now(), False)
+            else:
+                self.__state = CircuitBreaker.CLOSED
+                self.__outcomes.clear()
+                self.__failures = 0
+                self.__probes = 0
+
+    def _record_failure(self):
+        with self.__lock:
+            now = self.__clock.now()
+            if self.__state == CircuitBreaker.CLOSED:
+                self.__add_outcome(now, True)
+                attempts = len(self.__outcomes)
+                if attempts >= self.__min_attempts and self.__failures >= attempts * self.__failure_rate:
+                    self.__open(now)
+            elif self.__state == CircuitBreaker.HALF_OPEN:
+                self.__open(now)
+
+    def __add_outcome(self, now: float, failed: bool):
+        outcomes = self.__outcomes
+        outcomes.append((now, failed))
+        if failed:
+            self.__failures += 1
+        while outcomes and outcomes[0][0] <= now - self.__window:
+            if outcomes.popleft()[1]:
+                self.__failures -= 1
+
+    def __open(self, now: float):
+        self.__state = CircuitBreaker.OPEN
+        self.__opened_time = now
+        self.__probes = 0
+
+    def __update_state(self, now: float):
+        if now - self.__opened_time < self.__open_time:
+            return
+        if self.__state == CircuitBreaker.OPEN:
+            self.__state = CircuitBreaker.HALF_OPEN
+            self.__opened_time = now
+        elif self.__state == CircuitBreaker.HALF_OPEN:
+            # The probes have neither succeeded nor failed in all this time, perhaps because
+            # their clients were closed, so let others try.
+            self.__opened_time = now
+            self.__probes = 0
+
+
+__all__ = ['CircuitBreaker']
@@ -0,0 +1,128 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+from typing import List
+
+
+class Clock:
+    """
+    The source of time for :class:`.SSEClient`, :class:`.AsyncSSEClient`, and the strategies that
+    measure elapsed time.
+
+    The client uses a clock to wait for the retry delay, to decide whether a connection lasted
+    long enough to reset the retry delay strategy, and to measure the downtime reported in
+    :attr:`.Start.downtime`. Elapsed times are measured with :meth:`now()`, which never goes
+    backward, so they are not distorted if the system clock is adjusted.
+
+    An instance of this base class uses the real time of the system, and is the default
+    everywhere a clock can be passed. To run retry and reconnection logic without actually
+    waiting, such as in tests, use a :class:`VirtualClock` instead.
+
+    The time it takes to make a connection, as in :class:`.ConnectionTimings`, is always measured
+    with the system's performance counter, since that is the time of real network activity.
+    """
+
+    def now(self) -> float:
+        """
+        Returns the current time of a monotonic clock, in seconds. Only the difference between
+        two values is meaningful.
+        """
+        return time.monotonic()
+
+    def wall_time(self) -> float:
+        """
+        Returns the current time as seconds since the epoch, like ``time.time()``. This is only
+        used to interpret absolute times sent by a server, such as an HTTP date in a
+        ``Retry-After`` header.
+        """
+        return time.time()
+
+    def sleep(self, seconds: float):
+        """
+        Blocks the current thread for this many seconds.
+        """
+        time.sleep(seconds)
+
+    async def async_sleep(self, seconds: float):
+        """
+        Suspends the current task for this many seconds.
+        """
+        await asyncio.sleep(seconds)
+
+
+class VirtualClock(Clock):
+    """
+    A :class:`Clock` whose time only moves when something sleeps on it, or when you call
+    :meth:`advance()`.
+
+    Sleeping on a virtual clock returns immediately, after moving its time forward by the
+    requested amount, so a client that uses it goes through its retry delays without waiting.
+    For example, this runs a hundred reconnection cycles with the default backoff in a few
+    milliseconds, and then shows how long they would have taken:
+    ::
+
+        clock = VirtualClock()
+        client = SSEClient(
+            connect=my_failing_connect_strategy,
+            error_strategy=ErrorStrategy.always_continue(),
+            clock=clock,
+        )
+        faults = iter(client.all)
+        for _ in range(100):
+            next(faults)
+        print(clock.now(), clock.sleeps)
+
+    A virtual clock is safe to share between threads and between clients, and all of the
+    clients and strategies that share it see the same time.
+
+    :param start: the initial value of :meth:`now()`
+    :param wall_time: the initial value of :meth:`wall_time()`
+    """
+
+    def __init__(self, start: float = 0, wall_time: float = 0):
+        self.__lock = threading.Lock()
+        self.__now = start
+        self.__wall_offset = wall_time - start
+        self.__sleeps: List[float] = []
+
+    @property
+    def sleeps(self) -> List[float]:
+        """
+        The duration of each sleep on this clock so far, in order.
+        """
+        with self.__lock:
+            return list(self.__sleeps)
+
+    def now(self) -> float:
+        with self.__lock:
+            return self.__now
+
+    def wall_time(self) -> float:
+        with self.__lock:
+            return self.__now + self.__wall_offset
+
+    def advance(self, seconds: float):
+        """
+        Moves the time of this clock forward.
+
+        :param seconds: the amount of time to add; must not be negative
+        """
+        if seconds < 0:
+            raise ValueError("a clock cannot go backward")
+        with self.__lock:
+            self.__now += seconds
+
+    def sleep(self, seconds: float):
+        with self.__lock:
+            self.__sleeps.append(seconds)
+            self.__now += max(seconds, 0)
+
+    async def async_sleep(self, seconds: float):
+        self.sleep(seconds)
+        # Give other tasks a chance to run, as a real sleep would.
+        await asyncio.sleep(0)
+
+
+__all__ = ['Clock', 'VirtualClock']
@@ -1,14 +1,27 @@
 from __future__ import annotations
 
+import queue
+import threading
+import time
 from dataclasses import dataclass
 from logging import Logger
-from typing import Callable, Iterator, Optional, Union
+from typing import Callable, Iterator, List, Optional, Sequence, Tuple, Union
 
 from urllib3 import PoolManager
 
+from ld_eventsource.actions import ConnectionTimings
+from ld_eventsource.config.clock import Clock
+from ld_eventsource.config.failover import _EndpointSelector
+from ld_eventsource.config.fault_injection import (FaultInjection,
+                                                   _disconnected,
+                                                   _FaultInjector, _refused)
+from ld_eventsource.config.rotation import (_BLOCK, _CLOSED, _CONNECTED, _END,
+                                            _event_blocks, _RecentIds)
 from ld_eventsource.errors import Headers
 from ld_eventsource.http import (DynamicQueryParams, _HttpClientImpl,
                                  _HttpConnectParams)
+from ld_eventsource.journal import _CHUNK, _JournalReplay, _JournalWriter
+from ld_eventsource.reader import _BufferedLineReader
 
 
 class ConnectStrategy:
@@ -58,6 +71,211 @@ class ConnectStrategy:
             _HttpConnectParams(url, headers, pool, urllib3_request_options, query_params)
         )
 
+    @staticmethod
+    def record(
+        inner: ConnectStrategy,
+        path: str,
+        compress: bool = False,
+        max_buffered_chunks: int = 1000,
+    ) -> ConnectStrategy:
+        """
+        Wraps another strategy so that everything it reads is also recorded to a journal file.
+
+        The journal contains the exact bytes of every chunk read from the stream, each with a
+        monotonic timestamp, as well as the response headers of each connection, the end of each
+        connection, and each failed connection attempt. This is useful for reproducing parsing or
+        timing problems later.
+
+        Recording never slows down the stream: chunks are placed on a queue of at most
+        ``max_buffered_chunks`` entries and written by a background thread. If the disk cannot
+        keep up and the queue is full, chunks are dropped from the journal (not from the stream),
+        and the journal notes how many were lost.
+
+        Records are appended, so the same file can be used across restarts, but it should only
+        be used by one client at a time. The file is closed when the :class:`.SSEClient` is closed.
+
+        :param inner: the strategy that makes the actual connections
+        :param path: the journal file path
+        :param compress: true to compress each chunk with zlib
+        :param max_buffered_chunks: the maximum number of records waiting to be written
+        """
+        return _RecordingConnectStrategy(inner, path, compress, max_buffered_chunks)
+
+    @staticmethod
+    def replay(path: str, speed: Optional[float] = None, clock: Optional[Clock] = None) -> ConnectStrategy:
+        """
+        Creates a strategy that reads a stream from a journal made by :meth:`record()`, instead of
+        from the network.
+
+        Each recorded connection is replayed as one connection: it provides the recorded response
+        headers, yields the recorded chunks, and then ends the way the original connection ended,
+        either normally or by raising an ``OSError`` that describes the original error. Each
+        recorded failed connection attempt is replayed by raising an ``OSError`` from
+        ``connect()``. Once all recorded connections have been replayed, ``connect()`` raises an
+        ``EOFError``. The ``last_event_id`` is ignored.
+
+        The journal file is memory-mapped, and uncompressed chunks are provided as ``memoryview``
+        slices of the mapping, so reading the journal does not copy the data. The copying ends
+        there, though: :class:`.SSEClient` splits each chunk into lines as ``bytes``, so it copies
+        every chunk once as it parses it, just as it would copy data from the network. A custom
+        consumer of :attr:`.ConnectionResult.stream` can use the slices without copying.
+
+        :param path: the journal file path
+        :param speed: if ``None`` or zero, chunks are provided as fast as they are read; otherwise,
+            the original timing within each connection is reproduced, scaled by this factor, so
+            that ``1`` is the original timing and ``2`` is twice as fast
+        :param clock: the source of time for reproducing the original timing (see
+            :class:`.Clock`); with a :class:`.VirtualClock`, the timing is simulated without waiting
+        """
+        return _ReplayConnectStrategy(path, speed, clock or Clock())
+
+    @staticmethod
+    def inject_faults(inner: ConnectStrategy, faults: FaultInjection) -> ConnectStrategy:
+        """
+        Wraps another strategy so that its connections have faults injected into them at random:
+        refused or delayed connection attempts, and slow, split or broken streams. This is for
+        testing and benchmarking how an application copes with an unreliable stream, without
+        writing a custom :class:`ConnectionClient` for each case.
+
+        See :class:`.FaultInjection` for the kinds of faults, their probabilities, and the
+        statistics of what was injected.
+
+        :param inner: the strategy that makes the actual connections
+        :param faults: what to inject
+        """
+        return _FaultInjectingConnectStrategy(inner, faults)
+
+    @staticmethod
+    def failover(
+        endpoints: Sequence[Union[str, ConnectStrategy]],
+        failure_penalty: float = 10,
+        failure_half_life: float = 60,
+        latency_margin: float = 0.05,
+        clock: Optional[Clock] = None,
+    ) -> ConnectStrategy:
+        """
+        Creates a strategy that can connect to any of several equivalent endpoints, such as the
+        same stream in different regions, and picks the healthiest one for each connection
+        attempt.
+
+        The client keeps a score for each endpoint: its average connect time, in seconds, plus
+        ``failure_penalty`` for each recent failure, where a failure is either a failed connection
+        attempt or a stream that broke with an error. Each failure counts for half as much after
+        every ``failure_half_life`` seconds, and a successful connection clears them. An endpoint
+        that has not connected yet counts as being as fast as the fastest one that has. Each
+        attempt goes to the earliest endpoint in the list whose score is no more than
+        ``latency_margin`` above the lowest; so when the preferred endpoint fails, the next attempt
+        goes to another one, and the client returns to the preferred endpoint once it has not
+        failed for a while, but it does not switch between healthy endpoints whose connect times
+        differ only slightly.
+
+        The ``Last-Event-Id`` is the same whichever endpoint is used, so the stream resumes where
+        it left off after failing over. The health of the endpoints is tracked separately by each
+        :class:`.SSEClient`.
+
+        :param endpoints: the stream URLs, which use the default HTTP behavior, or strategies, in
+            order of preference
+        :param failure_penalty: how much a recent failure adds to an endpoint's score, in seconds
+            of connect time
+        :param failure_half_life: how quickly failures are forgotten, in seconds
+        :param latency_margin: how much lower, in seconds, the score of an endpoint must be to be
+            chosen over an earlier one in the list
+        :param clock: the source of time for aging failures (see :class:`.Clock`)
+        """
+        if not endpoints:
+            raise ValueError("at least one endpoint is required")
+        return _FailoverConnectStrategy(
+            [ConnectStrategy.http(e) if isinstance(e, str) else e for e in endpoints],
+            failure_penalty,
+            failure_half_life,
+            latency_margin,
+            clock or Clock(),
+        )
+
+    @staticmethod
+    def hedged(
+        inner: ConnectStrategy,
+        hedge_delay: float,
+        alternate: Optional[ConnectStrategy] = None,
+    ) -> ConnectStrategy:
+        """
+        Wraps another strategy so that a slow connection attempt is hedged with a second one.
+
+        Most connection attempts are quick, but now and then the TCP connection or TLS handshake
+        stalls, and the client waits until it times out. With this strategy, if an attempt has
+        not succeeded within ``hedge_delay`` seconds, a second attempt starts in parallel, either
+        to the same endpoint or to ``alternate``. Whichever succeeds first is used; an attempt
+        only succeeds once the response has been validated, which for the HTTP strategies means
+        a successful status and a ``text/event-stream`` content type. If the other attempt also
+        succeeds, its connection is closed. If both fail, the error from the first attempt is
+        raised.
+
+        An attempt that fails before ``hedge_delay`` is not hedged. Since the attempts are made
+        with blocking calls, the first one runs on a separate thread; a losing attempt that is
+        still in progress is left to finish or time out there, and is then closed.
+
+        Choose a ``hedge_delay`` a little above the usual connect time, such as its 95th
+        percentile, so that only the slowest attempts are hedged.
+
+        :param inner: the strategy that makes the first attempt, and the second one if
+            ``alternate`` is not specified
+        :param hedge_delay: how long to wait for the first attempt before starting the second,
+            in seconds
+        :param alternate: if provided, the strategy for the second attempt, such as one that
+            connects to another region
+        """
+        return _HedgedConnectStrategy(inner, hedge_delay, alternate)
+
+    @staticmethod
+    def rotating(
+        inner: ConnectStrategy,
+        max_connection_age: float,
+        max_overlap: float = 10,
+        dedup_window: int = 1000,
+        clock: Optional[Clock] = None,
+    ) -> ConnectStrategy:
+        """
+        Wraps another strategy so that each connection is replaced with a new one once it is
+        ``max_connection_age`` seconds old, without a gap in the stream.
+
+        Long-lived connections stay on the same server behind a load balancer, so rotating them
+        now and then keeps the load balanced. Interrupting the client to do that would delay the
+        events that arrive while it reconnects. Instead, this strategy makes the new connection
+        first, with the ``Last-Event-Id`` of the last event it passed on, and reads from both
+        connections until the new one catches up: that is, until it provides an event with an ID,
+        which shows that it is past the point where it started. Until then, events are taken
+        from whichever connection provides them first, and an event with an ID that was already
+        passed on is dropped. Then the old connection is closed. The client sees one
+        uninterrupted stream, and no :class:`.Start` or :class:`.Fault`.
+
+        Events are recognized by their IDs, so the server must send an ``id:`` field with each
+        event and honor ``Last-Event-Id``. An event without an ID that arrives on the new
+        connection before it catches up is dropped, since it may be one that the old connection
+        already provided; comments are handled the same way.
+
+        If the new connection fails, or does not catch up within ``max_overlap`` seconds and
+        has not even connected, the old connection is kept and rotation is tried again after
+        another ``max_connection_age``; if it has connected, the client switches to it at that
+        point. If the old connection fails during the overlap, the client switches to the new
+        one at once.
+
+        Each connection is read on its own thread, which passes whole events on to the client.
+        The events are re-encoded, so the client sees the same events but not necessarily the
+        same bytes; ``retry:`` fields are passed on as well.
+
+        :param inner: the strategy that makes the actual connections
+        :param max_connection_age: how long a connection is used before it is replaced, in
+            seconds
+        :param max_overlap: the longest time for which two connections are read at once, in
+            seconds
+        :param dedup_window: how many recent event IDs are remembered for dropping duplicates
+        :param clock: the source of time for the age of connections and the length of the
+            overlap (see :class:`.Clock`)
+        """
+        return _RotatingConnectStrategy(
+            inner, max_connection_age, max_overlap, dedup_window, clock or Clock()
+        )
+
 
 class ConnectionClient:
     """
@@ -79,6 +297,18 @@ class ConnectionClient:
             "ConnectionClient base class cannot be used by itself"
         )
 
+    @property
+    def last_connect_timings(self) -> Optional[ConnectionTimings]:
+        """
+        How long each phase of the most recent call to :meth:`connect()` took, whether it
+        succeeded or failed. :class:`.SSEClient` reports this in :attr:`.Start.timings` or
+        :attr:`.Fault.timings`.
+
+        The base implementation returns ``None``, in which case SSEClient reports only the
+        total time that :meth:`connect()` took.
+        """
+        return None
+
     def close(self):
         """
         Does whatever is necessary to release resources when the SSEClient is closed.
@@ -156,8 +386,569 @@ class _HttpConnectionClient(ConnectionClient):
         stream, closer, headers = self.__impl.connect(last_event_id)
         return ConnectionResult(stream, closer, headers)
 
+    @property
+    def last_connect_timings(self) -> Optional[ConnectionTimings]:
+        return self.__impl.last_timings
+
     def close(self):
         self.__impl.close()
 
 
+class _RecordingConnectStrategy(ConnectStrategy):
+    def __init__(
+        self, inner: ConnectStrategy, path: str, compress: bool, max_buffered_chunks: int
+    ):
+        self.__inner = inner
+        self.__path = path
+        self.__compress = compress
+        self.__max_buffered_chunks = max_buffered_chunks
+
+    def create_client(self, logger: Logger) -> ConnectionClient:
+        return _RecordingConnectionClient(
+            self.__inner.create_client(logger),
+            _JournalWriter(self.__path, self.__compress, self.__max_buffered_chunks),
+        )
+
+
+class _RecordingConnectionClient(ConnectionClient):
+    def __init__(self, inner: ConnectionClient, journal: _JournalWriter):
+        self.__inner = inner
+        self.__journal = journal
+
+    def connect(self, last_event_id: Optional[str]) -> ConnectionResult:
+        journal = self.__journal
+        try:
+            result = self.__inner.connect(last_event_id)
+        except Exception as e:
+            journal.record_failure(e)
+            raise
+        journal.record_start(result.headers)
+        ended = False
+
+        def end(error: Optional[BaseException]):
+            nonlocal ended
+            if not ended:
+                ended = True
+                journal.record_end(error)
+
+        def stream():
+            try:
+                for chunk in result.stream:
+                    journal.record(_CHUNK, chunk)
+                    yield chunk
+            except Exception as e:
+                end(e)
+                raise
+            end(None)
+
+        def close():
+            end(None)
+            result.close()
+
+        return ConnectionResult(stream(), close, result.headers)
+
+    @property
+    def last_connect_timings(self) -> Optional[ConnectionTimings]:
+        return self.__inner.last_connect_timings
+
+    def close(self):
+        try:
+            self.__inner.close()
+        finally:
+            self.__journal.close()
+
+
+class _ReplayConnectStrategy(ConnectStrategy):
+    def __init__(self, path: str, speed: Optional[float], clock: Clock):
+        self.__path = path
+        self.__speed = speed
+        self.__clock = clock
+
+    def create_client(self, logger: Logger) -> ConnectionClient:
+        return _ReplayConnectionClient(_JournalReplay(self.__path), self.__speed, self.__clock)
+
+
+class _ReplayConnectionClient(ConnectionClient):
+    def __init__(self, replay: _JournalReplay, speed: Optional[float], clock: Clock):
+        self.__replay = replay
+        self.__speed = speed
+        self.__clock = clock
+
+    def connect(self, last_event_id: Optional[str]) -> ConnectionResult:
+        headers, start_timestamp = self.__replay.next_connection()
+        return ConnectionResult(self.__stream(start_timestamp), None, headers)
+
+    def __stream(self, start_timestamp: float) -> Iterator:
+        speed = self.__speed
+        clock = self.__clock
+        start_time = clock.now()
+        for record in self.__replay.chunks():
+            if speed:
+                delay = (record.timestamp - start_timestamp) / speed - (clock.now() - start_time)
+                if delay > 0:
+                    clock.sleep(delay)
+            yield record.payload
+
+    def close(self):
+        self.__replay.close()
+
+
+class _FaultInjectingConnectStrategy(ConnectStrategy):
+    def __init__(self, inner: ConnectStrategy, faults: FaultInjection):
+        self.__inner = inner
+        self.__faults = faults
+
+    def create_client(self, logger: Logger) -> ConnectionClient:
+        return _FaultInjectingConnectionClient(
+            self.__inner.create_client(logger), self.__faults._injector()
+        )
+
+
+class _FaultInjectingConnectionClient(ConnectionClient):
+    def __init__(self, inner: ConnectionClient, injector: _FaultInjector):
+        self.__inner = inner
+        self.__injector = injector
+
+    def connect(self, last_event_id: Optional[str]) -> ConnectionResult:
+        injector = self.__injector
+        refuse, delay = injector.plan_connect()
+        if delay > 0:
+            injector.clock.sleep(delay)
+        if refuse:
+            raise _refused()
+        result = self.__inner.connect(last_event_id)
+
+        def stream():
+            for chunk in result.stream:
+                delay, pieces, disconnect = injector.plan_chunk(chunk)
+                if delay > 0:
+                    injector.clock.sleep(delay)
+                yield from pieces
+                if disconnect:
+                    raise _disconnected()
+
+        return ConnectionResult(stream(), result.close, result.headers)
+
+    @property
+    def last_connect_timings(self) -> Optional[ConnectionTimings]:
+        return self.__inner.last_connect_timings
+
+    def close(self):
+        self.__inner.close()
+
+
+class _FailoverConnectStrategy(ConnectStrategy):
+    def __init__(
+        self,
+        endpoints: List[ConnectStrategy],
+        failure_penalty: float,
+        failure_half_life: float,
+        latency_margin: float,
+        clock: Clock,
+    ):
+        self.__endpoints = endpoints
+        self.__failure_penalty = failure_penalty
+        self.__failure_half_life = failure_half_life
+        self.__latency_margin = latency_margin
+        self.__clock = clock
+
+    def create_client(self, logger: Logger) -> ConnectionClient:
+        return _FailoverConnectionClient(
+            [e.create_client(logger) for e in self.__endpoints],
+            _EndpointSelector(
+                len(self.__endpoints),
+                self.__failure_half_life,
+                self.__failure_penalty,
+                self.__latency_margin,
+                self.__clock,
+            ),
+            logger,
+        )
+
+
+class _FailoverConnectionClient(ConnectionClient):
+    def __init__(self, inners: List[ConnectionClient], selector: _EndpointSelector, logger: Logger):
+        self.__inners = inners
+        self.__selector = selector
+        self.__logger = logger
+        self.__current: Optional[int] = None
+
+    def connect(self, last_event_id: Optional[str]) -> ConnectionResult:
+        selector = self.__selector
+        index = selector.choose()
+        if self.__current is not None and index != self.__current:
+            self.__logger.warning(
+                "Failing over from stream endpoint %d to endpoint %d", self.__current + 1, index + 1
+            )
+        self.__current = index
+        inner = self.__inners[index]
+        start = time.perf_counter()
+        try:
+            result = inner.connect(last_event_id)
+        except Exception:
+            selector.record_failure(index)
+            raise
+        timings = inner.last_connect_timings
+        selector.record_success(
+            index,
+            timings.total if timings is not None and timings.total is not None
+            else time.perf_counter() - start,
+        )
+
+        def stream():
+            try:
+                yield from result.stream
+            except Exception:
+                selector.record_failure(index)
+                raise
+
+        return ConnectionResult(stream(), result.close, result.headers)
+
+    @property
+    def last_connect_timings(self) -> Optional[ConnectionTimings]:
+        if self.__current is None:
+            return None
+        return self.__inners[self.__current].last_connect_timings
+
+    def close(self):
+        for inner in self.__inners:
+            inner.close()
+
+
+class _HedgedConnectStrategy(ConnectStrategy):
+    def __init__(
+        self, inner: ConnectStrategy, hedge_delay: float, alternate: Optional[ConnectStrategy]
+    ):
+        self.__inner = inner
+        self.__hedge_delay = hedge_delay
+        self.__alternate = alternate
+
+    def create_client(self, logger: Logger) -> ConnectionClient:
+        # Each attempt needs its own client, since they can be in progress at the same time.
+        return _HedgedConnectionClient(
+            self.__inner.create_client(logger),
+            (self.__alternate or self.__inner).create_client(logger),
+            self.__hedge_delay,
+            logger,
+        )
+
+
+class _HedgeRace:
+    # The shared state of the attempts made by one call to _HedgedConnectionClient.connect().
+
+    def __init__(self):
+        self.__lock = threading.Condition()
+        self.__results: List[Optional[ConnectionResult]] = [None, None]
+        self.__errors: List[Optional[Exception]] = [None, None]
+        self.__timings: List[Optional[ConnectionTimings]] = [None, None]
+        self.__finished = [False, False]
+        self.__winner: Optional[int] = None
+
+    def attempt(self, index: int, client: ConnectionClient, last_event_id: Optional[str]):
+        result, error = None, None
+        try:
+            result = client.connect(last_event_id)
+        except Exception as e:
+            error = e
+        # The client is shared with the attempts of other races, which may still be in progress,
+        # so its timings are read as soon as this attempt is over.
+        timings = client.last_connect_timings
+        with self.__lock:
+            self.__results[index], self.__errors[index] = result, error
+            self.__timings[index] = timings
+            self.__finished[index] = True
+            lost = self.__winner is not None
+            if result is not None and not lost:
+                self.__winner = index
+            self.__lock.notify_all()
+        if result is not None and lost:
+            result.close()
+
+    def wait(self, attempts: int, timeout: Optional[float]) -> bool:
+        # Waits until there is a winner, or every started attempt has failed, or the timeout.
+        with self.__lock:
+            return self.__lock.wait_for(
+                lambda: self.__winner is not None or all(self.__finished[:attempts]), timeout
+            )
+
+    def outcome(self) -> Tuple[Optional[int], Optional[ConnectionResult], Optional[Exception]]:
+        # Returns the winning attempt and its result, or the error of the first attempt. If
+        # there is no winner yet, no later result can win, so it will be closed.
+        with self.__lock:
+            if self.__winner is None:
+                self.__winner = -1
+                return (None, None, self.__errors[0] or self.__errors[1])
+            return (self.__winner, self.__results[self.__winner], None)
+
+    def timings(self, index: int) -> Optional[ConnectionTimings]:
+        with self.__lock:
+            return self.__timings[index]
+
+
+class _HedgedConnectionClient(ConnectionClient):
+    def __init__(
+        self,
+        primary: ConnectionClient,
+        secondary: ConnectionClient,
+        hedge_delay: float,
+        logger: Logger,
+    ):
+        self.__clients = (primary, secondary)
+        self.__hedge_delay = hedge_delay
+        self.__logger = logger
+        # The timings of the winning attempt of the last race, or of the primary attempt if every
+        # attempt failed, since its error is the one that is raised.
+        self.__timings: Optional[ConnectionTimings] = None
+
+    def connect(self, last_event_id: Optional[str]) -> ConnectionResult:
+        self.__timings = None
+        race = _HedgeRace()
+        attempts = 1
+        self.__start(race, 0, last_event_id)
+        if not race.wait(1, self.__hedge_delay):
+            self.__logger.info(
+                "Connection attempt did not succeed within %fs; starting a hedged attempt",
+                self.__hedge_delay,
+            )
+            attempts = 2
+            self.__start(race, 1, last_event_id)
+            race.wait(2, None)
+        winner, result, error = race.outcome()
+        self.__timings = race.timings(0 if winner is None else winner)
+        if winner is None or result is None:
+            raise error or ConnectionError("hedged connection attempts failed")
+        if attempts == 2:
+            self.__logger.info("Hedged connection attempt %d won", winner + 1)
+        return result
+
+    def __start(self, race: _HedgeRace, index: int, last_event_id: Optional[str]):
+        threading.Thread(
+            target=race.attempt,
+            args=(index, self.__clients[index], last_event_id),
+            name='launchdarkly-eventsource-hedge',
+            daemon=True,
+        ).start()
+
+    @property
+    def last_connect_timings(self) -> Optional[ConnectionTimings]:
+        return self.__timings
+
+    def close(self):
+        for client in self.__clients:
+            client.close()
+
+
+class _RotatingConnectStrategy(ConnectStrategy):
+    def __init__(
+        self,
+        inner: ConnectStrategy,
+        max_connection_age: float,
+        max_overlap: float,
+        dedup_window: int,
+        clock: Clock,
+    ):
+        self.__inner = inner
+        self.__max_connection_age = max_connection_age
+        self.__max_overlap = max_overlap
+        self.__dedup_window = dedup_window
+        self.__clock = clock
+
+    def create_client(self, logger: Logger) -> ConnectionClient:
+        return _RotatingConnectionClient(
+            self.__inner.create_client(logger),
+            self.__max_connection_age,
+            self.__max_overlap,
+            self.__dedup_window,
+            self.__clock,
+            logger,
+        )
+
+
+class _RotationReader:
+    # Reads the events of one connection on its own thread and puts them on a shared queue,
+    # after first making the connection if it was not given one.
+
+    QUEUE_POLL_INTERVAL = 0.1
+
+    def __init__(
+        self,
+        items: queue.Queue,
+        result: Optional[ConnectionResult],
+        client: Optional[ConnectionClient] = None,
+        last_event_id: Optional[str] = None,
+    ):
+        self.__items = items
+        self.__result = result
+        self.__client = client
+        self.__last_event_id = last_event_id
+        self.__lock = threading.Lock()
+        self.__stopped = False
+        threading.Thread(
+            target=self.__run, name='launchdarkly-eventsource-rotation', daemon=True
+        ).start()
+
+    def __run(self):
+        try:
+            result = self.__result
+            if result is None and self.__client is not None:
+                result = self.__client.connect(self.__last_event_id)
+                with self.__lock:
+                    self.__result = result
+                    stopped = self.__stopped
+                if stopped:
+                    result.close()
+                    return
+                self.__put(_CONNECTED, None)
+            if result is None:
+                return
+            for item in _event_blocks(_BufferedLineReader.lines_from(result.stream)):
+                if not self.__put(_BLOCK, item):
+                    return
+            self.__put(_END, None)
+        except Exception as e:
+            self.__put(_END, e)
+
+    def __put(self, kind: str, payload) -> bool:
+        while not self.__stopped:
+            try:
+                self.__items.put((self, kind, payload), timeout=_RotationReader.QUEUE_POLL_INTERVAL)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def stop(self):
+        with self.__lock:
+            self.__stopped = True
+            result = self.__result
+        if result is not None:
+            result.close()
+
+
+class _RotatingConnectionClient(ConnectionClient):
+    QUEUE_SIZE = 100
+
+    def __init__(
+        self,
+        inner: ConnectionClient,
+        max_connection_age: float,
+        max_overlap: float,
+        dedup_window: int,
+        clock: Clock,
+        logger: Logger,
+    ):
+        self.__inner = inner
+        self.__max_connection_age = max_connection_age
+        self.__max_overlap = max_overlap
+        self.__dedup_window = dedup_window
+        self.__clock = clock
+        self.__logger = logger
+
+    def connect(self, last_event_id: Optional[str]) -> ConnectionResult:
+        result = self.__inner.connect(last_event_id)
+        items: queue.Queue = queue.Queue(_RotatingConnectionClient.QUEUE_SIZE)
+        readers: List[_RotationReader] = [_RotationReader(items, result)]
+        closed = False
+
+        def close():
+            nonlocal closed
+            closed = True
+            for reader in readers:
+                reader.stop()
+            try:
+                items.put_nowait((None, _CLOSED, None))
+            except queue.Full:
+                pass  # the stream is not waiting, so it will see that it was closed
+
+        def is_closed() -> bool:
+            return closed
+
+        return ConnectionResult(
+            self.__stream(items, readers, last_event_id, is_closed), close, result.headers
+        )
+
+    def __stream(
+        self,
+        items: queue.Queue,
+        readers: List[_RotationReader],
+        last_event_id: Optional[str],
+        is_closed: Callable[[], bool],
+    ) -> Iterator[bytes]:
+        recent = _RecentIds(self.__dedup_window)
+        recent.last = last_event_id
+        current = readers[0]
+        candidate: Optional[_RotationReader] = None
+        candidate_connected = False
+        clock = self.__clock
+        rotate_at = clock.now() + self.__max_connection_age
+        overlap_until = 0.0
+        try:
+            while not is_closed():
+                now = clock.now()
+                if candidate is None and now >= rotate_at:
+                    self.__logger.info("Rotating stream connection")
+                    candidate = _RotationReader(items, None, self.__inner, recent.last)
+                    readers.append(candidate)
+                    candidate_connected = False
+                    overlap_until = now + self.__max_overlap
+                try:
+                    reader, kind, payload = items.get(
+                        timeout=max((rotate_at if candidate is None else overlap_until) - now, 0)
+                    )
+                except queue.Empty:
+                    if candidate is None or clock.now() < overlap_until:
+                        continue  # a virtual clock may not have reached the deadline yet
+                    reader, kind, payload = None, None, None
+                switch, abandon = False, False
+                if reader is None and kind is None:
+                    # The overlap is over; use the new connection only if it is ready.
+                    switch, abandon = candidate_connected, not candidate_connected
+                elif reader is current and kind == _BLOCK:
+                    block, event_id = payload
+                    if recent.add(event_id):
+                        yield block
+                elif reader is current and kind == _END:
+                    if candidate is None:
+                        if payload is not None:
+                            raise payload
+                        return
+                    switch = True
+                elif reader is candidate and kind == _CONNECTED:
+                    candidate_connected = True
+                elif reader is candidate and kind == _BLOCK:
+                    block, event_id = payload
+                    # Until the new connection is known to have caught up, an event without an ID
+                    # may be one that was already passed on.
+                    if event_id is not None:
+                        if recent.add(event_id):
+                            yield block
+                        switch = True
+                elif reader is candidate and kind == _END:
+                    abandon = True
+                if candidate is not None and abandon:
+                    self.__logger.warning(
+                        "Could not rotate stream connection: %s", payload or "timed out"
+                    )
+                    candidate.stop()
+                    readers.remove(candidate)
+                    candidate = None
+                    rotate_at = clock.now() + self.__max_connection_age
+                elif candidate is not None and switch:
+                    self.__logger.info("Switched to the new stream connection")
+                    current.stop()
+                    readers.remove(current)
+                    current, candidate = candidate, None
+                    rotate_at = clock.now() + self.__max_connection_age
+        finally:
+            for reader in readers:
+                reader.stop()
+
+    @property
+    def last_connect_timings(self) -> Optional[ConnectionTimings]:
+        return self.__inner.last_connect_timings
+
+    def close(self):
+        self.__inner.close()
+
+
 __all__ = ['ConnectStrategy', 'ConnectionClient', 'ConnectionResult']
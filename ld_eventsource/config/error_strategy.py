@@ -1,7 +1,17 @@
 from __future__ import annotations
 
-import time
-from typing import Callable, Optional, Tuple
+import asyncio
+import http.client
+import socket
+import ssl
+from typing import (Callable, Collection, Dict, List, Optional, Tuple, Type,
+                    Union)
+
+import urllib3.exceptions
+
+from ld_eventsource.config.circuit_breaker import CircuitBreaker
+from ld_eventsource.config.clock import Clock
+from ld_eventsource.errors import CircuitOpenError, HTTPStatusError
 
 
 class ErrorStrategy:
@@ -46,6 +56,21 @@ class ErrorStrategy:
         """
         raise NotImplementedError("ErrorStrategy base class cannot be used by itself")
 
+    def before_attempt(self) -> Optional[Exception]:
+        """Called by SSEClient before each connection attempt.
+
+        If this returns an exception, SSEClient does not make the attempt, and handles the
+        exception as if the attempt had failed with it. The default implementation returns
+        ``None``.
+        """
+        return None
+
+    def on_connected(self):
+        """Called by SSEClient when a connection attempt succeeds. The default implementation
+        does nothing.
+        """
+        pass
+
     @staticmethod
     def always_fail() -> ErrorStrategy:
         """
@@ -76,14 +101,66 @@ class ErrorStrategy:
         return _MaxAttemptsErrorStrategy(max_attempts, 0)
 
     @staticmethod
-    def continue_with_time_limit(max_time: float) -> ErrorStrategy:
+    def continue_with_time_limit(max_time: float, clock: Optional[Clock] = None) -> ErrorStrategy:
         """
         Specifies that SSEClient should automatically retry after a failure and can retry
         repeatedly until this amount of time has elapsed, but should fail after that point.
 
+        The time is counted from the first failure, and resets once a connection succeeds.
+
         :param max_time: the time limit, in seconds
+        :param clock: the source of time; pass the same :class:`.Clock` as to the client
         """
-        return _TimeLimitErrorStrategy(max_time, 0)
+        return _TimeLimitErrorStrategy(max_time, clock or Clock(), None)
+
+    @staticmethod
+    def continue_on_overload(
+        fallback: Optional[ErrorStrategy] = None,
+        statuses: Collection[int] = (429, 503),
+    ) -> ErrorStrategy:
+        """
+        Specifies that SSEClient should retry after an HTTP error status that means the server is
+        temporarily overloaded, and use another strategy for everything else.
+
+        An :class:`.HTTPStatusError` with one of the ``statuses`` always results in
+        :const:`CONTINUE`, without affecting the state of ``fallback``. Use this with
+        :meth:`.RetryDelayStrategy.retry_after()` so that the client waits as long as the server
+        asked before trying again.
+
+        :param fallback: the strategy for all other errors; if not specified, uses
+            :meth:`always_fail()`
+        :param statuses: the HTTP statuses to retry after
+        """
+        return _OverloadErrorStrategy(fallback or ErrorStrategy.always_fail(), frozenset(statuses))
+
+    @staticmethod
+    def circuit_breaker(
+        breaker: CircuitBreaker, fallback: Optional[ErrorStrategy] = None
+    ) -> ErrorStrategy:
+        """
+        Specifies that SSEClient should stop making connection attempts while a
+        :class:`.CircuitBreaker` is open.
+
+        Every error is recorded as a failure in the breaker, and every successful connection as
+        a success. While the breaker is open, each attempt fails immediately with a
+        :class:`.CircuitOpenError` instead of connecting, so a client reading from
+        :attr:`.SSEClient.all` receives a :class:`.Fault` each time its retry delay elapses.
+        Whether to keep going after any error, including :class:`.CircuitOpenError`, is decided
+        by ``fallback``.
+
+        :param breaker: the circuit breaker, which can be shared by many clients
+        :param fallback: the strategy that decides whether to continue; if not specified, uses
+            :meth:`always_continue()`
+        """
+        return _CircuitBreakerErrorStrategy(breaker, fallback or ErrorStrategy.always_continue())
+
+    @staticmethod
+    def builder() -> ErrorStrategyBuilder:
+        """
+        Returns a builder for a strategy that decides what to do from the type of each error.
+        See :class:`ErrorStrategyBuilder`.
+        """
+        return ErrorStrategyBuilder()
 
     @staticmethod
     def from_lambda(
@@ -99,6 +176,279 @@ class ErrorStrategy:
         return _LambdaErrorStrategy(fn)
 
 
+class ErrorStrategyBuilder:
+    """
+    Builds an :class:`ErrorStrategy` from rules that map kinds of errors to decisions.
+    ::
+
+        strategy = (
+            ErrorStrategy.builder()
+            .on_status(range(500, 600), ErrorStrategy.CONTINUE, max_attempts=5)
+            .on_status(429, ErrorStrategy.CONTINUE)
+            .on_transport(ErrorStrategyBuilder.TIMEOUT, ErrorStrategy.CONTINUE)
+            .on(HTTPContentTypeError, ErrorStrategy.FAIL)
+            .on_end(ErrorStrategy.CONTINUE)
+            .build()
+        )
+
+    For each error, the first of these that applies decides what to do:
+
+    * a rule for the status of an :class:`.HTTPStatusError`, from :meth:`on_status()`
+    * a rule for the error's class or its nearest base class, from :meth:`on()`
+    * a rule for the kind of transport failure, from :meth:`on_transport()`
+    * the decision from :meth:`otherwise()`, which is :const:`ErrorStrategy.FAIL` by default
+
+    If a rule is added more than once for the same class, status, or kind, the last one wins.
+
+    Rules with a ``max_attempts`` continue at most that many consecutive times, counting every
+    error that the rule matched since the client last connected successfully, and fail after
+    that.
+
+    The rules are compiled by :meth:`build()` into lookup tables, and the rule for each class of
+    error is resolved only once, so applying the strategy is cheap and, unless the rule has a
+    ``max_attempts``, does not allocate anything.
+
+    Transport kinds classify the low-level exceptions raised by ``urllib3``, ``aiohttp``, and
+    the standard library, so that :class:`.SSEClient` and :class:`.AsyncSSEClient` treat the
+    same failure in the same way. See :meth:`transport_kind()`.
+    """
+
+    TIMEOUT = 'timeout'
+    """A connection attempt or a read timed out."""
+
+    TLS = 'tls'
+    """The TLS handshake failed, or the server's certificate was not valid."""
+
+    CONNECT = 'connect'
+    """The connection could not be made, such as because the host name could not be resolved or
+    the connection was refused."""
+
+    DISCONNECT = 'disconnect'
+    """An established connection was broken or closed unexpectedly."""
+
+    def __init__(self):
+        self.__rules: List[_ErrorRule] = []
+        self.__class_rules: Dict[type, _ErrorRule] = {}
+        self.__status_rules: Dict[int, _ErrorRule] = {}
+        self.__transport_rules: Dict[str, _ErrorRule] = {}
+        self.__end: Optional[_ErrorRule] = None
+        self.__otherwise = self.__add(ErrorStrategy.FAIL, None)
+
+    def on(
+        self, exception_class: Type[BaseException], decision: bool, max_attempts: Optional[int] = None
+    ) -> ErrorStrategyBuilder:
+        """
+        Adds a rule for errors of a class and its subclasses.
+
+        :param exception_class: the class of error
+        :param decision: :const:`ErrorStrategy.CONTINUE` or :const:`ErrorStrategy.FAIL`
+        :param max_attempts: if provided, the rule fails after continuing this many times
+        :return: the builder
+        """
+        self.__class_rules[exception_class] = self.__add(decision, max_attempts)
+        return self
+
+    def on_status(
+        self, statuses: Union[int, range], decision: bool, max_attempts: Optional[int] = None
+    ) -> ErrorStrategyBuilder:
+        """
+        Adds a rule for an :class:`.HTTPStatusError` with one of the given statuses.
+
+        :param statuses: an HTTP status, or a range of them such as ``range(500, 600)``
+        :param decision: :const:`ErrorStrategy.CONTINUE` or :const:`ErrorStrategy.FAIL`
+        :param max_attempts: if provided, the rule fails after continuing this many times; all
+            of the statuses share the count
+        :return: the builder
+        """
+        rule = self.__add(decision, max_attempts)
+        for status in ([statuses] if isinstance(statuses, int) else statuses):
+            self.__status_rules[status] = rule
+        return self
+
+    def on_transport(
+        self, kind: str, decision: bool, max_attempts: Optional[int] = None
+    ) -> ErrorStrategyBuilder:
+        """
+        Adds a rule for a kind of transport failure.
+
+        :param kind: :const:`TIMEOUT`, :const:`TLS`, :const:`CONNECT`, or :const:`DISCONNECT`
+        :param decision: :const:`ErrorStrategy.CONTINUE` or :const:`ErrorStrategy.FAIL`
+        :param max_attempts: if provided, the rule fails after continuing this many times
+        :return: the builder
+        """
+        self.__transport_rules[kind] = self.__add(decision, max_attempts)
+        return self
+
+    def on_end(self, decision: bool, max_attempts: Optional[int] = None) -> ErrorStrategyBuilder:
+        """
+        Sets what to do when the server ends the stream without an error. If this is not called,
+        the decision from :meth:`otherwise()` is used.
+
+        :param decision: :const:`ErrorStrategy.CONTINUE` or :const:`ErrorStrategy.FAIL`
+        :param max_attempts: if provided, the rule fails after continuing this many times
+        :return: the builder
+        """
+        self.__end = self.__add(decision, max_attempts)
+        return self
+
+    def otherwise(self, decision: bool, max_attempts: Optional[int] = None) -> ErrorStrategyBuilder:
+        """
+        Sets what to do with errors that no other rule applies to.
+
+        :param decision: :const:`ErrorStrategy.CONTINUE` or :const:`ErrorStrategy.FAIL`
+        :param max_attempts: if provided, the rule fails after continuing this many times
+        :return: the builder
+        """
+        self.__otherwise = self.__add(decision, max_attempts)
+        return self
+
+    def build(self) -> ErrorStrategy:
+        """
+        Creates the strategy. The builder can be changed afterward without affecting it.
+        """
+        table = _ErrorRuleTable(
+            dict(self.__class_rules),
+            dict(self.__status_rules),
+            dict(self.__transport_rules),
+            self.__end or self.__otherwise,
+            self.__otherwise,
+        )
+        return _RuleErrorStrategy(table, (0,) * len(self.__rules))
+
+    @staticmethod
+    def transport_kind(exception: BaseException) -> Optional[str]:
+        """
+        Classifies a low-level exception from ``urllib3``, ``aiohttp``, or the standard library.
+
+        :param exception: the exception
+        :return: :const:`TIMEOUT`, :const:`TLS`, :const:`CONNECT`, :const:`DISCONNECT`, or
+            ``None`` if it is not a recognized transport failure
+        """
+        return _transport_kind(type(exception))
+
+    def __add(self, decision: bool, max_attempts: Optional[int]) -> _ErrorRule:
+        rule = _ErrorRule(decision, max_attempts, len(self.__rules))
+        self.__rules.append(rule)
+        return rule
+
+
+class _ErrorRule:
+    __slots__ = ('decision', 'max_attempts', 'index')
+
+    def __init__(self, decision: bool, max_attempts: Optional[int], index: int):
+        self.decision = decision
+        self.max_attempts = max_attempts
+        self.index = index
+
+
+class _ErrorRuleTable:
+    def __init__(
+        self,
+        class_rules: Dict[type, _ErrorRule],
+        status_rules: Dict[int, _ErrorRule],
+        transport_rules: Dict[str, _ErrorRule],
+        end: _ErrorRule,
+        otherwise: _ErrorRule,
+    ):
+        self.__class_rules = class_rules
+        self.__status_rules = status_rules
+        self.__transport_rules = transport_rules
+        self.__end = end
+        self.__otherwise = otherwise
+        # Resolved rules by exact class. This is only ever added to, and every thread would
+        # compute the same entry, so it needs no lock.
+        self.__by_class: Dict[type, _ErrorRule] = {}
+
+    def resolve(self, exception: Optional[Exception]) -> _ErrorRule:
+        if exception is None:
+            return self.__end
+        if self.__status_rules and isinstance(exception, HTTPStatusError):
+            rule = self.__status_rules.get(exception.status)
+            if rule is not None:
+                return rule
+        exception_class = type(exception)
+        rule = self.__by_class.get(exception_class)
+        if rule is None:
+            rule = self.__resolve_class(exception_class)
+            self.__by_class[exception_class] = rule
+        return rule
+
+    def __resolve_class(self, exception_class: type) -> _ErrorRule:
+        for cls in exception_class.__mro__:
+            rule = self.__class_rules.get(cls)
+            if rule is not None:
+                return rule
+        kind = _transport_kind(exception_class)
+        if kind is not None:
+            rule = self.__transport_rules.get(kind)
+            if rule is not None:
+                return rule
+        return self.__otherwise
+
+
+class _RuleErrorStrategy(ErrorStrategy):
+    def __init__(self, table: _ErrorRuleTable, counts: Tuple[int, ...]):
+        self.__table = table
+        self.__counts = counts
+
+    def apply(self, exception: Optional[Exception]) -> Tuple[bool, ErrorStrategy]:
+        rule = self.__table.resolve(exception)
+        if rule.max_attempts is None or rule.decision == ErrorStrategy.FAIL:
+            return (rule.decision, self)
+        count = self.__counts[rule.index]
+        if count >= rule.max_attempts:
+            return (ErrorStrategy.FAIL, self)
+        counts = self.__counts[:rule.index] + (count + 1,) + self.__counts[rule.index + 1:]
+        return (ErrorStrategy.CONTINUE, _RuleErrorStrategy(self.__table, counts))
+
+
+def _transport_classes() -> List[Tuple[str, Tuple[type, ...]]]:
+    # The kinds are checked in order, since some classes have misleading ancestors: urllib3's
+    # NewConnectionError is a subclass of its ConnectTimeoutError, and aiohttp's certificate
+    # errors are subclasses of its connection errors.
+    tls: List[type] = [ssl.SSLError, urllib3.exceptions.SSLError]
+    connect: List[type] = [
+        urllib3.exceptions.NewConnectionError, ConnectionRefusedError, socket.gaierror
+    ]
+    timeout: List[type] = [TimeoutError, asyncio.TimeoutError, urllib3.exceptions.TimeoutError]
+    disconnect: List[type] = [
+        urllib3.exceptions.ProtocolError, http.client.IncompleteRead, ConnectionError
+    ]
+    try:
+        import aiohttp
+        tls.append(aiohttp.ClientSSLError)
+        timeout.append(aiohttp.ServerTimeoutError)
+        connect.append(aiohttp.ClientConnectorError)
+        disconnect += [aiohttp.ServerDisconnectedError, aiohttp.ClientPayloadError]
+    except ImportError:
+        pass  # aiohttp is an optional dependency
+    return [
+        (ErrorStrategyBuilder.TLS, tuple(tls)),
+        (ErrorStrategyBuilder.CONNECT, tuple(connect)),
+        (ErrorStrategyBuilder.TIMEOUT, tuple(timeout)),
+        (ErrorStrategyBuilder.DISCONNECT, tuple(disconnect)),
+    ]
+
+
+_transport_kinds: Dict[type, Optional[str]] = {}
+_transport_class_list: Optional[List[Tuple[str, Tuple[type, ...]]]] = None
+
+
+def _transport_kind(exception_class: type) -> Optional[str]:
+    global _transport_class_list
+    if exception_class in _transport_kinds:
+        return _transport_kinds[exception_class]
+    if _transport_class_list is None:
+        _transport_class_list = _transport_classes()
+    kind = None
+    for candidate, classes in _transport_class_list:
+        if issubclass(exception_class, classes):
+            kind = candidate
+            break
+    _transport_kinds[exception_class] = kind
+    return kind
+
+
 class _LambdaErrorStrategy(ErrorStrategy):
     def __init__(
         self, fn: Callable[[Optional[Exception]], Tuple[bool, Optional[ErrorStrategy]]]
@@ -110,6 +460,45 @@ class _LambdaErrorStrategy(ErrorStrategy):
         return (should_raise, maybe_next or self)
 
 
+class _OverloadErrorStrategy(ErrorStrategy):
+    def __init__(self, fallback: ErrorStrategy, statuses: Collection[int]):
+        self.__fallback = fallback
+        self.__statuses = statuses
+
+    def apply(self, exception: Optional[Exception]) -> Tuple[bool, ErrorStrategy]:
+        if isinstance(exception, HTTPStatusError) and exception.status in self.__statuses:
+            return (ErrorStrategy.CONTINUE, self)
+        fail_or_continue, next_fallback = self.__fallback.apply(exception)
+        return (fail_or_continue, _OverloadErrorStrategy(next_fallback, self.__statuses))
+
+    def before_attempt(self) -> Optional[Exception]:
+        return self.__fallback.before_attempt()
+
+    def on_connected(self):
+        self.__fallback.on_connected()
+
+
+class _CircuitBreakerErrorStrategy(ErrorStrategy):
+    def __init__(self, breaker: CircuitBreaker, fallback: ErrorStrategy):
+        self.__breaker = breaker
+        self.__fallback = fallback
+
+    def apply(self, exception: Optional[Exception]) -> Tuple[bool, ErrorStrategy]:
+        if exception is not None and not isinstance(exception, CircuitOpenError):
+            self.__breaker._record_failure()
+        fail_or_continue, next_fallback = self.__fallback.apply(exception)
+        return (fail_or_continue, _CircuitBreakerErrorStrategy(self.__breaker, next_fallback))
+
+    def before_attempt(self) -> Optional[Exception]:
+        if not self.__breaker._allow():
+            return CircuitOpenError()
+        return self.__fallback.before_attempt()
+
+    def on_connected(self):
+        self.__breaker._record_success()
+        self.__fallback.on_connected()
+
+
 class _MaxAttemptsErrorStrategy(ErrorStrategy):
     def __init__(self, max_attempts: int, counter: int):
         self.__max_attempts = max_attempts
@@ -125,19 +514,20 @@ class _MaxAttemptsErrorStrategy(ErrorStrategy):
 
 
 class _TimeLimitErrorStrategy(ErrorStrategy):
-    def __init__(self, max_time: float, start_time: float):
+    def __init__(self, max_time: float, clock: Clock, start_time: Optional[float]):
         self.__max_time = max_time
+        self.__clock = clock
         self.__start_time = start_time
 
     def apply(self, exception: Optional[Exception]) -> Tuple[bool, ErrorStrategy]:
-        if self.__start_time == 0:
+        if self.__start_time is None:
             return (
                 ErrorStrategy.CONTINUE,
-                _TimeLimitErrorStrategy(self.__max_time, time.time()),
+                _TimeLimitErrorStrategy(self.__max_time, self.__clock, self.__clock.now()),
             )
-        if (time.time() - self.__start_time) < self.__max_time:
+        if (self.__clock.now() - self.__start_time) < self.__max_time:
             return (ErrorStrategy.CONTINUE, self)
         return (ErrorStrategy.FAIL, self)
 
 
-__all__ = ['ErrorStrategy']
+__all__ = ['ErrorStrategy', 'ErrorStrategyBuilder']
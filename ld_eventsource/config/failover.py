@@ -0,0 +1,77 @@
+from __future__ import annotations
+
+from typing import List, Optional
+
+from ld_eventsource.config.clock import Clock
+
+
+class _EndpointHealth:
+    __slots__ = ('failures', 'failures_time', 'latency')
+
+    def __init__(self):
+        self.failures = 0.0
+        self.failures_time = 0.0
+        self.latency: Optional[float] = None
+
+
+class _EndpointSelector:
+    """
+    Scores a list of endpoints by their recent health and picks the best one for each connection
+    attempt.
+
+    An endpoint's score is its average connect time, in seconds, plus ``failure_penalty``
+    seconds for each recent failure; each failure counts for half as much after every
+    ``failure_half_life`` seconds. An endpoint that has not connected yet is assumed to be as
+    fast as the fastest one that has, so that it cannot win on latency alone.
+
+    The winner is the earliest endpoint whose score is within ``margin`` of the lowest one, so
+    the list order is the order of preference when nothing is known, and small differences in
+    connect time between equally healthy endpoints do not move the client back and forth.
+    """
+
+    LATENCY_WEIGHT = 0.3
+
+    def __init__(
+        self, count: int, failure_half_life: float, failure_penalty: float, margin: float, clock: Clock
+    ):
+        self.__endpoints = [_EndpointHealth() for _ in range(count)]
+        self.__failure_half_life = failure_half_life
+        self.__failure_penalty = failure_penalty
+        self.__margin = margin
+        self.__clock = clock
+
+    def __failures(self, endpoint: _EndpointHealth, now: float) -> float:
+        if endpoint.failures == 0 or self.__failure_half_life <= 0:
+            return endpoint.failures
+        return endpoint.failures * 0.5 ** ((now - endpoint.failures_time) / self.__failure_half_life)
+
+    def scores(self) -> List[float]:
+        now = self.__clock.now()
+        known = [e.latency for e in self.__endpoints if e.latency is not None]
+        best_latency = min(known) if known else 0
+        return [
+            (best_latency if e.latency is None else e.latency)
+            + self.__failures(e, now) * self.__failure_penalty
+            for e in self.__endpoints
+        ]
+
+    def choose(self) -> int:
+        scores = self.scores()
+        limit = min(scores) + self.__margin
+        return next(i for i, score in enumerate(scores) if score <= limit)
+
+    def record_success(self, index: int, latency: float):
+        endpoint = self.__endpoints[index]
+        if endpoint.latency is None:
+            endpoint.latency = latency
+        else:
+            weight = _EndpointSelector.LATENCY_WEIGHT
+            endpoint.latency += weight * (latency - endpoint.latency)
+        # A successful connection shows the endpoint is back, so earlier failures are forgiven.
+        endpoint.failures = 0
+
+    def record_failure(self, index: int):
+        endpoint = self.__endpoints[index]
+        now = self.__clock.now()
+        endpoint.failures = self.__failures(endpoint, now) + 1
+        endpoint.failures_time = now
@@ -0,0 +1,192 @@
+from __future__ import annotations
+
+import threading
+from random import Random
+from typing import Dict, List, Optional, Tuple
+
+from ld_eventsource.config.clock import Clock
+
+
+class FaultInjection:
+    """
+    Describes faults to inject into the connections made by another strategy, for testing how
+    an application behaves when the stream misbehaves.
+
+    Use it with :meth:`.ConnectStrategy.inject_faults()` or
+    :meth:`.AsyncConnectStrategy.inject_faults()`, which can wrap any strategy, including a mock
+    one. Each kind of fault happens at random with the given probability, which is checked once
+    per connection attempt for the connection faults and once per chunk for the stream faults:
+
+    * ``refuse``: the attempt fails with a ``ConnectionRefusedError``, without calling the inner
+      strategy.
+    * ``header_delay``: the attempt waits for ``header_delay_time`` seconds before calling the
+      inner strategy, as if the server were slow to send the response headers.
+    * ``slow_read``: the chunk is delayed by ``slow_read_time`` seconds.
+    * ``split``: the chunk is delivered in pieces of 1 to ``max_split_size`` bytes, so that
+      lines, fields and multi-byte characters are split across reads.
+    * ``disconnect``: part of the chunk is delivered, and then the stream fails with a
+      ``ConnectionResetError``, usually in the middle of an event.
+
+    The random choices come from ``seed``, so a run with the same seed and the same stream makes
+    the same choices. Each :class:`.SSEClient` that uses the strategy gets its own sequence of
+    choices, derived from the seed and from the order in which the clients were created. The
+    counts of what was injected, across all of those clients, are available from :attr:`stats`.
+
+    :param seed: the seed for the random choices; if ``None``, they are not reproducible
+    :param refuse: the probability that a connection attempt is refused
+    :param header_delay: the probability that a connection attempt is delayed
+    :param header_delay_time: how long a delayed connection attempt waits, in seconds
+    :param slow_read: the probability that a chunk is delayed
+    :param slow_read_time: how long a delayed chunk waits, in seconds
+    :param split: the probability that a chunk is split into pieces
+    :param max_split_size: the largest piece of a split chunk, in bytes
+    :param disconnect: the probability that the stream fails partway through a chunk
+    :param clock: the source of time for the delays (see :class:`.Clock`)
+    """
+
+    CONNECTIONS = 'connections'
+    """The key in :attr:`stats` for the number of connection attempts."""
+
+    REFUSED = 'refused'
+    """The key in :attr:`stats` for the number of refused connection attempts."""
+
+    HEADER_DELAYS = 'header_delays'
+    """The key in :attr:`stats` for the number of delayed connection attempts."""
+
+    CHUNKS = 'chunks'
+    """The key in :attr:`stats` for the number of chunks read from the inner strategy."""
+
+    SLOW_READS = 'slow_reads'
+    """The key in :attr:`stats` for the number of delayed chunks."""
+
+    SPLITS = 'splits'
+    """The key in :attr:`stats` for the number of chunks that were split into pieces."""
+
+    DISCONNECTS = 'disconnects'
+    """The key in :attr:`stats` for the number of streams that were made to fail."""
+
+    def __init__(
+        self,
+        seed: Optional[int] = None,
+        refuse: float = 0,
+        header_delay: float = 0,
+        header_delay_time: float = 1,
+        slow_read: float = 0,
+        slow_read_time: float = 0.1,
+        split: float = 0,
+        max_split_size: int = 4,
+        disconnect: float = 0,
+        clock: Optional[Clock] = None,
+    ):
+        if max_split_size < 1:
+            raise ValueError("max_split_size must be at least 1")
+        self.__seed = seed
+        self.__refuse = refuse
+        self.__header_delay = header_delay
+        self.__header_delay_time = header_delay_time
+        self.__slow_read = slow_read
+        self.__slow_read_time = slow_read_time
+        self.__split = split
+        self.__max_split_size = max_split_size
+        self.__disconnect = disconnect
+        self.__clock = clock or Clock()
+        self.__lock = threading.Lock()
+        self.__clients = 0
+        self.__stats = dict.fromkeys(
+            (
+                FaultInjection.CONNECTIONS, FaultInjection.REFUSED, FaultInjection.HEADER_DELAYS,
+                FaultInjection.CHUNKS, FaultInjection.SLOW_READS, FaultInjection.SPLITS,
+                FaultInjection.DISCONNECTS,
+            ),
+            0,
+        )
+
+    @property
+    def clock(self) -> Clock:
+        """The clock that is used for the delays."""
+        return self.__clock
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        """
+        A snapshot of how many times each kind of fault has been injected so far, along with
+        the number of connection attempts and chunks that faults could have been injected into.
+        The keys are the constants defined in this class.
+        """
+        with self.__lock:
+            return dict(self.__stats)
+
+    def _injector(self) -> _FaultInjector:
+        with self.__lock:
+            self.__clients += 1
+            client_number = self.__clients
+        random = Random() if self.__seed is None else Random('%d/%d' % (self.__seed, client_number))
+        return _FaultInjector(self, random)
+
+    def _count(self, key: str, n: int = 1):
+        with self.__lock:
+            self.__stats[key] += n
+
+    def _plan_connect(self, random: Random) -> Tuple[bool, float]:
+        # Returns whether to refuse the attempt, and how long to delay it first.
+        self._count(FaultInjection.CONNECTIONS)
+        delay = 0.0
+        if self.__header_delay > 0 and random.random() < self.__header_delay:
+            self._count(FaultInjection.HEADER_DELAYS)
+            delay = self.__header_delay_time
+        if self.__refuse > 0 and random.random() < self.__refuse:
+            self._count(FaultInjection.REFUSED)
+            return (True, delay)
+        return (False, delay)
+
+    def _plan_chunk(self, random: Random, chunk) -> Tuple[float, List, bool]:
+        # Returns how long to delay the chunk, the pieces to deliver, and whether to fail the
+        # stream after them.
+        self._count(FaultInjection.CHUNKS)
+        delay = 0.0
+        if self.__slow_read > 0 and random.random() < self.__slow_read:
+            self._count(FaultInjection.SLOW_READS)
+            delay = self.__slow_read_time
+        disconnect = self.__disconnect > 0 and random.random() < self.__disconnect
+        if disconnect:
+            self._count(FaultInjection.DISCONNECTS)
+            chunk = chunk[:random.randrange(len(chunk))] if len(chunk) > 0 else chunk
+        if self.__split > 0 and len(chunk) > 1 and random.random() < self.__split:
+            self._count(FaultInjection.SPLITS)
+            pieces = []
+            start = 0
+            while start < len(chunk):
+                end = start + random.randint(1, self.__max_split_size)
+                pieces.append(chunk[start:end])
+                start = end
+            return (delay, pieces, disconnect)
+        return (delay, [chunk] if len(chunk) > 0 else [], disconnect)
+
+
+class _FaultInjector:
+    # The per-client state of a FaultInjection: its own sequence of random choices.
+
+    def __init__(self, faults: FaultInjection, random: Random):
+        self.__faults = faults
+        self.__random = random
+
+    @property
+    def clock(self) -> Clock:
+        return self.__faults.clock
+
+    def plan_connect(self) -> Tuple[bool, float]:
+        return self.__faults._plan_connect(self.__random)
+
+    def plan_chunk(self, chunk) -> Tuple[float, List, bool]:
+        return self.__faults._plan_chunk(self.__random, chunk)
+
+
+def _refused() -> ConnectionRefusedError:
+    return ConnectionRefusedError("connection refused by injected fault")
+
+
+def _disconnected() -> ConnectionResetError:
+    return ConnectionResetError("stream broken by injected fault")
+
+
+__all__ = ['FaultInjection']
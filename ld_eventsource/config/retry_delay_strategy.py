@@ -1,9 +1,14 @@
 from __future__ import annotations
 
 import time
-from random import Random
+from datetime import timezone
+from email.utils import parsedate_to_datetime
+from random import Random, getrandbits
 from typing import Callable, Optional, Tuple
 
+from ld_eventsource.config.clock import Clock
+from ld_eventsource.errors import ExceptionWithHeaders, Headers
+
 
 class RetryDelayStrategy:
     """Base class of strategies for computing how long to wait before retrying a connection.
@@ -30,6 +35,23 @@ class RetryDelayStrategy:
         """
         return (base_delay, self)
 
+    def apply_for_error(
+        self, base_delay: float, error: Optional[Exception]
+    ) -> Tuple[float, RetryDelayStrategy]:
+        """Applies the strategy to compute the retry delay after a particular error.
+
+        SSEClient calls this method, rather than :meth:`apply()`, so that a strategy can take the
+        error into account, such as by reading its response headers. The default implementation
+        ignores the error and calls :meth:`apply()`.
+
+        :param base_delay: the initial configured base delay, in seconds, as set in the SSEClient
+            parameters
+        :param error: the exception that caused the stream to fail, or ``None`` if the stream
+            simply ended or was interrupted
+        :return: a tuple as described in :meth:`apply()`
+        """
+        return self.apply(base_delay)
+
     @staticmethod
     def default(
         max_delay: Optional[float] = None,
@@ -67,6 +89,52 @@ class RetryDelayStrategy:
             _ReusableRandom(time.time()),
         )
 
+    @staticmethod
+    def full_jitter(
+        max_delay: Optional[float] = 30,
+        backoff_multiplier: float = 2,
+        seed: Optional[int] = None,
+    ) -> RetryDelayStrategy:
+        """
+        Provides exponential backoff with "full jitter": each delay is a pseudo-random value
+        between zero and the current backoff ceiling.
+
+        The ceiling starts at the base delay, is multiplied by ``backoff_multiplier`` on each
+        subsequent attempt, and is pinned to be no greater than ``max_delay``. Compared to
+        :meth:`default()`, this spreads out reconnections much more evenly when many clients
+        fail at once, at the cost of some clients retrying sooner.
+
+        Unlike :meth:`default()`, this strategy does not copy a random number generator on
+        each retry: its pseudo-random values are computed from the seed and the attempt number.
+        Give each client its own seed, or leave it unspecified to get a random one.
+
+        :param max_delay: the maximum possible delay value, in seconds, or ``None`` for no limit
+        :param backoff_multiplier: the exponential backoff factor
+        :param seed: the seed for the pseudo-random jitter
+        """
+        return _FullJitterRetryDelayStrategy(
+            max_delay or 0, backoff_multiplier, _seed(seed), 0, 0
+        )
+
+    @staticmethod
+    def decorrelated_jitter(
+        max_delay: Optional[float] = 30,
+        seed: Optional[int] = None,
+    ) -> RetryDelayStrategy:
+        """
+        Provides "decorrelated jitter" backoff: each delay is a pseudo-random value between the
+        base delay and three times the previous delay, pinned to be no greater than
+        ``max_delay``.
+
+        This grows about as fast as exponential backoff, but because each delay depends on the
+        previous random one, clients that failed together drift apart quickly. Like
+        :meth:`full_jitter()`, it does not copy a random number generator on each retry.
+
+        :param max_delay: the maximum possible delay value, in seconds, or ``None`` for no limit
+        :param seed: the seed for the pseudo-random jitter
+        """
+        return _DecorrelatedJitterRetryDelayStrategy(max_delay or 0, _seed(seed), 0, 0)
+
     @staticmethod
     def from_lambda(
         fn: Callable[[float], Tuple[float, Optional[RetryDelayStrategy]]]
@@ -80,6 +148,49 @@ class RetryDelayStrategy:
         """
         return _LambdaRetryDelayStrategy(fn)
 
+    @staticmethod
+    def retry_after(
+        fallback: Optional[RetryDelayStrategy] = None,
+        max_delay: float = 300,
+        jitter_multiplier: float = 0.2,
+        clock: Optional[Clock] = None,
+        seed: Optional[int] = None,
+    ) -> RetryDelayStrategy:
+        """
+        Provides a strategy that waits as long as the server asked in a ``Retry-After`` header.
+
+        If the error that ended the stream has response headers (such as an
+        :class:`.HTTPStatusError` for a 429 or 503 status) and they include ``Retry-After``,
+        either as a number of seconds or as an HTTP date, the delay is that time, pinned to be no
+        greater than ``max_delay``. A pseudo-random jitter of up to ``jitter_multiplier`` times
+        the delay is then added, so that clients which were turned away together do not all
+        come back together, and none comes back sooner than the server asked. Like
+        :meth:`full_jitter()`, the jitter is computed from the seed and the number of delays
+        taken from the server, rather than by copying a random number generator on each retry.
+
+        For any other error, or if the header is missing or invalid, the delay is computed by
+        ``fallback``, whose backoff state is unaffected by the delays taken from the server.
+
+        Pair this with :meth:`.ErrorStrategy.continue_on_overload()` so that the client retries
+        after those statuses in the first place.
+
+        :param fallback: the strategy to use when the server did not send ``Retry-After``, such
+            as :meth:`full_jitter()`; if not specified, uses :meth:`default()`
+        :param max_delay: the maximum delay that the server can ask for, in seconds
+        :param jitter_multiplier: a fraction of the delay that may be pseudo-randomly added
+        :param clock: the source of the current time, for a ``Retry-After`` that is an HTTP date
+            (see :class:`.Clock`)
+        :param seed: the seed for the pseudo-random jitter
+        """
+        return _RetryAfterRetryDelayStrategy(
+            fallback or RetryDelayStrategy.default(),
+            max_delay,
+            jitter_multiplier,
+            _seed(seed),
+            0,
+            clock or Clock(),
+        )
+
 
 class _DefaultRetryDelayStrategy(RetryDelayStrategy):
     def __init__(
@@ -125,6 +236,77 @@ class _DefaultRetryDelayStrategy(RetryDelayStrategy):
         return (adjusted_delay, next_strategy)
 
 
+class _FullJitterRetryDelayStrategy(RetryDelayStrategy):
+    def __init__(
+        self,
+        max_delay: float,
+        backoff_multiplier: float,
+        seed: int,
+        attempt: int,
+        last_ceiling: float,
+    ):
+        self.__max_delay = max_delay
+        self.__backoff_multiplier = backoff_multiplier
+        self.__seed = seed
+        self.__attempt = attempt
+        self.__last_ceiling = last_ceiling
+
+    def apply(self, base_delay: float) -> Tuple[float, RetryDelayStrategy]:
+        ceiling = (
+            base_delay
+            if self.__last_ceiling == 0
+            else self.__last_ceiling * self.__backoff_multiplier
+        )
+        if self.__max_delay > 0 and ceiling > self.__max_delay:
+            ceiling = self.__max_delay
+        delay = _uniform(self.__seed, self.__attempt) * ceiling
+        return (
+            delay,
+            _FullJitterRetryDelayStrategy(
+                self.__max_delay, self.__backoff_multiplier, self.__seed, self.__attempt + 1, ceiling
+            ),
+        )
+
+
+class _DecorrelatedJitterRetryDelayStrategy(RetryDelayStrategy):
+    def __init__(self, max_delay: float, seed: int, attempt: int, last_delay: float):
+        self.__max_delay = max_delay
+        self.__seed = seed
+        self.__attempt = attempt
+        self.__last_delay = last_delay
+
+    def apply(self, base_delay: float) -> Tuple[float, RetryDelayStrategy]:
+        previous = base_delay if self.__last_delay == 0 else self.__last_delay
+        upper = max(previous * 3, base_delay)
+        delay = base_delay + _uniform(self.__seed, self.__attempt) * (upper - base_delay)
+        if self.__max_delay > 0 and delay > self.__max_delay:
+            delay = self.__max_delay
+        return (
+            delay,
+            _DecorrelatedJitterRetryDelayStrategy(
+                self.__max_delay, self.__seed, self.__attempt + 1, delay
+            ),
+        )
+
+
+_MASK_64 = (1 << 64) - 1
+
+
+def _seed(seed: Optional[int]) -> int:
+    return getrandbits(64) if seed is None else seed & _MASK_64
+
+
+def _uniform(seed: int, n: int) -> float:
+    # Returns a pseudo-random number in [0, 1) that depends only on the seed and n, using the
+    # SplitMix64 mixing function. This lets an immutable strategy produce a new value for each
+    # attempt without creating or copying a random number generator.
+    z = (seed + (n + 1) * 0x9E3779B97F4A7C15) & _MASK_64
+    z = ((z ^ (z >> 30)) * 0xBF58476D1CE4E5B9) & _MASK_64
+    z = ((z ^ (z >> 27)) * 0x94D049BB133111EB) & _MASK_64
+    z ^= z >> 31
+    return (z >> 11) * (1.0 / (1 << 53))
+
+
 class _LambdaRetryDelayStrategy(RetryDelayStrategy):
     def __init__(
         self, fn: Callable[[float], Tuple[float, Optional[RetryDelayStrategy]]]
@@ -136,6 +318,64 @@ class _LambdaRetryDelayStrategy(RetryDelayStrategy):
         return (delay, maybe_next or self)
 
 
+class _RetryAfterRetryDelayStrategy(RetryDelayStrategy):
+    def __init__(
+        self,
+        fallback: RetryDelayStrategy,
+        max_delay: float,
+        jitter_multiplier: float,
+        seed: int,
+        attempt: int,
+        clock: Clock,
+    ):
+        self.__fallback = fallback
+        self.__max_delay = max_delay
+        self.__jitter_multiplier = jitter_multiplier
+        self.__seed = seed
+        self.__attempt = attempt
+        self.__clock = clock
+
+    def apply(self, base_delay: float) -> Tuple[float, RetryDelayStrategy]:
+        return self.apply_for_error(base_delay, None)
+
+    def apply_for_error(
+        self, base_delay: float, error: Optional[Exception]
+    ) -> Tuple[float, RetryDelayStrategy]:
+        headers = error.headers if isinstance(error, ExceptionWithHeaders) else None
+        retry_after = _parse_retry_after(headers, self.__clock)
+        if retry_after is None:
+            delay, next_fallback = self.__fallback.apply_for_error(base_delay, error)
+            return (delay, self.__with(next_fallback, self.__attempt))
+
+        delay = min(retry_after, self.__max_delay)
+        if self.__jitter_multiplier > 0:
+            delay += _uniform(self.__seed, self.__attempt) * self.__jitter_multiplier * delay
+        return (delay, self.__with(self.__fallback, self.__attempt + 1))
+
+    def __with(self, fallback: RetryDelayStrategy, attempt: int) -> RetryDelayStrategy:
+        return _RetryAfterRetryDelayStrategy(
+            fallback, self.__max_delay, self.__jitter_multiplier, self.__seed, attempt, self.__clock
+        )
+
+
+def _parse_retry_after(headers: Optional[Headers], clock: Clock) -> Optional[float]:
+    # Returns the delay in seconds from a Retry-After header, which can be either a number of
+    # seconds or an HTTP date, or None if there is no valid header.
+    value = None if headers is None else headers.get('Retry-After')
+    if value is None:
+        return None
+    value = str(value).strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        retry_time = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_time.tzinfo is None:
+        retry_time = retry_time.replace(tzinfo=timezone.utc)
+    return max(retry_time.timestamp() - clock.wall_time(), 0)
+
+
 class _ReusableRandom:
     def __init__(self, seed: float):
         self.__seed = seed
@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+from collections import deque
+from typing import (AsyncIterable, AsyncIterator, Deque, Iterable, Iterator,
+                    List, Optional, Set, Tuple)
+
+# Items placed on the queue of a rotating connection by the reader of each connection.
+_CONNECTED = 'connected'
+_BLOCK = 'block'
+_END = 'end'
+_CLOSED = 'closed'
+
+
+def _block_id(event_id: Optional[str], line: str) -> Optional[str]:
+    if line.startswith('id:'):
+        value = line[4:] if line.startswith('id: ') else line[3:]
+        if '\x00' not in value:
+            return value
+    return event_id
+
+
+def _event_blocks(lines: Iterable[str]) -> Iterator[Tuple[bytes, Optional[str]]]:
+    """
+    Groups the lines of a stream into the raw text of each event, re-encoded with ``\\n``
+    terminators, along with the event's ID if it has one. A comment outside of an event is a
+    block of its own, so that it is passed on without waiting for the next event.
+    """
+    block: List[str] = []
+    event_id: Optional[str] = None
+    for line in lines:
+        if line == '':
+            if block:
+                yield (('\n'.join(block) + '\n\n').encode(), event_id or None)
+                block = []
+                event_id = None
+        elif not block and line.startswith(':'):
+            yield ((line + '\n').encode(), None)
+        else:
+            block.append(line)
+            event_id = _block_id(event_id, line)
+
+
+async def _async_event_blocks(lines: AsyncIterable[str]) -> AsyncIterator[Tuple[bytes, Optional[str]]]:
+    """The async equivalent of :func:`_event_blocks`."""
+    block: List[str] = []
+    event_id: Optional[str] = None
+    async for line in lines:
+        if line == '':
+            if block:
+                yield (('\n'.join(block) + '\n\n').encode(), event_id or None)
+                block = []
+                event_id = None
+        elif not block and line.startswith(':'):
+            yield ((line + '\n').encode(), None)
+        else:
+            block.append(line)
+            event_id = _block_id(event_id, line)
+
+
+class _RecentIds:
+    """
+    Remembers the most recent event IDs that were passed on, so that the same event arriving on
+    another connection can be dropped.
+    """
+
+    def __init__(self, capacity: int):
+        self.__order: Deque[str] = deque()
+        self.__ids: Set[str] = set()
+        self.__capacity = capacity
+        self.last: Optional[str] = None
+
+    def add(self, event_id: Optional[str]) -> bool:
+        """
+        Records an event ID, and returns false if it had already been recorded. An event without
+        an ID cannot be recognized, so it is always new.
+        """
+        if event_id is None:
+            return True
+        if event_id in self.__ids:
+            return False
+        self.__ids.add(event_id)
+        self.__order.append(event_id)
+        if len(self.__order) > self.__capacity:
+            self.__ids.discard(self.__order.popleft())
+        self.last = event_id
+        return True
@@ -71,3 +71,13 @@ class HTTPContentTypeError(Exception):
     def headers(self) -> Optional[Headers]:
         """The HTTP response headers, if available. Header names are case-insensitive."""
         return self._headers
+
+
+class CircuitOpenError(Exception):
+    """
+    This exception indicates that a connection attempt was not made, because the
+    :class:`.CircuitBreaker` used by the client's :class:`.ErrorStrategy` is open.
+    """
+
+    def __init__(self):
+        super().__init__("circuit breaker is open")
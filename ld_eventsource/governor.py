@@ -0,0 +1,203 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+from collections import deque
+from typing import Deque, Optional
+
+from ld_eventsource.config.clock import Clock
+
+
+class _TokenBucket:
+    """
+    A token bucket that refills continuously at ``rate`` tokens per second, up to ``burst``, as
+    measured by ``clock``. A rate of ``None`` means that tokens are always available.
+    """
+
+    def __init__(self, rate: Optional[float], burst: Optional[int], clock: Clock):
+        self.__rate = rate
+        self.__burst = float(burst if burst is not None else max(1, int(rate or 1)))
+        self.__tokens = self.__burst
+        self.__clock = clock
+        self.__last_refill = clock.now()
+
+    def take(self) -> float:
+        """
+        Takes a token and returns zero if one is available; otherwise returns the number of
+        seconds until one will be.
+        """
+        if self.__rate is None:
+            return 0
+        now = self.__clock.now()
+        self.__tokens = min(self.__burst, self.__tokens + (now - self.__last_refill) * self.__rate)
+        self.__last_refill = now
+        if self.__tokens >= 1:
+            self.__tokens -= 1
+            return 0
+        return (1 - self.__tokens) / self.__rate
+
+
+class ReconnectGovernor:
+    """
+    Limits how many :class:`.SSEClient` instances can be making a connection attempt at once,
+    and how many attempts can start per second, across every client that shares it.
+
+    When an upstream service has an outage, every client that was connected to it fails at
+    about the same moment. Even with jitter, hundreds of clients in one process can then end up
+    reconnecting together, with a burst of sockets and TLS handshakes. Pass the same governor as
+    the ``reconnect_governor`` parameter of each client to spread those attempts out.
+
+    Each client still waits for its own retry delay first, as computed by its
+    :class:`.RetryDelayStrategy`. Only then does it ask the governor for permission, and it
+    holds that permission from the start of the connection attempt until the attempt succeeds
+    or fails. Clients that are waiting for permission are served in the order in which they
+    asked. The governor applies to the first connection attempt of each client as well as to
+    reconnections, so it also smooths out the start-up of many clients.
+
+    :param max_concurrent: the maximum number of connection attempts in progress at once, or
+        ``None`` for no limit
+    :param max_per_second: the maximum rate at which connection attempts can start, or ``None``
+        for no limit
+    :param burst: how many attempts can start at once after a quiet period, despite
+        ``max_per_second``; defaults to ``max_per_second``, rounded down, or 1 if that is lower
+    :param clock: the source of time for ``max_per_second``, and for waiting until another
+        attempt can start (see :class:`.Clock`); this should be the same clock as the clients'
+    """
+
+    def __init__(
+        self,
+        max_concurrent: Optional[int] = None,
+        max_per_second: Optional[float] = None,
+        burst: Optional[int] = None,
+        clock: Optional[Clock] = None,
+    ):
+        self.__max_concurrent = max_concurrent
+        self.__clock = clock or Clock()
+        self.__bucket = _TokenBucket(max_per_second, burst, self.__clock)
+        self.__lock = threading.Condition()
+        self.__queue: Deque[object] = deque()
+        self.__in_flight = 0
+
+    @property
+    def in_flight(self) -> int:
+        """The number of connection attempts currently in progress."""
+        return self.__in_flight
+
+    @property
+    def waiting(self) -> int:
+        """The number of clients currently waiting for permission to connect."""
+        return len(self.__queue)
+
+    def _acquire(self):
+        ticket = object()
+        with self.__lock:
+            self.__queue.append(ticket)
+            try:
+                while True:
+                    if self.__queue[0] is ticket and (
+                        self.__max_concurrent is None or self.__in_flight < self.__max_concurrent
+                    ):
+                        wait = self.__bucket.take()
+                        if wait == 0:
+                            self.__in_flight += 1
+                            return
+                        # Wait for the token on the clock, which may be virtual. No other client
+                        # can start meanwhile, since this one is first in the queue.
+                        self.__lock.release()
+                        try:
+                            self.__clock.sleep(wait)
+                        finally:
+                            self.__lock.acquire()
+                        continue
+                    self.__lock.wait()
+            finally:
+                self.__queue.remove(ticket)
+                self.__lock.notify_all()
+
+    def _release(self):
+        with self.__lock:
+            self.__in_flight -= 1
+            self.__lock.notify_all()
+
+
+class AsyncReconnectGovernor:
+    """
+    Limits how many :class:`.AsyncSSEClient` instances can be making a connection attempt at
+    once, and how many attempts can start per second, across every client that shares it.
+
+    This is the async equivalent of :class:`ReconnectGovernor`, and behaves the same way. Since
+    it waits without blocking the event loop, an instance can only be used by clients that run
+    on the same event loop; use one instance per loop.
+
+    :param max_concurrent: the maximum number of connection attempts in progress at once, or
+        ``None`` for no limit
+    :param max_per_second: the maximum rate at which connection attempts can start, or ``None``
+        for no limit
+    :param burst: how many attempts can start at once after a quiet period, despite
+        ``max_per_second``; defaults to ``max_per_second``, rounded down, or 1 if that is lower
+    :param clock: the source of time for ``max_per_second``, and for waiting until another
+        attempt can start (see :class:`.Clock`); this should be the same clock as the clients'
+    """
+
+    def __init__(
+        self,
+        max_concurrent: Optional[int] = None,
+        max_per_second: Optional[float] = None,
+        burst: Optional[int] = None,
+        clock: Optional[Clock] = None,
+    ):
+        self.__max_concurrent = max_concurrent
+        self.__clock = clock or Clock()
+        self.__bucket = _TokenBucket(max_per_second, burst, self.__clock)
+        self.__queue: Deque[asyncio.Future] = deque()
+        self.__in_flight = 0
+        self.__refill_timer: Optional[asyncio.Task] = None
+
+    @property
+    def in_flight(self) -> int:
+        """The number of connection attempts currently in progress."""
+        return self.__in_flight
+
+    @property
+    def waiting(self) -> int:
+        """The number of clients currently waiting for permission to connect."""
+        return sum(1 for waiter in self.__queue if not waiter.done())
+
+    async def _acquire(self):
+        waiter = asyncio.get_running_loop().create_future()
+        self.__queue.append(waiter)
+        self.__dispatch()
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # We were granted permission just as we were cancelled, so pass it on.
+                self._release()
+            raise
+
+    def _release(self):
+        self.__in_flight -= 1
+        self.__dispatch()
+
+    async def __refill(self, wait: float):
+        await self.__clock.async_sleep(wait)
+        self.__refill_timer = None
+        self.__dispatch()
+
+    def __dispatch(self):
+        while self.__queue and (
+            self.__max_concurrent is None or self.__in_flight < self.__max_concurrent
+        ):
+            if self.__queue[0].done():
+                self.__queue.popleft()  # cancelled while waiting
+                continue
+            wait = self.__bucket.take()
+            if wait > 0:
+                if self.__refill_timer is None:
+                    self.__refill_timer = asyncio.ensure_future(self.__refill(wait))
+                return
+            self.__in_flight += 1
+            self.__queue.popleft().set_result(None)
+
+
+__all__ = ['ReconnectGovernor', 'AsyncReconnectGovernor']
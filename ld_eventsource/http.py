@@ -1,13 +1,18 @@
 import sys
+import threading
+import time
 from logging import Logger
 from typing import Any, Callable, Dict, Iterator, Optional, Tuple, cast
 from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
 
-from urllib3 import PoolManager
+from urllib3 import HTTPConnectionPool, HTTPSConnectionPool, PoolManager
+from urllib3.connection import HTTPConnection, HTTPSConnection
 from urllib3.exceptions import MaxRetryError
 from urllib3.util import Retry
 
+from ld_eventsource.actions import ConnectionTimings
 from ld_eventsource.errors import HTTPContentTypeError, HTTPStatusError
+from ld_eventsource.structured_logging import _log_reconnect
 
 _CHUNK_SIZE = 10000
 
@@ -18,6 +23,81 @@ This can be used to modify query parameters dynamically for each connection atte
 """
 
 
+class _ConnectionTimingsRecorder:
+    """
+    Accumulates the phase timings of one connection attempt, which may span several requests if
+    there are redirects.
+    """
+
+    def __init__(self):
+        self.__start = time.perf_counter()
+        self.__phases: Dict[str, float] = {}
+
+    def add(self, phase: str, seconds: float):
+        self.__phases[phase] = self.__phases.get(phase, 0) + seconds
+
+    def finish(self) -> ConnectionTimings:
+        phases = self.__phases
+        return ConnectionTimings(
+            dns=phases.get('dns'),
+            connect=phases.get('connect'),
+            tls=phases.get('tls'),
+            time_to_first_byte=phases.get('time_to_first_byte'),
+            total=time.perf_counter() - self.__start,
+        )
+
+
+# urllib3 gives no hooks into its connection phases, so the pools that _HttpClientImpl creates
+# use these connection classes, which report to whichever recorder is active on the current
+# thread. urllib3 resolves the host name inside the same call that opens the socket, so DNS time
+# is included in the connect phase.
+_active_recorder = threading.local()
+
+
+def _record_phase(phase: str, seconds: float):
+    recorder: Optional[_ConnectionTimingsRecorder] = getattr(_active_recorder, 'recorder', None)
+    if recorder is not None:
+        recorder.add(phase, seconds)
+
+
+class _TimedHTTPConnection(HTTPConnection):
+    _last_new_conn_time = 0.0
+    _request_sent_time = 0.0
+
+    def _new_conn(self):
+        start = time.perf_counter()
+        try:
+            return super()._new_conn()
+        finally:
+            self._last_new_conn_time = time.perf_counter() - start
+            _record_phase('connect', self._last_new_conn_time)
+
+    def request(self, *args, **kwargs):
+        super().request(*args, **kwargs)
+        self._request_sent_time = time.perf_counter()
+
+    def getresponse(self, *args, **kwargs):
+        response = super().getresponse(*args, **kwargs)
+        _record_phase('time_to_first_byte', time.perf_counter() - self._request_sent_time)
+        return response
+
+
+class _TimedHTTPSConnection(_TimedHTTPConnection, HTTPSConnection):
+    def connect(self):
+        start = time.perf_counter()
+        self._last_new_conn_time = 0.0
+        super().connect()
+        _record_phase('tls', time.perf_counter() - start - self._last_new_conn_time)
+
+
+class _TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = _TimedHTTPConnection
+
+
+class _TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = _TimedHTTPSConnection
+
+
 class _HttpConnectParams:
     def __init__(
         self,
@@ -57,11 +137,32 @@ class _HttpConnectParams:
 class _HttpClientImpl:
     def __init__(self, params: _HttpConnectParams, logger: Logger):
         self.__params = params
-        self.__pool = params.pool or PoolManager()
+        if params.pool is None:
+            self.__pool = PoolManager()
+            self.__pool.pool_classes_by_scheme = {
+                'http': _TimedHTTPConnectionPool,
+                'https': _TimedHTTPSConnectionPool,
+            }
+        else:
+            self.__pool = params.pool
         self.__should_close_pool = params.pool is None
         self.__logger = logger
+        self.__last_timings: Optional[ConnectionTimings] = None
+
+    @property
+    def last_timings(self) -> Optional[ConnectionTimings]:
+        return self.__last_timings
 
     def connect(self, last_event_id: Optional[str]) -> Tuple[Iterator[bytes], Callable, Dict[str, Any]]:
+        recorder = _ConnectionTimingsRecorder()
+        try:
+            return self.__connect(last_event_id, recorder)
+        finally:
+            self.__last_timings = recorder.finish()
+
+    def __connect(
+        self, last_event_id: Optional[str], recorder: _ConnectionTimingsRecorder
+    ) -> Tuple[Iterator[bytes], Callable, Dict[str, Any]]:
         url = self.__params.url
         if self.__params.query_params is not None:
             qp = self.__params.query_params()
@@ -71,7 +172,7 @@ class _HttpClientImpl:
                 query.update(qp)
                 url_parts[3] = urlencode(query)
                 url = urlunsplit(url_parts)
-        self.__logger.info("Connecting to stream at %s" % url)
+        _log_reconnect(self.__logger, "Connecting to stream at %s", url, url=url)
 
         headers = self.__params.headers.copy() if self.__params.headers else {}
         headers['Cache-Control'] = 'no-cache'
@@ -87,6 +188,7 @@ class _HttpClientImpl:
         )
         request_options['headers'] = headers
 
+        _active_recorder.recorder = recorder
         try:
             resp = self.__pool.request(
                 'GET',
@@ -101,6 +203,8 @@ class _HttpClientImpl:
             reason: Optional[Exception] = e.reason
             if reason is not None:
                 raise reason  # e.reason is the underlying I/O error
+        finally:
+            _active_recorder.recorder = None
 
         # Capture headers early so they're available for both error and success cases
         response_headers = cast(Dict[str, Any], resp.headers)
@@ -0,0 +1,233 @@
+"""
+Support for recording raw stream data to a journal file, and for reading it back.
+
+A journal starts with an 8-byte file header, followed by any number of records. Each record has
+a 14-byte header (record type, flags, monotonic timestamp in seconds, payload length) followed
+by the payload. Records are appended in the order in which they happened, so a journal can be
+read from start to end to reproduce the stream, including the boundaries between connections.
+"""
+
+import json
+import mmap
+import os
+import queue
+import struct
+import threading
+import time
+import zlib
+from typing import Any, Iterator, List, NamedTuple, Optional, Tuple, Union
+
+from urllib3.response import HTTPHeaderDict
+
+from ld_eventsource.errors import Headers
+
+_FILE_MAGIC = b'LDSSEJ01'
+_RECORD_HEADER = struct.Struct('<BBdI')
+
+_START = 1  # a connection was made; the payload is the response headers as a JSON list of pairs
+_CHUNK = 2  # the payload is a chunk of stream data
+_END = 3  # a connection ended; the payload is a description of the error, or empty
+_FAILURE = 4  # a connection attempt failed; the payload is a description of the error
+_GAP = 5  # the payload is the number of records that were dropped because the buffer was full
+
+_COMPRESSED = 1  # flag: the payload is compressed with zlib
+
+_STOP = object()
+
+
+def _describe_error(error: Optional[BaseException]) -> bytes:
+    if error is None:
+        return b''
+    return ('%s: %s' % (type(error).__name__, error)).encode()
+
+
+class _JournalWriter:
+    """
+    Appends records to a journal file from a background thread.
+
+    Calls to :meth:`record` never block and never do I/O: the record is placed on a bounded queue,
+    and if the queue is full the record is dropped and counted, so that a slow disk can never slow
+    down the stream being recorded. Dropped records are noted in the journal as a gap.
+    """
+
+    def __init__(self, path: str, compress: bool, max_buffered_records: int):
+        self.__compress = compress
+        self.__queue: queue.Queue = queue.Queue(max_buffered_records)
+        self.__dropped = 0
+        self.__file = open(path, 'ab')
+        if self.__file.tell() == 0:
+            self.__file.write(_FILE_MAGIC)
+        else:
+            with open(path, 'rb') as f:
+                if f.read(len(_FILE_MAGIC)) != _FILE_MAGIC:
+                    self.__file.close()
+                    raise ValueError("%s is not a stream journal" % path)
+        self.__thread = threading.Thread(
+            target=self.__run, name='ld-eventsource-journal', daemon=True
+        )
+        self.__thread.start()
+
+    @property
+    def dropped(self) -> int:
+        """The number of records that were dropped because the buffer was full."""
+        return self.__dropped
+
+    def record(self, record_type: int, payload: Union[bytes, bytearray, memoryview]):
+        if not isinstance(payload, bytes):
+            payload = bytes(payload)  # the caller may reuse a mutable buffer
+        try:
+            self.__queue.put_nowait((record_type, time.monotonic(), payload))
+        except queue.Full:
+            self.__dropped += 1
+
+    def record_start(self, headers: Optional[Headers]):
+        pairs = [] if headers is None else [[k, str(v)] for k, v in headers.items()]
+        self.record(_START, json.dumps(pairs).encode())
+
+    def record_end(self, error: Optional[BaseException]):
+        self.record(_END, _describe_error(error))
+
+    def record_failure(self, error: BaseException):
+        self.record(_FAILURE, _describe_error(error))
+
+    def close(self):
+        self.__queue.put(_STOP)
+        self.__thread.join()
+        self.__file.close()
+
+    def __run(self):
+        written_dropped = 0
+        while True:
+            item = self.__queue.get()
+            if item is _STOP:
+                break
+            dropped = self.__dropped
+            if dropped != written_dropped:
+                self.__write(_GAP, item[1], struct.pack('<I', dropped - written_dropped))
+                written_dropped = dropped
+            self.__write(*item)
+            if self.__queue.empty():
+                self.__file.flush()
+        self.__file.flush()
+
+    def __write(self, record_type: int, timestamp: float, payload: bytes):
+        flags = 0
+        if self.__compress and record_type == _CHUNK:
+            compressed = zlib.compress(payload)
+            if len(compressed) < len(payload):
+                payload = compressed
+                flags |= _COMPRESSED
+        self.__file.write(_RECORD_HEADER.pack(record_type, flags, timestamp, len(payload)))
+        self.__file.write(payload)
+
+
+class _JournalRecord(NamedTuple):
+    type: int
+    timestamp: float
+    payload: Union[bytes, memoryview]
+
+
+class _JournalReader:
+    """
+    Reads the records of a journal file through a memory map. The payloads of uncompressed
+    records are memoryviews into the map, so no data is copied.
+    """
+
+    def __init__(self, path: str):
+        with open(path, 'rb') as f:
+            size = os.fstat(f.fileno()).st_size
+            if size < len(_FILE_MAGIC):
+                raise ValueError("%s is not a stream journal" % path)
+            self.__map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self.__map[:len(_FILE_MAGIC)] != _FILE_MAGIC:
+            self.__map.close()
+            raise ValueError("%s is not a stream journal" % path)
+        self.__view = memoryview(self.__map)
+
+    def records(self) -> Iterator[_JournalRecord]:
+        view = self.__view
+        offset = len(_FILE_MAGIC)
+        end = len(view)
+        while offset + _RECORD_HEADER.size <= end:
+            record_type, flags, timestamp, length = _RECORD_HEADER.unpack_from(view, offset)
+            offset += _RECORD_HEADER.size
+            if offset + length > end:
+                return  # the last record was only partly written
+            payload: Union[bytes, memoryview] = view[offset:offset + length]
+            offset += length
+            if flags & _COMPRESSED:
+                payload = zlib.decompress(payload)
+            yield _JournalRecord(record_type, timestamp, payload)
+
+    def close(self):
+        self.__view.release()
+        try:
+            self.__map.close()
+        except BufferError:
+            pass  # a caller still holds a payload; the map is released when that is collected
+
+
+class _JournalReplay:
+    """
+    Reads a journal one connection at a time, as used by :meth:`.ConnectStrategy.replay()`.
+    """
+
+    def __init__(self, path: str):
+        self.__reader = _JournalReader(path)
+        self.__records = self.__reader.records()
+        self.__pushed_back: Optional[_JournalRecord] = None
+
+    def next_connection(self) -> Tuple[Optional[Headers], float]:
+        """
+        Skips ahead to the next connection attempt. If it succeeded, returns its headers and
+        timestamp; if it failed, raises an error describing the original failure.
+        """
+        while True:
+            record = self.__next_record()
+            if record is None:
+                raise EOFError("no more connections in stream journal")
+            if record.type == _START:
+                return (_decode_headers(record.payload), record.timestamp)
+            if record.type == _FAILURE:
+                raise OSError("replayed connection failure: %s" % bytes(record.payload).decode())
+
+    def chunks(self) -> Iterator[_JournalRecord]:
+        """
+        Yields the chunk records of the current connection. If the connection originally ended
+        with an error, raises an error describing it after the last chunk.
+        """
+        while True:
+            record = self.__next_record()
+            if record is None:
+                return
+            if record.type == _CHUNK:
+                yield record
+            elif record.type == _END:
+                if len(record.payload) != 0:
+                    raise OSError("replayed stream failure: %s" % bytes(record.payload).decode())
+                return
+            elif record.type != _GAP:
+                # The journal has no end record for this connection, as can happen if the
+                # recording process was killed. Leave the new connection for next_connection().
+                self.__pushed_back = record
+                return
+
+    def close(self):
+        self.__reader.close()
+
+    def __next_record(self) -> Optional[_JournalRecord]:
+        record = self.__pushed_back
+        if record is not None:
+            self.__pushed_back = None
+            return record
+        return next(self.__records, None)
+
+
+def _decode_headers(payload: Union[bytes, memoryview]) -> Optional[Headers]:
+    pairs: List[Tuple[str, Any]] = json.loads(bytes(payload))
+    if not pairs:
+        return None
+    headers = HTTPHeaderDict()
+    for name, value in pairs:
+        headers.add(name, value)
+    return headers
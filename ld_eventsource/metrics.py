@@ -0,0 +1,280 @@
+from __future__ import annotations
+
+import math
+import threading
+import time
+from typing import AsyncIterator, Callable, Dict, Iterable, Iterator, Optional
+
+from ld_eventsource.actions import Event
+
+ServerTimestamp = Callable[[Event], Optional[float]]
+"""
+A function that returns the time at which the server sent an event, as seconds since the epoch
+(like ``time.time()``), or ``None`` if the event does not say. It is typically parsed from the
+event data or ID, and is used for the :attr:`MetricsSink.EVENT_LATENCY` histogram.
+"""
+
+
+class MetricsSink:
+    """
+    Base class for receiving metrics from :class:`.SSEClient` or :class:`.AsyncSSEClient`.
+
+    Pass an instance as the ``metrics`` parameter of the client. Every method of this base class
+    does nothing, so a subclass only needs to override the kinds of metrics that it wants; it
+    might, for instance, forward them to a StatsD or Prometheus client. :class:`InMemoryMetricsSink`
+    is a simple implementation that keeps the values in memory.
+
+    The names of the metrics are defined as constants on this class. Time values are in seconds.
+
+    The methods are called on whichever thread is reading from the client, possibly once or more
+    for every chunk of data and every event, so they should be fast. If no sink is configured,
+    the client skips all of its measurements, so metrics cost nothing unless they are enabled.
+    """
+
+    CONNECT_ATTEMPTS = 'connect_attempts'
+    """Counter: connection attempts, whether successful or not."""
+
+    CONNECT_FAILURES = 'connect_failures'
+    """Counter: connection attempts that failed."""
+
+    CONNECTIONS = 'connections'
+    """Counter: connection attempts that succeeded."""
+
+    CONNECT_TIME = 'connect_time'
+    """Histogram: the time taken by each successful connection attempt."""
+
+    BYTES_RECEIVED = 'bytes_received'
+    """Counter: bytes of stream data received."""
+
+    EVENTS_RECEIVED = 'events_received'
+    """Counter: events received."""
+
+    COMMENTS_RECEIVED = 'comments_received'
+    """Counter: comments received."""
+
+    READ_TIME = 'read_time'
+    """Histogram: the time spent blocked waiting for each chunk of stream data."""
+
+    PARSE_TIME = 'parse_time'
+    """Histogram: the time spent parsing each event or comment, not including reads."""
+
+    RETRY_DELAY_TIME = 'retry_delay_time'
+    """Histogram: the time spent sleeping before each reconnection."""
+
+    CONNECTION_DURATION = 'connection_duration'
+    """Histogram: how long each connection stayed open."""
+
+    CONNECTION_AGE = 'connection_age'
+    """Gauge: how long the current connection has been open, as of the latest chunk."""
+
+    NEXT_RETRY_DELAY = 'next_retry_delay'
+    """Gauge: the retry delay that will be used for the next reconnection."""
+
+    EVENT_LATENCY = 'event_latency'
+    """
+    Histogram: the time from when the server sent each event until it was received, if the client
+    has a ``server_timestamp`` function. This is affected by any difference between the clocks of
+    the server and the client.
+    """
+
+    def increment(self, name: str, value: float = 1):
+        """
+        Adds to a counter.
+
+        :param name: the metric name
+        :param value: the amount to add
+        """
+        pass
+
+    def record(self, name: str, value: float):
+        """
+        Records a value in a histogram.
+
+        :param name: the metric name
+        :param value: the observed value
+        """
+        pass
+
+    def gauge(self, name: str, value: float):
+        """
+        Sets the current value of a gauge.
+
+        :param name: the metric name
+        :param value: the new value
+        """
+        pass
+
+
+class Histogram:
+    """
+    A summary of the values recorded by :class:`InMemoryMetricsSink` for one histogram.
+
+    Values are counted in buckets whose bounds increase by a factor of two, so
+    :meth:`percentile()` is accurate to within a factor of two.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+        self.__buckets: Dict[int, int] = {}
+
+    def _add(self, value: float):
+        self.count += 1
+        self.total += value
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+        bucket = math.frexp(value)[1] if value > 0 else -1075
+        self.__buckets[bucket] = self.__buckets.get(bucket, 0) + 1
+
+    @property
+    def mean(self) -> float:
+        """The mean of the recorded values, or ``nan`` if there are none."""
+        return self.total / self.count if self.count else math.nan
+
+    def percentile(self, fraction: float) -> float:
+        """
+        Returns an upper bound for the given percentile of the recorded values.
+
+        :param fraction: the percentile as a fraction, such as ``0.99``
+        """
+        if self.count == 0:
+            return math.nan
+        rank = fraction * self.count
+        seen = 0
+        for bucket in sorted(self.__buckets):
+            seen += self.__buckets[bucket]
+            if seen >= rank:
+                return min(self.max, math.ldexp(1, bucket))
+        return self.max
+
+
+class InMemoryMetricsSink(MetricsSink):
+    """
+    A :class:`MetricsSink` that keeps all metrics in memory, for tests, benchmarks, or periodic
+    export by the application. It is safe to share between clients and threads.
+    """
+
+    def __init__(self):
+        self.__lock = threading.Lock()
+        self.__counters: Dict[str, float] = {}
+        self.__gauges: Dict[str, float] = {}
+        self.__histograms: Dict[str, Histogram] = {}
+
+    def increment(self, name: str, value: float = 1):
+        with self.__lock:
+            self.__counters[name] = self.__counters.get(name, 0) + value
+
+    def record(self, name: str, value: float):
+        with self.__lock:
+            histogram = self.__histograms.get(name)
+            if histogram is None:
+                histogram = self.__histograms[name] = Histogram()
+            histogram._add(value)
+
+    def gauge(self, name: str, value: float):
+        with self.__lock:
+            self.__gauges[name] = value
+
+    def counter(self, name: str) -> float:
+        """Returns the current value of a counter, or zero if it was never incremented."""
+        with self.__lock:
+            return self.__counters.get(name, 0)
+
+    def gauge_value(self, name: str) -> Optional[float]:
+        """Returns the current value of a gauge, or ``None`` if it was never set."""
+        with self.__lock:
+            return self.__gauges.get(name)
+
+    def histogram(self, name: str) -> Histogram:
+        """Returns the histogram with the given name, which is empty if nothing was recorded."""
+        with self.__lock:
+            return self.__histograms.get(name) or Histogram()
+
+
+class _StreamMeter:
+    """
+    Measures one connection's stream for a :class:`MetricsSink`. The client wraps the chunk
+    stream with :meth:`chunks` and the parser output with :meth:`items`; the time spent in reads
+    is subtracted from the time spent producing each item to get the parse time.
+    """
+
+    def __init__(self, sink: MetricsSink):
+        self.__sink = sink
+        self.__connected_time = time.perf_counter()
+        self.__read_time = 0.0
+
+    def chunks(self, chunks: Iterable) -> Iterator:
+        sink = self.__sink
+        iterator = iter(chunks)
+        while True:
+            start = time.perf_counter()
+            try:
+                chunk = next(iterator)
+            except StopIteration:
+                return
+            self.__after_read(sink, start, chunk)
+            yield chunk
+
+    async def async_chunks(self, chunks: AsyncIterator) -> AsyncIterator:
+        sink = self.__sink
+        iterator = chunks.__aiter__()
+        while True:
+            start = time.perf_counter()
+            try:
+                chunk = await iterator.__anext__()
+            except StopAsyncIteration:
+                return
+            self.__after_read(sink, start, chunk)
+            yield chunk
+
+    def items(self, items: Iterable) -> Iterator:
+        sink = self.__sink
+        iterator = iter(items)
+        while True:
+            start = time.perf_counter()
+            read_time = self.__read_time
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+            self.__after_parse(sink, start, read_time, item)
+            yield item
+
+    async def async_items(self, items: AsyncIterator) -> AsyncIterator:
+        sink = self.__sink
+        iterator = items.__aiter__()
+        while True:
+            start = time.perf_counter()
+            read_time = self.__read_time
+            try:
+                item = await iterator.__anext__()
+            except StopAsyncIteration:
+                return
+            self.__after_parse(sink, start, read_time, item)
+            yield item
+
+    def end(self):
+        self.__sink.record(MetricsSink.CONNECTION_DURATION, time.perf_counter() - self.__connected_time)
+
+    def __after_read(self, sink: MetricsSink, start: float, chunk):
+        now = time.perf_counter()
+        self.__read_time += now - start
+        sink.record(MetricsSink.READ_TIME, now - start)
+        sink.increment(MetricsSink.BYTES_RECEIVED, len(chunk))
+        sink.gauge(MetricsSink.CONNECTION_AGE, now - self.__connected_time)
+
+    def __after_parse(self, sink: MetricsSink, start: float, read_time: float, item):
+        sink.record(
+            MetricsSink.PARSE_TIME,
+            time.perf_counter() - start - (self.__read_time - read_time),
+        )
+        sink.increment(
+            MetricsSink.EVENTS_RECEIVED if isinstance(item, Event) else MetricsSink.COMMENTS_RECEIVED
+        )
+
+
+__all__ = ['MetricsSink', 'InMemoryMetricsSink', 'Histogram', 'ServerTimestamp']
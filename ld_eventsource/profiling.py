@@ -0,0 +1,263 @@
+from __future__ import annotations
+
+import threading
+import time
+from collections import deque
+from typing import (AsyncIterator, Callable, Deque, Dict, Iterable, Iterator,
+                    List, Optional)
+
+from ld_eventsource.actions import Event
+
+
+class StageStats:
+    """
+    The time spent in one stage of the stream pipeline, as measured by :class:`StageProfiler`.
+    """
+
+    def __init__(self):
+        self.count = 0
+        """The number of times the stage was entered."""
+        self.wall = 0.0
+        """The wall-clock time spent in the stage, in seconds."""
+        self.cpu = 0.0
+        """The CPU time of the reading thread spent in the stage, in seconds."""
+
+    def _add(self, other: StageStats):
+        self.count += other.count
+        self.wall += other.wall
+        self.cpu += other.cpu
+
+
+class ConnectionProfile:
+    """
+    The per-stage statistics for one stream connection, as measured by :class:`StageProfiler`.
+    """
+
+    def __init__(self):
+        self.started = time.time()
+        """The time at which the connection's stream started to be read, as from ``time.time()``."""
+        self.stages: Dict[str, StageStats] = {stage: StageStats() for stage in StageProfiler.STAGES}
+        """The statistics for each stage, keyed by the stage names in :attr:`StageProfiler.STAGES`."""
+
+
+class StageProfiler:
+    """
+    Measures where the time goes while a client reads a stream, stage by stage.
+
+    Pass an instance as the ``profiler`` parameter of :class:`.SSEClient` or
+    :class:`.AsyncSSEClient`. For every connection, the profiler accumulates the wall-clock time,
+    the CPU time of the reading thread, and the number of entries for each of these stages:
+
+    * :attr:`READ`: waiting for and receiving chunks of data from the connection, including the
+      client's own bookkeeping for each chunk, such as metrics and the wire tap
+    * :attr:`SPLIT`: splitting the chunks into lines
+    * :attr:`PARSE`: parsing the fields of each line, including the client's own bookkeeping for
+      each event
+    * :attr:`BUILD`: constructing each :class:`.Event`
+    * :attr:`CONSUMER`: everything that happens between the client handing an item to the
+      application and the application asking for the next one, which is mostly the
+      application's own processing
+
+    The stages nest, since each one pulls data from the one before it, but the times are
+    exclusive: time spent reading is not also counted as time spent splitting. Unlike a
+    deterministic profiler such as ``cProfile``, this only reads the clocks when control moves
+    between stages, so it does not distort generator-heavy code. Its overhead is still
+    significant, so only enable it while investigating a problem.
+
+    While a stream is being read, :attr:`current_stage` tells which stage is running. A sampling
+    profiler or a watchdog thread can read it to attribute samples to stages. The stage is also
+    visible in stack traces, because each one runs inside a function named after it.
+
+    For :class:`.AsyncSSEClient`, the wall-clock and CPU time of a stage include any other tasks
+    that run on the event loop while it is waiting.
+
+    A profiler can be shared by several clients, but then :attr:`current_stage` is only
+    meaningful if they read on the same thread.
+
+    :param max_connections: the number of most recent connections to keep statistics for
+    """
+
+    READ = 'read'
+    SPLIT = 'split'
+    PARSE = 'parse'
+    BUILD = 'build'
+    CONSUMER = 'consumer'
+    STAGES = (READ, SPLIT, PARSE, BUILD, CONSUMER)
+
+    def __init__(self, max_connections: int = 100):
+        self.__lock = threading.Lock()
+        self.__connections: Deque[ConnectionProfile] = deque(maxlen=max_connections)
+        self.current_stage: Optional[str] = None
+        """The stage that is currently running, or ``None`` if no stream is being read."""
+
+    @property
+    def connections(self) -> List[ConnectionProfile]:
+        """The statistics for the most recent connections, oldest first."""
+        with self.__lock:
+            return list(self.__connections)
+
+    def totals(self) -> Dict[str, StageStats]:
+        """The statistics for each stage, summed over all of the retained connections."""
+        totals = {stage: StageStats() for stage in StageProfiler.STAGES}
+        for connection in self.connections:
+            for stage, stats in connection.stages.items():
+                totals[stage]._add(stats)
+        return totals
+
+    def reset(self):
+        """Discards all statistics."""
+        with self.__lock:
+            self.__connections.clear()
+
+    def report(self) -> str:
+        """
+        Returns a human-readable table of the totals for each stage, with the share of the total
+        wall-clock time and the mean time per entry.
+        """
+        totals = self.totals()
+        total_wall = sum(stats.wall for stats in totals.values())
+        lines = ['%-10s %12s %12s %8s %12s %12s' % (
+            'stage', 'count', 'wall s', 'wall %', 'cpu s', 'mean us'
+        )]
+        for stage, stats in totals.items():
+            lines.append('%-10s %12d %12.6f %7.1f%% %12.6f %12.3f' % (
+                stage,
+                stats.count,
+                stats.wall,
+                stats.wall / total_wall * 100 if total_wall else 0,
+                stats.cpu,
+                stats.wall / stats.count * 1e6 if stats.count else 0,
+            ))
+        lines.append('%d connection(s)' % len(self.connections))
+        return '\n'.join(lines)
+
+    def _start_connection(self) -> _ConnectionProfiler:
+        profile = ConnectionProfile()
+        with self.__lock:
+            self.__connections.append(profile)
+        return _ConnectionProfiler(self, profile)
+
+
+class _ConnectionProfiler:
+    """
+    Wraps each stage of one connection's pipeline. Every transition between stages charges the
+    time since the previous transition to the stage that was running, so the times are exclusive.
+    The stack holds the stages that are in progress, with the consumer at the bottom.
+    """
+
+    def __init__(self, profiler: StageProfiler, profile: ConnectionProfile):
+        self.__profiler = profiler
+        self.__stages = profile.stages
+        self.__stack = [StageProfiler.CONSUMER]
+        self.__last_wall = time.perf_counter()
+        self.__last_cpu = time.thread_time()
+
+    def __charge(self):
+        wall = time.perf_counter()
+        cpu = time.thread_time()
+        stats = self.__stages[self.__stack[-1]]
+        stats.wall += wall - self.__last_wall
+        stats.cpu += cpu - self.__last_cpu
+        self.__last_wall = wall
+        self.__last_cpu = cpu
+
+    def enter(self, stage: str):
+        self.__charge()
+        self.__stack.append(stage)
+        self.__stages[stage].count += 1
+        self.__profiler.current_stage = stage
+
+    def leave(self):
+        self.__charge()
+        self.__stack.pop()
+        self.__profiler.current_stage = self.__stack[-1]
+
+    def end(self):
+        self.__charge()
+        self.__profiler.current_stage = None
+
+    def read(self, chunks: Iterable) -> Iterator:
+        iterator = iter(chunks)
+        while True:
+            self.enter(StageProfiler.READ)
+            try:
+                chunk = next(iterator)
+            except StopIteration:
+                return
+            finally:
+                self.leave()
+            yield chunk
+
+    def split(self, lines: Iterable[str]) -> Iterator[str]:
+        iterator = iter(lines)
+        while True:
+            self.enter(StageProfiler.SPLIT)
+            try:
+                line = next(iterator)
+            except StopIteration:
+                return
+            finally:
+                self.leave()
+            yield line
+
+    def parse(self, items: Iterable) -> Iterator:
+        iterator = iter(items)
+        while True:
+            self.enter(StageProfiler.PARSE)
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+            finally:
+                self.leave()
+            self.__stages[StageProfiler.CONSUMER].count += 1
+            yield item
+
+    async def async_read(self, chunks: AsyncIterator) -> AsyncIterator:
+        iterator = chunks.__aiter__()
+        while True:
+            self.enter(StageProfiler.READ)
+            try:
+                chunk = await iterator.__anext__()
+            except StopAsyncIteration:
+                return
+            finally:
+                self.leave()
+            yield chunk
+
+    async def async_split(self, lines: AsyncIterator[str]) -> AsyncIterator[str]:
+        iterator = lines.__aiter__()
+        while True:
+            self.enter(StageProfiler.SPLIT)
+            try:
+                line = await iterator.__anext__()
+            except StopAsyncIteration:
+                return
+            finally:
+                self.leave()
+            yield line
+
+    async def async_parse(self, items: AsyncIterator) -> AsyncIterator:
+        iterator = items.__aiter__()
+        while True:
+            self.enter(StageProfiler.PARSE)
+            try:
+                item = await iterator.__anext__()
+            except StopAsyncIteration:
+                return
+            finally:
+                self.leave()
+            self.__stages[StageProfiler.CONSUMER].count += 1
+            yield item
+
+    def build(self) -> Callable[..., Event]:
+        def build(*args) -> Event:
+            self.enter(StageProfiler.BUILD)
+            try:
+                return Event(*args)
+            finally:
+                self.leave()
+        return build
+
+
+__all__ = ['StageProfiler', 'StageStats', 'ConnectionProfile']
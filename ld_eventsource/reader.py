@@ -1,8 +1,127 @@
-from typing import Callable, Iterable, Optional
+import time
+from typing import AsyncIterator, Callable, Dict, Iterable, Optional
 
 from ld_eventsource.actions import Comment, Event
 
 
+class _ChunkTimestamps:
+    """
+    Records the time at which the most recent chunk of stream data was received, so that the
+    SSE reader can stamp each event with it. This costs one clock read per chunk, however many
+    events the chunk contains.
+    """
+
+    def __init__(self):
+        self.latest = 0.0
+        # Adding this to a monotonic timestamp gives the approximate wall-clock time.
+        self.wall_clock_offset = time.time() - time.monotonic()
+
+    def chunks(self, chunks: Iterable) -> Iterable:
+        for chunk in chunks:
+            self.latest = time.monotonic()
+            yield chunk
+
+    async def async_chunks(self, chunks: AsyncIterator) -> AsyncIterator:
+        async for chunk in chunks:
+            self.latest = time.monotonic()
+            yield chunk
+
+
+class _AckWindow:
+    """
+    Keeps track of the event IDs received in a client's ``explicit_ack`` mode, so that an
+    acknowledgement can be checked against them. Each received ID is given a sequence number,
+    and an acknowledgement only moves the high-water mark forward, so receiving an event costs
+    one dictionary store and acknowledging one costs a lookup and a comparison.
+
+    At most ``capacity`` IDs are remembered. When there are more, the IDs at or before the
+    high-water mark are forgotten, and then the oldest ones until half the capacity is left.
+    Acknowledging an ID that was forgotten is ignored like any unknown ID: the resume point
+    stays where it was, so those events are received again if the stream reconnects.
+    """
+
+    CAPACITY = 10000
+
+    def __init__(self, capacity: int = CAPACITY):
+        self.__capacity = capacity
+        self.__sequences: Dict[str, int] = {}
+        self.__received = 0
+        self.__acked = 0
+
+    def received(self, event_id: str):
+        self.__received += 1
+        sequences = self.__sequences
+        sequences[event_id] = self.__received
+        if len(sequences) > self.__capacity:
+            oldest = max(self.__acked, self.__received - self.__capacity // 2)
+            self.__sequences = {id: n for id, n in sequences.items() if n > oldest}
+
+    def ack(self, event_id: str) -> bool:
+        """Moves the high-water mark to this ID, unless it is unknown or already acknowledged."""
+        sequence = self.__sequences.get(event_id)
+        if sequence is None or sequence <= self.__acked:
+            return False
+        self.__acked = sequence
+        return True
+
+
+class _WireTap:
+    """
+    Keeps the most recent raw bytes of a stream in a ring buffer of a fixed size, for diagnosing
+    framing problems after the fact. The buffer is allocated once and reused for each
+    connection; copying a chunk into it does not allocate anything except when a chunk wraps
+    around the end of the buffer.
+    """
+
+    def __init__(self, capacity: int):
+        self.__buffer = bytearray(capacity)
+        self.__capacity = capacity
+        self.__pos = 0
+        self.__full = False
+
+    def reset(self):
+        self.__pos = 0
+        self.__full = False
+
+    def write(self, chunk):
+        n = len(chunk)
+        if n == 0:
+            return
+        buffer = self.__buffer
+        capacity = self.__capacity
+        pos = self.__pos
+        if n >= capacity:
+            buffer[:] = memoryview(chunk)[n - capacity:]
+            self.__pos = 0
+            self.__full = True
+        elif pos + n < capacity:
+            buffer[pos:pos + n] = chunk
+            self.__pos = pos + n
+        else:
+            view = memoryview(chunk)
+            first = capacity - pos
+            buffer[pos:] = view[:first]
+            buffer[:n - first] = view[first:]
+            self.__pos = n - first
+            self.__full = True
+
+    def snapshot(self) -> bytes:
+        """Returns a copy of the buffered bytes, oldest first."""
+        if not self.__full:
+            return bytes(self.__buffer[:self.__pos])
+        return bytes(self.__buffer[self.__pos:] + self.__buffer[:self.__pos])
+
+    def chunks(self, chunks: Iterable) -> Iterable:
+        for chunk in chunks:
+            self.write(chunk)
+            yield chunk
+
+    async def async_chunks(self, chunks: AsyncIterator) -> AsyncIterator:
+        async for chunk in chunks:
+            self.write(chunk)
+            yield chunk
+
+
 class _BufferedLineReader:
     """
     Helper class that encapsulates the logic for reading UTF-8 stream data as a series of text lines,
@@ -22,6 +141,12 @@ class _BufferedLineReader:
             if len(chunk) == 0:
                 continue
 
+            if not isinstance(chunk, bytes):
+                # Other bytes-like types, such as the memoryviews provided by
+                # ConnectStrategy.replay(), have no splitlines(). This copies the chunk, but so
+                # does splitting it into lines, so it costs one more pass over the data.
+                chunk = bytes(chunk)
+
             # bytes.splitlines() will correctly break lines at \n, \r, or \r\n, and is faster than
             # iterating through the characters in Python code. However, we have to adjust the results
             # in several ways as described below.
@@ -57,10 +182,14 @@ class _SSEReader:
         lines_source: Iterable[str],
         last_event_id: Optional[str] = None,
         set_retry: Optional[Callable[[int], None]] = None,
+        timestamps: Optional[_ChunkTimestamps] = None,
+        event_factory: Callable[..., Event] = Event,
     ):
         self._lines_source = lines_source
         self._last_event_id = last_event_id
         self._set_retry = set_retry
+        self._timestamps = timestamps
+        self._event_factory = event_factory
 
     @property
     def last_event_id(self):
@@ -70,16 +199,19 @@ class _SSEReader:
         event_type = ""
         event_data = None
         event_id = None
+        timestamps = self._timestamps
+        event_factory = self._event_factory
         for line in self._lines_source:
             if line == "":
                 if event_data is not None:
                     if event_id is not None:
                         self._last_event_id = event_id
-                    yield Event(
+                    yield event_factory(
                         "message" if event_type == "" else event_type,
                         event_data,
                         event_id,
                         self._last_event_id,
+                        None if timestamps is None else timestamps.latest,
                     )
                 event_type = ""
                 event_data = None
@@ -0,0 +1,258 @@
+from __future__ import annotations
+
+import logging
+import queue
+import threading
+import time
+from collections import OrderedDict
+from typing import Iterable, List, Optional, Sequence, Tuple, Union
+
+from ld_eventsource.actions import Event
+from ld_eventsource.config.connect_strategy import ConnectStrategy
+from ld_eventsource.config.error_strategy import ErrorStrategy
+from ld_eventsource.sse_client import SSEClient
+
+
+class PathStats:
+    """
+    How often one path of a :class:`RedundantSSEClient` or :class:`.AsyncRedundantSSEClient`
+    delivered an event first, and by how much.
+
+    The lead of a path is the time from when an event arrived on it until the same event
+    arrived on another path. It is only known for events that did arrive on another path; if
+    the other paths are down, the path still wins, but without a lead.
+    """
+
+    def __init__(self):
+        self.__wins = 0
+        self.__losses = 0
+        self.__leads = 0
+        self.__total_lead = 0.0
+        self.__max_lead = 0.0
+
+    @property
+    def wins(self) -> int:
+        """The number of events that arrived on this path before any other."""
+        return self.__wins
+
+    @property
+    def losses(self) -> int:
+        """The number of events that had already arrived on another path, and were dropped."""
+        return self.__losses
+
+    @property
+    def mean_lead(self) -> Optional[float]:
+        """
+        The average lead of this path over the events that it won, in seconds, or ``None`` if no
+        lead is known yet.
+        """
+        return None if self.__leads == 0 else self.__total_lead / self.__leads
+
+    @property
+    def max_lead(self) -> float:
+        """The largest lead of this path over an event that it won, in seconds."""
+        return self.__max_lead
+
+    def _record_win(self):
+        self.__wins += 1
+
+    def _record_loss(self):
+        self.__losses += 1
+
+    def _record_lead(self, lead: float):
+        self.__leads += 1
+        self.__total_lead += lead
+        if lead > self.__max_lead:
+            self.__max_lead = lead
+
+    def __repr__(self):
+        return "PathStats(wins=%d, losses=%d, mean_lead=%s, max_lead=%s)" % (
+            self.__wins, self.__losses, self.mean_lead, self.__max_lead
+        )
+
+
+class _MergeWindow:
+    """
+    Decides which copy of each event to deliver: the first one to arrive. It remembers the path
+    and arrival time of the most recent event IDs, so that a later copy can be dropped and the
+    winning path's lead can be recorded.
+    """
+
+    def __init__(self, stats: List[PathStats], capacity: int):
+        self.__stats = stats
+        self.__capacity = capacity
+        self.__arrivals: OrderedDict[str, Tuple[int, float]] = OrderedDict()
+
+    def arrive(self, path: int, event: Event, arrived: float) -> bool:
+        event_id = event.id
+        if not event_id:
+            # An event without an ID cannot be recognized on another path.
+            self.__stats[path]._record_win()
+            return True
+        first = self.__arrivals.get(event_id)
+        if first is None:
+            self.__arrivals[event_id] = (path, arrived)
+            if len(self.__arrivals) > self.__capacity:
+                self.__arrivals.popitem(last=False)
+            self.__stats[path]._record_win()
+            return True
+        winner, first_arrived = first
+        if winner != path:
+            self.__stats[path]._record_loss()
+            self.__stats[winner]._record_lead(arrived - first_arrived)
+        return False
+
+
+def _path_client(
+    path: Union[str, ConnectStrategy, SSEClient], logger: Optional[logging.Logger]
+) -> SSEClient:
+    if isinstance(path, SSEClient):
+        return path
+    return SSEClient(connect=path, error_strategy=ErrorStrategy.always_continue(), logger=logger)
+
+
+class RedundantSSEClient:
+    """
+    Reads the same stream through two or more independent paths, such as endpoints in two
+    regions, and delivers each event as soon as the first copy of it arrives.
+
+    This trades bandwidth for latency: every event is received once per path, but a delay or
+    outage on one path does not delay the events as long as another path is up. Each event is
+    recognized by its ID, so the server must send an ``id:`` field with each event; an event
+    without an ID cannot be recognized and is delivered from every path that provides it. The
+    IDs of the last ``dedup_window`` distinct events are remembered, so one path can fall that
+    far behind another without delivering duplicates.
+
+    Each path is an :class:`.SSEClient` with its own connection, retry delay, and error
+    handling. You can pass the clients yourself, to configure each one as you like; a URL or
+    :class:`.ConnectStrategy` creates a client that always retries after an error. Each path is
+    read on its own thread as soon as you start reading :attr:`events`. The stream only ends
+    once every path has ended, and if any of them failed, the last error is raised then.
+
+    How often each path won, and by how much, is available from :attr:`path_stats`.
+    ::
+
+        with RedundantSSEClient(['https://us.example.com/stream', 'https://eu.example.com/stream']) as client:
+            for event in client.events:
+                process(event)
+
+    :param paths: the clients, URLs, or strategies that provide the same stream
+    :param dedup_window: how many recent event IDs are remembered for dropping duplicates
+    :param logger: if provided, the logger for the clients created for URLs and strategies
+    """
+
+    QUEUE_SIZE = 100
+
+    def __init__(
+        self,
+        paths: Sequence[Union[str, ConnectStrategy, SSEClient]],
+        dedup_window: int = 1000,
+        logger: Optional[logging.Logger] = None,
+    ):
+        if not paths:
+            raise ValueError("at least one path is required")
+        self.__clients = [_path_client(path, logger) for path in paths]
+        self.__stats = [PathStats() for _ in paths]
+        self.__window = _MergeWindow(self.__stats, dedup_window)
+        self.__items: queue.Queue = queue.Queue(RedundantSSEClient.QUEUE_SIZE)
+        self.__started = False
+        self.__closed = False
+        self.__last_event_id: Optional[str] = None
+
+    @property
+    def clients(self) -> List[SSEClient]:
+        """The client for each path, in the order in which the paths were given."""
+        return list(self.__clients)
+
+    @property
+    def path_stats(self) -> List[PathStats]:
+        """The statistics for each path, in the order in which the paths were given."""
+        return list(self.__stats)
+
+    @property
+    def last_event_id(self) -> Optional[str]:
+        """The ID of the last delivered event that had one."""
+        return self.__last_event_id
+
+    @property
+    def events(self) -> Iterable[Event]:
+        """
+        An iterable series of the :class:`.Event` objects received on any path, each delivered
+        once, in the order in which their first copies arrived.
+        """
+        return self._events_generator()
+
+    def close(self):
+        """
+        Permanently shuts down this client and the client of every path.
+        """
+        self.__closed = True
+        for client in self.__clients:
+            client.close()
+        try:
+            self.__items.put_nowait((None, None, 0.0))
+        except queue.Full:
+            pass  # the reader is not waiting, so it will see that the client was closed
+
+    def _events_generator(self):
+        if not self.__started:
+            self.__started = True
+            for i, client in enumerate(self.__clients):
+                threading.Thread(
+                    target=self.__read_path,
+                    args=(i, client),
+                    name='launchdarkly-eventsource-redundant',
+                    daemon=True,
+                ).start()
+        remaining = len(self.__clients)
+        error: Optional[Exception] = None
+        window = self.__window
+        while remaining > 0 and not self.__closed:
+            path, item, arrived = self.__items.get()
+            if path is None:
+                continue
+            if isinstance(item, Event):
+                if window.arrive(path, item, arrived):
+                    if item.id:
+                        self.__last_event_id = item.id
+                    yield item
+            else:
+                remaining -= 1
+                if item is not None:
+                    error = item
+        if error is not None and not self.__closed:
+            raise error
+
+    def __read_path(self, path: int, client: SSEClient):
+        outcome: Optional[Exception] = None
+        try:
+            for item in client.all:
+                if self.__closed:
+                    break
+                if isinstance(item, Event) and not self.__put((path, item, time.monotonic())):
+                    break
+        except Exception as e:
+            outcome = e
+        if self.__closed:
+            # The client may have reconnected after close() was called, during a retry delay.
+            client.close()
+            return
+        self.__put((path, outcome, 0.0))
+
+    def __put(self, entry: tuple) -> bool:
+        while not self.__closed:
+            try:
+                self.__items.put(entry, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, type, value, traceback):
+        self.close()
+
+
+__all__ = ['RedundantSSEClient', 'PathStats']
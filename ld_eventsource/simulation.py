@@ -0,0 +1,161 @@
+"""
+An offline simulator for choosing a :class:`.RetryDelayStrategy`.
+
+:func:`simulate_reconnects()` runs a fleet of virtual clients through one or more outages of
+a virtual server, on a virtual clock, so a scenario with thousands of clients and hours of
+simulated time runs in well under a second. Each client follows the same rules as
+:class:`.SSEClient`: after each failure it asks its own retry delay strategy for the delay
+before the next attempt, and it resets the strategy if its connection had stayed up for the
+reset threshold. The result tells you how hard the fleet hits the server when it comes back,
+and how long it takes for every client to be connected again.
+::
+
+    result = simulate_reconnects(
+        lambda i: RetryDelayStrategy.full_jitter(max_delay=30, seed=i),
+        clients=5000,
+        outages=[(60, 120)],
+        capacity=500,
+    )
+    print(result.peak_attempts_per_second, result.time_to_recovery)
+
+The simulation does not perform any I/O, and connection attempts take no time.
+"""
+
+import heapq
+from typing import Callable, List, Optional, Sequence, Tuple
+
+from ld_eventsource.config.retry_delay_strategy import RetryDelayStrategy
+from ld_eventsource.errors import HTTPStatusError
+
+
+class SimulationResult:
+    """
+    The outcome of :func:`simulate_reconnects()`.
+    """
+
+    def __init__(
+        self,
+        attempts_per_second: List[int],
+        failed_attempts: int,
+        time_to_recovery: Optional[float],
+    ):
+        self.attempts_per_second = attempts_per_second
+        """The number of connection attempts in each second of the simulation."""
+        self.failed_attempts = failed_attempts
+        """The number of connection attempts that failed."""
+        self.time_to_recovery = time_to_recovery
+        """
+        The time from the end of the last outage until every client was connected again, in
+        seconds; or ``None`` if that did not happen within the simulated time.
+        """
+
+    @property
+    def total_attempts(self) -> int:
+        """The total number of connection attempts."""
+        return sum(self.attempts_per_second)
+
+    @property
+    def peak_attempts_per_second(self) -> int:
+        """The largest number of connection attempts in any one second."""
+        return max(self.attempts_per_second, default=0)
+
+    def __repr__(self):
+        return "SimulationResult(peak_attempts_per_second=%d, total_attempts=%d, failed_attempts=%d, time_to_recovery=%s)" % (
+            self.peak_attempts_per_second, self.total_attempts, self.failed_attempts, self.time_to_recovery
+        )
+
+
+def simulate_reconnects(
+    retry_delay_strategy: Callable[[int], RetryDelayStrategy],
+    clients: int = 1000,
+    outages: Sequence[Tuple[float, float]] = ((0, 10),),
+    initial_retry_delay: float = 1,
+    retry_delay_reset_threshold: float = 60,
+    capacity: Optional[int] = None,
+    retry_after: Optional[float] = None,
+    max_time: float = 3600,
+) -> SimulationResult:
+    """
+    Simulates a fleet of clients that are all connected to a server when it has outages.
+
+    During an outage, every connection is dropped and every attempt fails as if the connection
+    was refused. At other times, the server accepts up to ``capacity`` connections in each
+    second of the simulated clock, and rejects the rest with an :class:`.HTTPStatusError` with
+    status 503, which has a ``Retry-After`` header if ``retry_after`` is set. To see how a
+    strategy uses that hint, use :meth:`.RetryDelayStrategy.retry_after()`.
+
+    :param retry_delay_strategy: a function that returns the strategy for the client with the
+        given index; to model a real fleet, each client's strategy should have its own seed
+    :param clients: the number of clients
+    :param outages: the start and end time of each outage, in seconds of simulated time
+    :param initial_retry_delay: the base delay, as in the ``initial_retry_delay`` parameter of
+        :class:`.SSEClient`
+    :param retry_delay_reset_threshold: as in :class:`.SSEClient`
+    :param capacity: the number of connections the server accepts in each second, or ``None``
+        for no limit
+    :param retry_after: the value of the ``Retry-After`` header, in seconds, when the server
+        rejects a connection for being over capacity
+    :param max_time: when to stop the simulation, in seconds of simulated time
+    """
+    outages = sorted(outages)
+    base_strategies = [retry_delay_strategy(i) for i in range(clients)]
+    strategies = list(base_strategies)
+    connected_since: List[Optional[float]] = [0.0] * clients
+    connected = clients
+    attempts_per_second = [0] * (int(max_time) + 1)
+    accepted_per_second = [0] * (int(max_time) + 1)
+    failed_attempts = 0
+    recovered_time: Optional[float] = None
+    last_outage_end = outages[-1][1] if outages else 0
+    overloaded_headers = None if retry_after is None else {'Retry-After': str(int(retry_after))}
+
+    # Each entry is (time, client index), or (time, -1 - outage index) for the start of an outage.
+    queue: List[Tuple[float, int]] = [(start, -1 - i) for i, (start, _) in enumerate(outages)]
+    heapq.heapify(queue)
+
+    def schedule_retry(now: float, client: int, error: Exception):
+        delay, strategies[client] = strategies[client].apply_for_error(initial_retry_delay, error)
+        heapq.heappush(queue, (now + delay, client))
+
+    while queue:
+        now, client = heapq.heappop(queue)
+        if now > max_time:
+            break
+        if client < 0:
+            for c in range(clients):
+                since = connected_since[c]
+                if since is None:
+                    continue
+                connected_since[c] = None
+                if retry_delay_reset_threshold > 0 and now - since >= retry_delay_reset_threshold:
+                    strategies[c] = base_strategies[c]
+                schedule_retry(now, c, ConnectionResetError())
+            connected = 0
+            recovered_time = None
+            continue
+
+        second = int(now)
+        attempts_per_second[second] += 1
+        error: Optional[Exception] = None
+        if any(start <= now < end for start, end in outages):
+            error = ConnectionRefusedError()
+        elif capacity is not None and accepted_per_second[second] >= capacity:
+            error = HTTPStatusError(503, overloaded_headers)
+        if error is not None:
+            failed_attempts += 1
+            schedule_retry(now, client, error)
+            continue
+        accepted_per_second[second] += 1
+        connected_since[client] = now
+        connected += 1
+        if connected == clients and now >= last_outage_end:
+            recovered_time = now
+
+    return SimulationResult(
+        attempts_per_second,
+        failed_attempts,
+        None if recovered_time is None else recovered_time - last_outage_end,
+    )
+
+
+__all__ = ['simulate_reconnects', 'SimulationResult']
@@ -0,0 +1,159 @@
+"""
+Support for the structured log records written by :class:`.SSEClient` and
+:class:`.AsyncSSEClient`.
+
+Log messages are formatted lazily by the ``logging`` module, so they cost almost nothing if the
+logger discards them. Each record also carries machine-readable fields as attributes of the
+``LogRecord``, which a structured formatter (for instance, one that writes JSON) can include.
+A field is only present if it applies to the message. The field names are stable:
+
+* ``sse_stream``: the ``stream_key`` of the client, or the URL if none was given
+* ``sse_url``: the URL being connected to, for messages from the default HTTP strategies
+* ``sse_attempt``: the number of the connection attempt, counting from 1 after each success
+* ``sse_delay``: the retry delay in seconds
+* ``sse_downtime``: the time in seconds since the previous connection was lost
+* ``sse_timings``: a dict of the phase timings of the attempt, as in
+  :class:`.ConnectionTimings`, omitting phases that were not measured
+* ``sse_error``: the class name of the error that caused a failure
+* ``sse_suppressed``: the number of similar messages that were suppressed since the last one
+
+During a reconnection storm, a stream may fail and retry over and over. To keep the log
+readable, the messages about connection attempts, failed attempts, and retry delays are
+rate-limited separately for each logger and stream: a burst of 10 messages is allowed, and
+after that 1 per second, so one stream that keeps failing does not hide the messages of
+others. The limit can be changed with :func:`set_reconnect_log_limit()`. Each message that gets
+through reports how many were suppressed before it in ``sse_suppressed``.
+"""
+
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from ld_eventsource.actions import ConnectionTimings
+
+
+class _LogRateLimiter:
+    """
+    A token bucket that decides whether a message should be logged, counting the ones that were
+    not.
+    """
+
+    def __init__(self, burst: int, rate: float):
+        self.__lock = threading.Lock()
+        self.__burst = burst
+        self.__rate = rate
+        self.__tokens = float(burst)
+        self.__last_refill = time.monotonic()
+        self.__suppressed = 0
+
+    def acquire(self) -> Optional[int]:
+        """
+        Returns the number of messages suppressed since the last one that was allowed, if this
+        message is allowed; or ``None`` if it should be suppressed.
+        """
+        with self.__lock:
+            now = time.monotonic()
+            self.__tokens = min(self.__burst, self.__tokens + (now - self.__last_refill) * self.__rate)
+            self.__last_refill = now
+            if self.__tokens < 1:
+                self.__suppressed += 1
+                return None
+            self.__tokens -= 1
+            suppressed = self.__suppressed
+            self.__suppressed = 0
+            return suppressed
+
+
+class _ReconnectLogLimiters:
+    """
+    The rate limiters for reconnection messages, one for each logger and stream. Only the most
+    recently used ones are kept, so that a process that connects to many different URLs over
+    time does not accumulate them.
+    """
+
+    MAX_LIMITERS = 1000
+
+    def __init__(self, burst: int, rate: float):
+        self.__lock = threading.Lock()
+        self.__burst = burst
+        self.__rate = rate
+        self.__limiters: OrderedDict[Tuple[str, Any], _LogRateLimiter] = OrderedDict()
+
+    def configure(self, burst: int, rate: float):
+        with self.__lock:
+            self.__burst = burst
+            self.__rate = rate
+            self.__limiters.clear()
+
+    def acquire(self, logger_name: str, stream: Any) -> Optional[int]:
+        key = (logger_name, stream)
+        with self.__lock:
+            limiter = self.__limiters.get(key)
+            if limiter is None:
+                limiter = _LogRateLimiter(self.__burst, self.__rate)
+                self.__limiters[key] = limiter
+                if len(self.__limiters) > _ReconnectLogLimiters.MAX_LIMITERS:
+                    self.__limiters.popitem(last=False)
+            else:
+                self.__limiters.move_to_end(key)
+        return limiter.acquire()
+
+
+_reconnect_log_limiters = _ReconnectLogLimiters(10, 1.0)
+
+
+def set_reconnect_log_limit(burst: int = 10, rate: float = 1.0):
+    """
+    Changes how many reconnection messages are logged for each logger and stream during a storm.
+    Calling this with no arguments restores the defaults. It applies to clients that already
+    exist as well as new ones, and resets the count of messages that have been logged.
+
+    :param burst: the number of messages that can be logged in a burst before rate-limiting
+    :param rate: the number of messages per second that are logged during a sustained storm
+    """
+    _reconnect_log_limiters.configure(burst, rate)
+
+
+def _timings_fields(timings: Optional[ConnectionTimings]) -> Dict[str, float]:
+    if timings is None:
+        return {}
+    fields = {
+        'dns': timings.dns,
+        'connect': timings.connect,
+        'tls': timings.tls,
+        'time_to_first_byte': timings.time_to_first_byte,
+        'total': timings.total,
+    }
+    return {name: value for name, value in fields.items() if value is not None}
+
+
+def _error_name(error: Optional[BaseException]) -> Optional[str]:
+    return None if error is None else type(error).__name__
+
+
+def _fields(**fields: Any) -> Dict[str, Any]:
+    return {'sse_' + name: value for name, value in fields.items() if value is not None}
+
+
+def _log_reconnect(logger: logging.Logger, msg: str, *args: Any, **fields: Any):
+    """
+    Logs an INFO message about a connection attempt, a failed attempt, or a retry delay, unless
+    the logger would discard it or the rate limit for the logger and stream has been reached.
+    The stream is identified by the ``stream`` field, or else the ``url`` field. The logger is
+    checked first, so that clients whose logs are not being written do not use up the limit.
+    """
+    if not logger.isEnabledFor(logging.INFO):
+        return
+    suppressed = _reconnect_log_limiters.acquire(logger.name, fields.get('stream') or fields.get('url'))
+    if suppressed is None:
+        return
+    if suppressed:
+        msg += ' (%d similar messages suppressed)'
+        args += (suppressed,)
+        fields['suppressed'] = suppressed
+    logger.info(msg, *args, extra=_fields(**fields))
+
+
+__all__ = ['set_reconnect_log_limit']
@@ -11,17 +11,29 @@ from ld_eventsource.config.async_connect_strategy import (
 class MockAsyncConnectStrategy(AsyncConnectStrategy):
     def __init__(self, *request_handlers: MockAsyncConnectionHandler):
         self.__handlers = list(request_handlers)
+        self.__last_event_ids: List[Optional[str]] = []
+
+    @property
+    def last_event_ids(self) -> List[Optional[str]]:
+        """The ``last_event_id`` passed to each connection attempt, in order."""
+        return self.__last_event_ids
 
     def create_client(self, logger: Logger) -> AsyncConnectionClient:
-        return MockAsyncConnectionClient(self.__handlers)
+        return MockAsyncConnectionClient(self.__handlers, self.__last_event_ids)
 
 
 class MockAsyncConnectionClient(AsyncConnectionClient):
-    def __init__(self, handlers: List[MockAsyncConnectionHandler]):
+    def __init__(
+        self,
+        handlers: List[MockAsyncConnectionHandler],
+        last_event_ids: Optional[List[Optional[str]]] = None,
+    ):
         self.__handlers = handlers
+        self.__last_event_ids = [] if last_event_ids is None else last_event_ids
         self.__request_count = 0
 
     async def connect(self, last_event_id: Optional[str]) -> AsyncConnectionResult:
+        self.__last_event_ids.append(last_event_id)
         handler = self.__handlers[self.__request_count]
         if self.__request_count < len(self.__handlers) - 1:
             self.__request_count += 1
@@ -33,17 +33,29 @@ def no_delay() -> RetryDelayStrategy:
 class MockConnectStrategy(ConnectStrategy):
     def __init__(self, *request_handlers: MockConnectionHandler):
         self.__handlers = list(request_handlers)
+        self.__last_event_ids: List[Optional[str]] = []
+
+    @property
+    def last_event_ids(self) -> List[Optional[str]]:
+        """The ``last_event_id`` passed to each connection attempt, in order."""
+        return self.__last_event_ids
 
     def create_client(self, logger: Logger) -> ConnectionClient:
-        return MockConnectionClient(self.__handlers)
+        return MockConnectionClient(self.__handlers, self.__last_event_ids)
 
 
 class MockConnectionClient(ConnectionClient):
-    def __init__(self, handlers: List[MockConnectionHandler]):
+    def __init__(
+        self,
+        handlers: List[MockConnectionHandler],
+        last_event_ids: Optional[List[Optional[str]]] = None,
+    ):
         self.__handlers = handlers
+        self.__last_event_ids = [] if last_event_ids is None else last_event_ids
         self.__request_count = 0
 
     def connect(self, last_event_id: Optional[str]) -> ConnectionResult:
+        self.__last_event_ids.append(last_event_id)
         handler = self.__handlers[self.__request_count]
         if self.__request_count < len(self.__handlers) - 1:
             self.__request_count += 1
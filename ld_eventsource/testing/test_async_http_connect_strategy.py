@@ -161,3 +161,37 @@ async def test_sse_client_with_http_connect_strategy():
                 async for event in client.events:
                     assert event.data == 'data1'
                     break
+
+
+@pytest.mark.asyncio
+async def test_http_connect_timings():
+    with start_server() as server:
+        with ChunkedResponse({'Content-Type': 'text/event-stream'}) as stream:
+            server.for_path('/', stream)
+            client_obj = AsyncConnectStrategy.http(server.uri).create_client(logger())
+            assert client_obj.last_connect_timings is None
+            result = await client_obj.connect(None)
+            try:
+                timings = client_obj.last_connect_timings
+                assert timings.dns is not None
+                assert timings.connect is not None
+                assert timings.time_to_first_byte is not None
+                assert timings.total >= timings.dns + timings.connect + timings.time_to_first_byte
+            finally:
+                await result.close()
+                await client_obj.close()
+
+
+@pytest.mark.asyncio
+async def test_http_connect_timings_for_failed_attempt():
+    with start_server() as server:
+        server.for_path('/', BasicResponse(503))
+        client_obj = AsyncConnectStrategy.http(server.uri).create_client(logger())
+        try:
+            with pytest.raises(HTTPStatusError):
+                await client_obj.connect(None)
+            timings = client_obj.last_connect_timings
+            assert timings.time_to_first_byte is not None
+            assert timings.total is not None
+        finally:
+            await client_obj.close()
@@ -168,12 +168,12 @@ async def test_retry_delay_gets_reset_after_threshold():
         retry_delay_reset_threshold=retry_delay_reset_threshold,
         retry_delay_strategy=RetryDelayStrategy.default(jitter_multiplier=None),
     ) as client:
-        assert client._retry_reset_baseline == 0
+        assert client._retry_reset_baseline is None
         all_iter = client.all.__aiter__()
 
         item1 = await all_iter.__anext__()
         assert isinstance(item1, Start)
-        assert client._retry_reset_baseline != 0
+        assert client._retry_reset_baseline is not None
 
         item2 = await all_iter.__anext__()
         assert isinstance(item2, Event)
@@ -198,3 +198,70 @@ async def test_retry_delay_gets_reset_after_threshold():
         item6 = await all_iter.__anext__()
         assert isinstance(item6, Fault)
         assert client.next_retry_delay == initial_delay * 2
+
+
+@pytest.mark.asyncio
+async def test_start_and_fault_report_timings_and_downtime():
+    mock = MockAsyncConnectStrategy(
+        AsyncRespondWithData("data: data1\n\n"),
+        AsyncRejectConnection(HTTPStatusError(503)),
+        AsyncRespondWithData("data: data2\n\n"),
+    )
+    async with AsyncSSEClient(
+        connect=mock,
+        error_strategy=ErrorStrategy.always_continue(),
+        initial_retry_delay=0.01,
+        retry_delay_strategy=RetryDelayStrategy.default(jitter_multiplier=None),
+    ) as client:
+        all_iter = client.all.__aiter__()
+
+        start1 = await all_iter.__anext__()
+        assert isinstance(start1, Start)
+        assert start1.downtime is None
+        assert start1.timings.total is not None
+        assert await all_iter.__anext__() == Event(data='data1')
+
+        end = await all_iter.__anext__()
+        assert isinstance(end, Fault)
+        assert end.timings is None
+
+        failed = await all_iter.__anext__()
+        assert isinstance(failed, Fault)
+        assert failed.timings.total is not None
+
+        start2 = await all_iter.__anext__()
+        assert isinstance(start2, Start)
+        assert start2.downtime >= 0.025
+
+
+@pytest.mark.asyncio
+async def test_fault_and_client_have_recent_bytes():
+    mock = MockAsyncConnectStrategy(AsyncRespondWithData("data: a\n\ndata: b\n\n"))
+    async with AsyncSSEClient(
+        connect=mock,
+        error_strategy=ErrorStrategy.always_fail(),
+        wire_tap_size=9,
+    ) as client:
+        all_iter = client.all.__aiter__()
+        assert isinstance(await all_iter.__anext__(), Start)
+        assert await all_iter.__anext__() == Event(data='a')
+        assert await all_iter.__anext__() == Event(data='b')
+        end = await all_iter.__anext__()
+        assert isinstance(end, Fault)
+        assert end.recent_bytes == b"data: b\n\n"
+        assert client.recent_bytes == b"data: b\n\n"
+
+
+@pytest.mark.asyncio
+async def test_server_retry_field_sets_clamped_base_delay():
+    mock = MockAsyncConnectStrategy(AsyncRespondWithData("retry: 3600000\ndata: a\n\n"))
+    async with AsyncSSEClient(
+        connect=mock,
+        error_strategy=ErrorStrategy.always_continue(),
+        retry_delay_strategy=RetryDelayStrategy.default(jitter_multiplier=None),
+        max_server_retry_delay=60,
+    ) as client:
+        async for item in client.all:
+            if isinstance(item, Fault):
+                break
+        assert client.next_retry_delay == 60
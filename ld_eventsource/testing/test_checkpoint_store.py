@@ -0,0 +1,149 @@
+import time
+
+import pytest
+
+from ld_eventsource import *
+from ld_eventsource.actions import *
+from ld_eventsource.async_client import AsyncSSEClient
+from ld_eventsource.config import *
+from ld_eventsource.testing.async_helpers import *
+from ld_eventsource.testing.helpers import *
+
+
+def test_new_file_has_no_checkpoint(tmp_path):
+    with CheckpointStore.mmap_file(str(tmp_path / 'ckpt')) as store:
+        assert store.load() is None
+
+
+def test_checkpoint_survives_reopen(tmp_path):
+    path = str(tmp_path / 'ckpt')
+    with CheckpointStore.mmap_file(path, write_interval=0) as store:
+        store.update('a')
+        store.update('b')
+    with CheckpointStore.mmap_file(path) as store:
+        assert store.load() == 'b'
+
+
+def test_writes_are_bounded_by_interval(tmp_path):
+    path = str(tmp_path / 'ckpt')
+    store = CheckpointStore.mmap_file(path, write_interval=1000)
+    store.update('1')  # first update is always written
+    store.update('2')
+    with CheckpointStore.mmap_file(path) as other:
+        assert other.load() == '1'
+    store.flush()
+    with CheckpointStore.mmap_file(path) as other:
+        assert other.load() == '2'
+    store.close()
+
+
+def test_held_back_id_is_written_when_interval_elapses(tmp_path):
+    path = str(tmp_path / 'ckpt')
+    with CheckpointStore.mmap_file(path, write_interval=0.05) as store:
+        store.update('1')
+        store.update('2')  # held back, and no more events arrive
+        time.sleep(0.2)
+        with CheckpointStore.mmap_file(path) as other:
+            assert other.load() == '2'
+
+
+def test_writes_are_forced_by_count(tmp_path):
+    path = str(tmp_path / 'ckpt')
+    with CheckpointStore.mmap_file(path, write_interval=1000, write_every=3) as store:
+        for i in range(1, 8):
+            store.update(str(i))
+        with CheckpointStore.mmap_file(path) as other:
+            assert other.load() == '7'  # written at 1, then after 3 more (4), then 3 more (7)
+
+
+def test_corrupt_slot_falls_back_to_previous_checkpoint(tmp_path):
+    path = tmp_path / 'ckpt'
+    with CheckpointStore.mmap_file(str(path), write_interval=0, max_id_length=16) as store:
+        store.update('first')
+        store.update('second')
+    data = bytearray(path.read_bytes())
+    data[20] ^= 0xFF  # corrupt the payload of 'second', which went to slot 0
+    path.write_bytes(bytes(data))
+    with CheckpointStore.mmap_file(str(path), max_id_length=16) as store:
+        assert store.load() == 'first'
+
+
+def test_id_too_long_is_not_persisted(tmp_path, caplog):
+    path = str(tmp_path / 'ckpt')
+    with CheckpointStore.mmap_file(path, write_interval=0, max_id_length=4) as store:
+        store.update('abc')
+        store.update('abcdefgh')
+    assert "longer than the checkpoint's max_id_length" in caplog.text
+    with CheckpointStore.mmap_file(path, max_id_length=4) as store:
+        assert store.load() == 'abc'
+
+
+@pytest.mark.parametrize('reopened_length', [8, 64])
+def test_reopening_with_other_max_id_length_keeps_checkpoint(tmp_path, reopened_length):
+    path = str(tmp_path / 'ckpt')
+    with CheckpointStore.mmap_file(path, write_interval=0, max_id_length=16) as store:
+        store.update('first')  # sequence 1, which is in the second slot
+    with CheckpointStore.mmap_file(path, write_interval=0, max_id_length=reopened_length) as store:
+        assert store.load() == 'first'
+        store.update('second')
+    with CheckpointStore.mmap_file(path, max_id_length=reopened_length) as store:
+        assert store.load() == 'second'
+
+
+def test_reopening_with_max_id_length_too_small_for_checkpoint_fails(tmp_path):
+    path = tmp_path / 'ckpt'
+    with CheckpointStore.mmap_file(str(path), write_interval=0, max_id_length=16) as store:
+        store.update('abcdefgh')
+    data = path.read_bytes()
+    with pytest.raises(ValueError):
+        CheckpointStore.mmap_file(str(path), max_id_length=4)
+    assert path.read_bytes() == data
+
+
+def test_resizing_replaces_file_instead_of_truncating_it(tmp_path):
+    path = tmp_path / 'ckpt'
+    with CheckpointStore.mmap_file(str(path), write_interval=0, max_id_length=16) as store:
+        store.update('first')
+    inode = path.stat().st_ino
+    with CheckpointStore.mmap_file(str(path), max_id_length=64) as store:
+        assert store.load() == 'first'
+    assert path.stat().st_ino != inode
+    assert [p.name for p in tmp_path.iterdir()] == ['ckpt']
+
+
+def test_client_resumes_from_checkpoint(tmp_path):
+    path = str(tmp_path / 'ckpt')
+    mock = MockConnectStrategy(RespondWithData("id: 1\ndata: a\n\nid: 2\ndata: b\n\n"))
+    with CheckpointStore.mmap_file(path, write_interval=1000) as store:
+        with SSEClient(connect=mock, checkpoint_store=store) as client:
+            assert [e.data for e in client.events] == ['a', 'b']
+
+    mock = MockConnectStrategy(RespondWithData("id: 3\ndata: c\n\n"))
+    with CheckpointStore.mmap_file(path) as store:
+        with SSEClient(connect=mock, checkpoint_store=store) as client:
+            assert client.last_event_id == '2'
+            assert [e.data for e in client.events] == ['c']
+    assert mock.last_event_ids == ['2']
+
+
+def test_explicit_last_event_id_takes_precedence(tmp_path):
+    path = str(tmp_path / 'ckpt')
+    with CheckpointStore.mmap_file(path, write_interval=0) as store:
+        store.update('2')
+        with SSEClient(connect=MockConnectStrategy(RespondWithData("")), last_event_id='x', checkpoint_store=store) as client:
+            assert client.last_event_id == 'x'
+
+
+@pytest.mark.asyncio
+async def test_async_client_resumes_from_checkpoint(tmp_path):
+    path = str(tmp_path / 'ckpt')
+    mock = MockAsyncConnectStrategy(AsyncRespondWithData("id: 1\ndata: a\n\nid: 2\ndata: b\n\n"))
+    with CheckpointStore.mmap_file(path, write_interval=1000) as store:
+        async with AsyncSSEClient(connect=mock, checkpoint_store=store) as client:
+            assert [e.data async for e in client.events] == ['a', 'b']
+
+    mock = MockAsyncConnectStrategy(AsyncRespondWithData("id: 3\ndata: c\n\n"))
+    with CheckpointStore.mmap_file(path) as store:
+        async with AsyncSSEClient(connect=mock, checkpoint_store=store) as client:
+            assert [e.data async for e in client.events] == ['c']
+    assert mock.last_event_ids == ['2']
@@ -0,0 +1,111 @@
+import time
+
+import pytest
+
+from ld_eventsource import *
+from ld_eventsource.actions import *
+from ld_eventsource.async_client import AsyncSSEClient
+from ld_eventsource.config import *
+from ld_eventsource.errors import *
+from ld_eventsource.testing.async_helpers import *
+from ld_eventsource.testing.helpers import *
+
+
+def test_opens_when_failure_rate_is_reached():
+    breaker = CircuitBreaker(failure_rate=0.5, min_attempts=4, open_time=60)
+    breaker._record_success()
+    breaker._record_failure()
+    breaker._record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+    breaker._record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert breaker._allow() is False
+
+
+def test_old_outcomes_leave_the_window():
+    breaker = CircuitBreaker(failure_rate=1, min_attempts=2, window=0.05)
+    breaker._record_failure()
+    time.sleep(0.06)
+    breaker._record_failure()
+    assert breaker.state == CircuitBreaker.CLOSED
+    breaker._record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+
+
+def test_half_open_allows_limited_probes():
+    breaker = CircuitBreaker(failure_rate=1, min_attempts=1, open_time=0.05, max_probes=2)
+    breaker._record_failure()
+    assert breaker._allow() is False
+    time.sleep(0.06)
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert breaker._allow() is True
+    assert breaker._allow() is True
+    assert breaker._allow() is False
+
+
+def test_probe_success_closes_and_failure_reopens():
+    breaker = CircuitBreaker(failure_rate=1, min_attempts=1, open_time=0.05)
+    breaker._record_failure()
+    time.sleep(0.06)
+    assert breaker._allow() is True
+    breaker._record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+
+    time.sleep(0.06)
+    assert breaker._allow() is True
+    breaker._record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker._allow() is True
+
+
+def test_open_circuit_is_shared_and_makes_no_network_call():
+    breaker = CircuitBreaker(failure_rate=1, min_attempts=2, open_time=60)
+    strategy = ErrorStrategy.circuit_breaker(breaker)
+
+    failing = MockConnectStrategy(RejectConnection(HTTPStatusError(503)))
+    with SSEClient(
+        connect=failing, error_strategy=strategy, retry_delay_strategy=no_delay()
+    ) as client:
+        all = client.all
+        assert isinstance(next(all).error, HTTPStatusError)
+        assert isinstance(next(all).error, HTTPStatusError)
+        assert isinstance(next(all).error, CircuitOpenError)
+    assert len(failing.last_event_ids) == 2
+
+    untouched = MockConnectStrategy(ExpectNoMoreRequests())
+    with SSEClient(connect=untouched, error_strategy=strategy) as client:
+        fault = next(iter(client.all))
+        assert isinstance(fault, Fault)
+        assert isinstance(fault.error, CircuitOpenError)
+        assert fault.timings is None
+    assert untouched.last_event_ids == []
+
+
+def test_successful_probe_lets_clients_connect():
+    breaker = CircuitBreaker(failure_rate=1, min_attempts=1, open_time=0.02)
+    mock = MockConnectStrategy(
+        RejectConnection(HTTPStatusError(503)),
+        RespondWithData("data: a\n\n"),
+    )
+    with SSEClient(
+        connect=mock,
+        error_strategy=ErrorStrategy.circuit_breaker(breaker),
+        initial_retry_delay=0.01,
+        retry_delay_strategy=RetryDelayStrategy.default(jitter_multiplier=None),
+    ) as client:
+        assert next(iter(client.events)).data == 'a'
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert len(mock.last_event_ids) == 2
+
+
+@pytest.mark.asyncio
+async def test_async_open_circuit_makes_no_network_call():
+    breaker = CircuitBreaker(failure_rate=1, min_attempts=1, open_time=60)
+    breaker._record_failure()
+    mock = MockAsyncConnectStrategy(AsyncRespondWithData("data: a\n\n"))
+    async with AsyncSSEClient(
+        connect=mock, error_strategy=ErrorStrategy.circuit_breaker(breaker)
+    ) as client:
+        fault = await client.all.__aiter__().__anext__()
+        assert isinstance(fault.error, CircuitOpenError)
+    assert mock.last_event_ids == []
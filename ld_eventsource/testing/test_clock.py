@@ -0,0 +1,122 @@
+import time
+
+import pytest
+
+from ld_eventsource import *
+from ld_eventsource.actions import *
+from ld_eventsource.async_client import AsyncSSEClient
+from ld_eventsource.config import *
+from ld_eventsource.errors import *
+from ld_eventsource.testing.async_helpers import *
+from ld_eventsource.testing.helpers import *
+
+
+def test_virtual_clock_moves_only_when_asked():
+    clock = VirtualClock(start=5, wall_time=1000)
+    assert clock.now() == 5
+    clock.sleep(2)
+    clock.advance(0.5)
+    assert clock.now() == 7.5
+    assert clock.wall_time() == 1002.5
+    assert clock.sleeps == [2]
+    with pytest.raises(ValueError):
+        clock.advance(-1)
+
+
+def test_client_backs_off_on_virtual_clock_without_waiting():
+    clock = VirtualClock()
+    mock = MockConnectStrategy(RejectConnection(HTTPStatusError(503)))
+    start = time.monotonic()
+    with SSEClient(
+        connect=mock,
+        error_strategy=ErrorStrategy.always_continue(),
+        retry_delay_strategy=RetryDelayStrategy.default(max_delay=30),
+        clock=clock,
+    ) as client:
+        all = client.all
+        for _ in range(1000):
+            assert isinstance(next(all), Fault)
+    assert time.monotonic() - start < 5
+    assert clock.sleeps[:7] == [1, 2, 4, 8, 16, 30, 30]
+    assert len(clock.sleeps) == 999
+    assert clock.now() == sum(clock.sleeps)
+
+
+def test_retry_delay_is_reset_after_threshold_of_virtual_time():
+    clock = VirtualClock()
+    mock = MockConnectStrategy(
+        RejectConnection(HTTPStatusError(503)),
+        RejectConnection(HTTPStatusError(503)),
+        RespondWithData("data: a\n\n"),
+    )
+    with SSEClient(
+        connect=mock,
+        error_strategy=ErrorStrategy.always_continue(),
+        retry_delay_strategy=RetryDelayStrategy.default(jitter_multiplier=None),
+        retry_delay_reset_threshold=60,
+        clock=clock,
+    ) as client:
+        all = client.all
+        assert isinstance(next(all), Fault)
+        assert isinstance(next(all), Fault)
+        assert client.next_retry_delay == 2
+        assert isinstance(next(all), Start)
+        assert isinstance(next(all), Event)
+        clock.advance(60)
+        fault = next(all)
+        assert isinstance(fault, Fault) and fault.error is None
+        assert client.next_retry_delay == 1
+        start = next(all)
+        assert isinstance(start, Start)
+        assert start.downtime == 1
+
+
+def test_time_limit_uses_clock():
+    clock = VirtualClock()
+    strategy = ErrorStrategy.continue_with_time_limit(10, clock)
+    fail, strategy = strategy.apply(Exception())
+    assert fail is ErrorStrategy.CONTINUE
+    clock.advance(9)
+    fail, strategy = strategy.apply(Exception())
+    assert fail is ErrorStrategy.CONTINUE
+    clock.advance(1)
+    fail, strategy = strategy.apply(Exception())
+    assert fail is ErrorStrategy.FAIL
+
+
+def test_retry_after_date_uses_clock_wall_time():
+    clock = VirtualClock(wall_time=784111777)  # Sun, 06 Nov 1994 08:49:37 GMT
+    strategy = RetryDelayStrategy.retry_after(jitter_multiplier=0, clock=clock)
+    error = HTTPStatusError(503, {'Retry-After': 'Sun, 06 Nov 1994 08:50:07 GMT'})
+    delay, _ = strategy.apply_for_error(1, error)
+    assert delay == 30
+
+
+def test_circuit_breaker_uses_clock():
+    clock = VirtualClock()
+    breaker = CircuitBreaker(failure_rate=1, min_attempts=1, open_time=30, clock=clock)
+    breaker._record_failure()
+    clock.advance(29)
+    assert breaker.state == CircuitBreaker.OPEN
+    clock.advance(1)
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+
+
+@pytest.mark.asyncio
+async def test_async_client_backs_off_on_virtual_clock_without_waiting():
+    clock = VirtualClock()
+    mock = MockAsyncConnectStrategy(AsyncRejectConnection(HTTPStatusError(503)))
+    async with AsyncSSEClient(
+        connect=mock,
+        error_strategy=ErrorStrategy.always_continue(),
+        retry_delay_strategy=RetryDelayStrategy.default(max_delay=30),
+        clock=clock,
+    ) as client:
+        faults = 0
+        async for item in client.all:
+            assert isinstance(item, Fault)
+            faults += 1
+            if faults == 100:
+                break
+    assert clock.sleeps[:7] == [1, 2, 4, 8, 16, 30, 30]
+    assert clock.now() == sum(clock.sleeps)
@@ -0,0 +1,105 @@
+import json
+import threading
+
+import pytest
+
+from ld_eventsource import *
+from ld_eventsource.actions import *
+from ld_eventsource.async_client import AsyncSSEClient
+from ld_eventsource.coalescing import _CoalescingBuffer
+from ld_eventsource.config import *
+from ld_eventsource.testing.async_helpers import *
+from ld_eventsource.testing.helpers import *
+
+burst = (
+    'event: patch\ndata: {"key":"a","v":1}\n\n'
+    'event: patch\ndata: {"key":"b","v":1}\n\n'
+    'event: patch\ndata: {"key":"a","v":2}\n\n'
+    'event: delete\ndata: {"key":"a","v":3}\n\n'
+    'event: patch\ndata: {"key":"c","v":1}\n\n'
+    'event: patch\ndata: {"key":"b","v":2}\n\n'
+    'event: patch\ndata: {"key":"a","v":4}\n\n'
+)
+
+
+def by_type_and_key(e: Event):
+    return (e.event, json.loads(e.data)['key'])
+
+
+def values(events):
+    return [(e.event, json.loads(e.data)['key'], json.loads(e.data)['v']) for e in events]
+
+
+expected = [
+    ('patch', 'a', 4),
+    ('patch', 'b', 2),
+    ('delete', 'a', 3),
+    ('patch', 'c', 1),
+]
+
+
+def test_buffer_keeps_first_arrival_order_and_latest_value():
+    buffer = _CoalescingBuffer(lambda e: e.event)
+    buffer.put(Event('x', '1'))
+    buffer.put(Event('y', '1'))
+    buffer.put(Event('x', '2'))
+    assert len(buffer) == 2
+    assert buffer.superseded == 1
+    assert buffer.pop() == Event('x', '2')
+    assert buffer.pop() == Event('y', '1')
+    assert len(buffer) == 0
+
+
+def test_buffer_never_coalesces_none_key():
+    buffer = _CoalescingBuffer(lambda e: None)
+    buffer.put(Event('x', '1'))
+    buffer.put(Event('x', '1'))
+    assert len(buffer) == 2
+    assert buffer.superseded == 0
+
+
+def test_coalesced_events_collapses_burst_for_slow_consumer():
+    consumer_busy = threading.Event()
+    burst_read = threading.Event()
+
+    def stream():
+        yield b'data: {"key":"first","v":0}\n\n'
+        consumer_busy.wait(5)
+        yield burst.encode()
+        burst_read.set()  # the reader only asks for more data after parsing the whole burst
+
+    with SSEClient(connect=MockConnectStrategy(RespondWithStream(stream()))) as client:
+        events = iter(client.coalesced_events(by_type_and_key))
+        assert values([next(events)]) == [('message', 'first', 0)]
+        consumer_busy.set()
+        assert burst_read.wait(5)
+        assert values(events) == expected
+
+
+def test_coalesced_events_raises_stream_error_after_pending_events():
+    with SSEClient(
+        connect=MockConnectStrategy(
+            RespondWithData('data: {"key":"a","v":1}\n\n'),
+            RejectConnection(HTTPStatusError(500)),
+        ),
+        error_strategy=ErrorStrategy.from_lambda(
+            lambda e: (ErrorStrategy.CONTINUE if e is None else ErrorStrategy.FAIL, None)
+        ),
+        retry_delay_strategy=no_delay(),
+    ) as client:
+        events = iter(client.coalesced_events(by_type_and_key))
+        assert values([next(events)]) == [('message', 'a', 1)]
+        with pytest.raises(HTTPStatusError):
+            next(events)
+
+
+@pytest.mark.asyncio
+async def test_async_coalesced_events_collapses_burst_for_slow_consumer():
+    async with AsyncSSEClient(
+        connect=MockAsyncConnectStrategy(AsyncRespondWithData(burst))
+    ) as client:
+        received = []
+        # The background task reads the whole burst before the consumer gets to run.
+        async for event in client.coalesced_events(by_type_and_key):
+            received.append(event)
+        assert values(received) == expected
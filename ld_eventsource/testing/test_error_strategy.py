@@ -1,6 +1,7 @@
 import time
 
 from ld_eventsource.config import *
+from ld_eventsource.errors import HTTPStatusError
 
 err = Exception("sorry")
 
@@ -47,3 +48,102 @@ def test_max_time():
 
     should_raise, next3 = next2.apply(err)
     assert should_raise is True
+
+
+def test_continue_on_overload():
+    strategy = ErrorStrategy.continue_on_overload(ErrorStrategy.continue_with_max_attempts(1))
+
+    for status in (429, 503, 429):
+        should_raise, strategy = strategy.apply(HTTPStatusError(status))
+        assert should_raise is False
+
+    should_raise, strategy = strategy.apply(HTTPStatusError(500))
+    assert should_raise is False
+
+    should_raise, strategy = strategy.apply(err)
+    assert should_raise is True
+
+
+def test_continue_on_overload_fails_other_errors_by_default():
+    strategy = ErrorStrategy.continue_on_overload()
+    assert strategy.apply(HTTPStatusError(503))[0] is False
+    assert strategy.apply(HTTPStatusError(401))[0] is True
+
+
+def test_builder_dispatches_on_status_class_and_end():
+    strategy = (
+        ErrorStrategy.builder()
+        .on_status(range(500, 600), ErrorStrategy.CONTINUE)
+        .on_status(501, ErrorStrategy.FAIL)
+        .on(ValueError, ErrorStrategy.CONTINUE)
+        .on_end(ErrorStrategy.CONTINUE)
+        .build()
+    )
+    assert strategy.apply(HTTPStatusError(503)) == (ErrorStrategy.CONTINUE, strategy)
+    assert strategy.apply(HTTPStatusError(501))[0] is ErrorStrategy.FAIL
+    assert strategy.apply(HTTPStatusError(404))[0] is ErrorStrategy.FAIL
+    assert strategy.apply(UnicodeDecodeError('utf-8', b'', 0, 1, 'bad'))[0] is ErrorStrategy.CONTINUE
+    assert strategy.apply(None)[0] is ErrorStrategy.CONTINUE
+    assert strategy.apply(err)[0] is ErrorStrategy.FAIL
+
+
+def test_builder_limits_attempts_per_rule():
+    strategy = (
+        ErrorStrategy.builder()
+        .on_status(503, ErrorStrategy.CONTINUE, max_attempts=2)
+        .otherwise(ErrorStrategy.CONTINUE)
+        .build()
+    )
+    should_raise, strategy = strategy.apply(HTTPStatusError(503))
+    assert should_raise is False
+    should_raise, strategy = strategy.apply(err)
+    assert should_raise is False
+    should_raise, strategy = strategy.apply(HTTPStatusError(503))
+    assert should_raise is False
+    should_raise, strategy = strategy.apply(HTTPStatusError(503))
+    assert should_raise is True
+    assert strategy.apply(err)[0] is False
+
+
+def test_builder_is_not_affected_by_later_changes():
+    builder = ErrorStrategy.builder().on(ValueError, ErrorStrategy.CONTINUE)
+    strategy = builder.build()
+    builder.on(ValueError, ErrorStrategy.FAIL)
+    assert strategy.apply(ValueError())[0] is ErrorStrategy.CONTINUE
+
+
+def test_sync_and_async_transport_errors_are_classified_alike():
+    import aiohttp
+    import urllib3.exceptions
+
+    kind = ErrorStrategyBuilder.transport_kind
+    connection_key = None  # only used when formatting the message
+    os_error = OSError(111, 'refused')
+
+    assert kind(urllib3.exceptions.NewConnectionError(None, 'refused')) == ErrorStrategyBuilder.CONNECT
+    assert kind(aiohttp.ClientConnectorError(connection_key, os_error)) == ErrorStrategyBuilder.CONNECT
+    assert kind(ConnectionRefusedError()) == ErrorStrategyBuilder.CONNECT
+
+    assert kind(urllib3.exceptions.ReadTimeoutError(None, 'u', 'slow')) == ErrorStrategyBuilder.TIMEOUT
+    assert kind(aiohttp.ServerTimeoutError()) == ErrorStrategyBuilder.TIMEOUT
+    assert kind(TimeoutError()) == ErrorStrategyBuilder.TIMEOUT
+
+    assert kind(urllib3.exceptions.SSLError()) == ErrorStrategyBuilder.TLS
+    assert kind(aiohttp.ClientSSLError(connection_key, os_error)) == ErrorStrategyBuilder.TLS
+
+    assert kind(urllib3.exceptions.ProtocolError('broken')) == ErrorStrategyBuilder.DISCONNECT
+    assert kind(aiohttp.ServerDisconnectedError()) == ErrorStrategyBuilder.DISCONNECT
+    assert kind(ConnectionResetError()) == ErrorStrategyBuilder.DISCONNECT
+
+    assert kind(err) is None
+
+
+def test_builder_transport_rules_and_class_precedence():
+    strategy = (
+        ErrorStrategy.builder()
+        .on_transport(ErrorStrategyBuilder.DISCONNECT, ErrorStrategy.CONTINUE)
+        .on(BrokenPipeError, ErrorStrategy.FAIL)
+        .build()
+    )
+    assert strategy.apply(ConnectionResetError())[0] is ErrorStrategy.CONTINUE
+    assert strategy.apply(BrokenPipeError())[0] is ErrorStrategy.FAIL
@@ -0,0 +1,124 @@
+import pytest
+
+from ld_eventsource import *
+from ld_eventsource.actions import *
+from ld_eventsource.async_client import AsyncSSEClient
+from ld_eventsource.config import *
+from ld_eventsource.reader import _AckWindow
+from ld_eventsource.testing.async_helpers import *
+from ld_eventsource.testing.helpers import *
+
+
+def test_reconnect_resumes_from_last_acknowledged_event():
+    mock = MockConnectStrategy(
+        RespondWithData("id: 1\ndata: a\n\nid: 2\ndata: b\n\n"),
+        RespondWithData("id: 3\ndata: c\n\n"),
+    )
+    with SSEClient(
+        connect=mock,
+        error_strategy=ErrorStrategy.always_continue(),
+        retry_delay_strategy=no_delay(),
+        explicit_ack=True,
+    ) as client:
+        events = client.events
+        client.ack(next(events))
+        event2 = next(events)
+        assert event2.last_event_id == '2'
+        assert client.last_event_id == '1'
+
+        event3 = next(events)  # the handler for event 2 "crashed", so the stream resumes after 1
+        assert event3.data == 'c'
+        assert mock.last_event_ids == [None, '1']
+
+
+def test_acknowledgements_are_cumulative():
+    mock = MockConnectStrategy(
+        RespondWithData("id: 1\ndata: a\n\nid: 2\ndata: b\n\ndata: c\n\n"),
+        RespondWithData(""),
+    )
+    with SSEClient(
+        connect=mock,
+        error_strategy=ErrorStrategy.always_continue(),
+        retry_delay_strategy=no_delay(),
+        explicit_ack=True,
+    ) as client:
+        events = client.events
+        batch = [next(events) for _ in range(3)]
+        client.ack(batch[-1])  # has no ID of its own, so this acknowledges up to ID 2
+        assert client.last_event_id == '2'
+        client.ack('1')  # arrived late, so it must not move the resume point back
+        assert client.last_event_id == '2'
+        client.ack('unknown')
+        assert client.last_event_id == '2'
+
+
+def test_checkpoint_store_ignores_stale_acknowledgements(tmp_path):
+    path = str(tmp_path / 'ckpt')
+    mock = MockConnectStrategy(RespondWithData("id: 1\ndata: a\n\nid: 2\ndata: b\n\n"))
+    with CheckpointStore.mmap_file(path, write_interval=0) as store:
+        with SSEClient(connect=mock, checkpoint_store=store, explicit_ack=True) as client:
+            events = client.events
+            event1 = next(events)
+            client.ack(next(events))
+            client.ack(event1)
+    with CheckpointStore.mmap_file(path) as store:
+        assert store.load() == '2'
+
+
+def test_ack_window_forgets_oldest_ids_when_full():
+    window = _AckWindow(4)
+    for id in ['1', '2', '3', '4']:
+        window.received(id)
+    assert window.ack('2')
+    window.received('5')  # over capacity: forgets '1' and '2', which were acknowledged
+    assert not window.ack('1')
+    for id in ['6', '7']:
+        window.received(id)
+    window.received('8')  # over capacity again: keeps only the newest half
+    assert not window.ack('5')
+    assert window.ack('7')
+    assert not window.ack('6')
+
+
+def test_ack_has_no_effect_without_explicit_ack():
+    mock = MockConnectStrategy(RespondWithData("id: 1\ndata: a\n\nid: 2\ndata: b\n\n"))
+    with SSEClient(connect=mock) as client:
+        events = client.events
+        client.ack(next(events))
+        next(events)
+        client.ack('1')
+        assert client.last_event_id == '2'
+
+
+def test_checkpoint_store_only_receives_acknowledged_ids(tmp_path):
+    path = str(tmp_path / 'ckpt')
+    mock = MockConnectStrategy(RespondWithData("id: 1\ndata: a\n\nid: 2\ndata: b\n\n"))
+    with CheckpointStore.mmap_file(path, write_interval=0) as store:
+        with SSEClient(connect=mock, checkpoint_store=store, explicit_ack=True) as client:
+            events = client.events
+            client.ack(next(events))
+            next(events)
+    with CheckpointStore.mmap_file(path) as store:
+        assert store.load() == '1'
+
+
+@pytest.mark.asyncio
+async def test_async_reconnect_resumes_from_last_acknowledged_event():
+    mock = MockAsyncConnectStrategy(
+        AsyncRespondWithData("id: 1\ndata: a\n\nid: 2\ndata: b\n\n"),
+        AsyncRespondWithData("id: 3\ndata: c\n\n"),
+    )
+    async with AsyncSSEClient(
+        connect=mock,
+        error_strategy=ErrorStrategy.always_continue(),
+        retry_delay_strategy=no_delay(),
+        explicit_ack=True,
+    ) as client:
+        events = client.events.__aiter__()
+        client.ack(await events.__anext__())
+        await events.__anext__()
+        assert client.last_event_id == '1'
+
+        event3 = await events.__anext__()
+        assert event3.data == 'c'
+        assert mock.last_event_ids == [None, '1']
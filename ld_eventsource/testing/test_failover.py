@@ -0,0 +1,134 @@
+import pytest
+
+from ld_eventsource import *
+from ld_eventsource.actions import *
+from ld_eventsource.async_client import AsyncSSEClient
+from ld_eventsource.config import *
+from ld_eventsource.config.async_connect_strategy import AsyncConnectStrategy
+from ld_eventsource.config.failover import _EndpointSelector
+from ld_eventsource.errors import *
+from ld_eventsource.testing.async_helpers import *
+from ld_eventsource.testing.helpers import *
+
+
+def broken_stream():
+    yield b"id: 1\ndata: a\n\n"
+    raise ConnectionResetError()
+
+
+def test_fails_over_without_losing_last_event_id():
+    primary = MockConnectStrategy(
+        RespondWithStream(broken_stream()),
+        RejectConnection(HTTPStatusError(503)),
+    )
+    secondary = MockConnectStrategy(RespondWithData("id: 2\ndata: b\n\n"))
+    with SSEClient(
+        connect=ConnectStrategy.failover([primary, secondary]),
+        error_strategy=ErrorStrategy.always_continue(),
+        retry_delay_strategy=no_delay(),
+        last_event_id='0',
+    ) as client:
+        events = client.events
+        assert next(events).data == 'a'
+        assert next(events).data == 'b'
+    assert primary.last_event_ids == ['0']
+    assert secondary.last_event_ids == ['1']
+
+
+def test_failed_attempt_moves_to_next_endpoint():
+    primary = MockConnectStrategy(RejectConnection(HTTPStatusError(503)))
+    secondary = MockConnectStrategy(RespondWithData("data: b\n\n"))
+    with SSEClient(
+        connect=ConnectStrategy.failover([primary, secondary]),
+        error_strategy=ErrorStrategy.always_continue(),
+        retry_delay_strategy=no_delay(),
+    ) as client:
+        all = client.all
+        assert isinstance(next(all).error, HTTPStatusError)
+        assert isinstance(next(all), Start)
+    assert len(primary.last_event_ids) == 1
+    assert len(secondary.last_event_ids) == 1
+
+
+def test_ordinary_reconnect_stays_on_healthy_preferred_endpoint():
+    primary = MockConnectStrategy(RespondWithData("id: 1\ndata: a\n\n"))
+    secondary = MockConnectStrategy(RespondWithData("id: 2\ndata: b\n\n"))
+    with SSEClient(
+        connect=ConnectStrategy.failover([primary, secondary]),
+        error_strategy=ErrorStrategy.always_continue(),
+        retry_delay_strategy=no_delay(),
+    ) as client:
+        events = client.events
+        assert next(events).data == 'a'
+        assert next(events).data == 'a'
+    assert secondary.last_event_ids == []
+
+
+def test_returns_to_preferred_endpoint_once_failures_are_forgotten():
+    clock = VirtualClock()
+    selector = _EndpointSelector(2, failure_half_life=60, failure_penalty=10, margin=0.05, clock=clock)
+    assert selector.choose() == 0
+    selector.record_failure(0)
+    assert selector.choose() == 1
+    selector.record_success(1, 0.05)
+    clock.advance(60 * 7)
+    assert selector.choose() == 1
+    clock.advance(60 * 2)
+    assert selector.choose() == 0
+
+
+def test_prefers_endpoint_with_faster_connections():
+    selector = _EndpointSelector(3, failure_half_life=60, failure_penalty=10, margin=0.05, clock=VirtualClock())
+    selector.record_success(0, 0.5)
+    selector.record_success(1, 0.1)
+    selector.record_success(2, 0.2)
+    assert selector.choose() == 1
+
+
+def test_successful_connection_clears_failures():
+    selector = _EndpointSelector(2, failure_half_life=60, failure_penalty=10, margin=0.05, clock=VirtualClock())
+    selector.record_failure(0)
+    selector.record_failure(0)
+    selector.record_success(0, 0.01)
+    assert selector.scores() == [0.01, 0.01]
+
+
+def test_untried_endpoint_does_not_beat_healthy_preferred_endpoint():
+    selector = _EndpointSelector(2, failure_half_life=60, failure_penalty=10, margin=0.05, clock=VirtualClock())
+    selector.record_success(0, 0.05)
+    assert selector.scores() == [0.05, 0.05]
+    assert selector.choose() == 0
+
+
+def test_small_latency_differences_do_not_move_the_client():
+    selector = _EndpointSelector(2, failure_half_life=60, failure_penalty=10, margin=0.05, clock=VirtualClock())
+    selector.record_success(0, 0.08)
+    selector.record_success(1, 0.05)
+    assert selector.choose() == 0
+    selector.record_success(1, 0.0)  # the average drops to 0.035, still within the margin
+    assert selector.choose() == 0
+    for _ in range(5):
+        selector.record_success(1, 0.0)
+    assert selector.choose() == 1
+
+
+def test_requires_an_endpoint():
+    with pytest.raises(ValueError):
+        ConnectStrategy.failover([])
+
+
+@pytest.mark.asyncio
+async def test_async_fails_over_without_losing_last_event_id():
+    primary = MockAsyncConnectStrategy(AsyncRejectConnection(HTTPStatusError(503)))
+    secondary = MockAsyncConnectStrategy(AsyncRespondWithData("id: 2\ndata: b\n\n"))
+    async with AsyncSSEClient(
+        connect=AsyncConnectStrategy.failover([primary, secondary]),
+        error_strategy=ErrorStrategy.always_continue(),
+        retry_delay_strategy=no_delay(),
+        last_event_id='1',
+    ) as client:
+        async for event in client.events:
+            assert event.data == 'b'
+            break
+    assert primary.last_event_ids == ['1']
+    assert secondary.last_event_ids == ['1']
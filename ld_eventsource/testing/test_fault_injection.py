@@ -0,0 +1,128 @@
+import logging
+from typing import List
+
+import pytest
+
+from ld_eventsource import *
+from ld_eventsource.actions import *
+from ld_eventsource.async_client import AsyncSSEClient
+from ld_eventsource.config import *
+from ld_eventsource.config.async_connect_strategy import AsyncConnectStrategy
+from ld_eventsource.testing.async_helpers import *
+from ld_eventsource.testing.helpers import *
+
+logger = logging.getLogger('test')
+
+stream_data = "".join("id: %d\ndata: event %d\n\n" % (i, i) for i in range(50))
+
+
+def read_chunks(faults: FaultInjection, data: str = stream_data) -> List[bytes]:
+    strategy = ConnectStrategy.inject_faults(MockConnectStrategy(RespondWithData(data)), faults)
+    with strategy.create_client(logger) as client:
+        result = client.connect(None)
+        return [bytes(chunk) for chunk in result.stream]
+
+
+def test_same_seed_makes_same_choices():
+    def run(seed):
+        faults = FaultInjection(seed=seed, split=0.5)
+        return read_chunks(faults), faults.stats
+
+    assert run(1) == run(1)
+    assert run(1)[0] != run(2)[0]
+
+
+def test_split_delivers_same_bytes_in_small_pieces():
+    faults = FaultInjection(seed=1, split=1, max_split_size=3)
+    chunks = read_chunks(faults)
+    assert b"".join(chunks) == stream_data.encode()
+    assert max(len(c) for c in chunks) <= 3
+    assert faults.stats[FaultInjection.SPLITS] == 1
+    assert faults.stats[FaultInjection.CHUNKS] == 1
+
+
+def test_split_stream_is_parsed_the_same():
+    mock = MockConnectStrategy(RespondWithData(stream_data))
+    with SSEClient(
+        connect=ConnectStrategy.inject_faults(mock, FaultInjection(seed=3, split=1, max_split_size=1))
+    ) as client:
+        events = client.events
+        received = [next(events) for _ in range(50)]
+    assert [e.data for e in received] == ["event %d" % i for i in range(50)]
+
+
+def test_refused_attempt_does_not_reach_inner_strategy():
+    mock = MockConnectStrategy(RespondWithData("data: a\n\n"))
+    faults = FaultInjection(seed=1, refuse=1)
+    with ConnectStrategy.inject_faults(mock, faults).create_client(logger) as client:
+        with pytest.raises(ConnectionRefusedError):
+            client.connect(None)
+    assert mock.last_event_ids == []
+    assert faults.stats[FaultInjection.REFUSED] == 1
+    assert faults.stats[FaultInjection.CONNECTIONS] == 1
+
+
+def test_disconnect_breaks_stream_mid_event_and_client_resumes():
+    mock = MockConnectStrategy(
+        RespondWithStream([b"id: 1\ndata: a\n\n", b"id: 2\ndata: b\n\n"]),
+        RespondWithData("data: c\n\n"),
+    )
+    faults = FaultInjection(seed=1, disconnect=0.5)
+    with SSEClient(
+        connect=ConnectStrategy.inject_faults(mock, faults),
+        error_strategy=ErrorStrategy.always_continue(),
+        retry_delay_strategy=no_delay(),
+    ) as client:
+        items = []
+        for item in client.all:
+            items.append(item)
+            if isinstance(item, Event) and item.data == 'c':
+                break
+    faults_seen = [item for item in items if isinstance(item, Fault)]
+    assert faults_seen and all(isinstance(f.error, ConnectionResetError) for f in faults_seen)
+    assert faults.stats[FaultInjection.DISCONNECTS] == len(faults_seen)
+
+
+def test_delays_use_clock():
+    clock = VirtualClock()
+    faults = FaultInjection(
+        seed=1, header_delay=1, header_delay_time=2, slow_read=1, slow_read_time=0.5, clock=clock
+    )
+    read_chunks(faults)
+    assert clock.sleeps == [2, 0.5]
+    assert faults.stats[FaultInjection.HEADER_DELAYS] == 1
+    assert faults.stats[FaultInjection.SLOW_READS] == 1
+
+
+def test_each_client_gets_its_own_reproducible_choices():
+    def run():
+        faults = FaultInjection(seed=5, split=0.5)
+        strategy = ConnectStrategy.inject_faults(
+            MockConnectStrategy(RespondWithData(stream_data)), faults
+        )
+        results = []
+        for _ in range(3):
+            with strategy.create_client(logger) as client:
+                results.append([bytes(c) for c in client.connect(None).stream])
+        return results
+
+    assert run() == run()
+
+
+@pytest.mark.asyncio
+async def test_async_split_and_disconnect():
+    mock = MockAsyncConnectStrategy(
+        AsyncRespondWithData("id: 1\ndata: a\n\nid: 2\ndata: b\n\n"),
+        AsyncRespondWithData("data: c\n\n"),
+    )
+    faults = FaultInjection(seed=2, split=1, max_split_size=2, disconnect=0.5, clock=VirtualClock())
+    async with AsyncSSEClient(
+        connect=AsyncConnectStrategy.inject_faults(mock, faults),
+        error_strategy=ErrorStrategy.always_continue(),
+        retry_delay_strategy=no_delay(),
+    ) as client:
+        async for item in client.all:
+            if isinstance(item, Event) and item.data == 'c':
+                break
+    assert faults.stats[FaultInjection.SPLITS] >= 1
+    assert faults.stats[FaultInjection.CONNECTIONS] >= 2
@@ -0,0 +1,194 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from ld_eventsource import *
+from ld_eventsource.actions import *
+from ld_eventsource.async_client import AsyncSSEClient
+from ld_eventsource.config import *
+from ld_eventsource.config.async_connect_strategy import AsyncConnectionResult
+from ld_eventsource.governor import AsyncReconnectGovernor, ReconnectGovernor
+from ld_eventsource.testing.async_helpers import *
+from ld_eventsource.testing.helpers import *
+
+
+class ConcurrencyTracker:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.current = 0
+        self.peak = 0
+
+    def enter(self):
+        with self.lock:
+            self.current += 1
+            self.peak = max(self.peak, self.current)
+
+    def leave(self):
+        with self.lock:
+            self.current -= 1
+
+
+class SlowConnection(MockConnectionHandler):
+    def __init__(self, tracker: ConcurrencyTracker):
+        self.__tracker = tracker
+
+    def apply(self) -> ConnectionResult:
+        self.__tracker.enter()
+        try:
+            time.sleep(0.02)
+        finally:
+            self.__tracker.leave()
+        return RespondWithData("data: a\n\n").apply()
+
+
+class AsyncSlowConnection(MockAsyncConnectionHandler):
+    def __init__(self, tracker: ConcurrencyTracker):
+        self.__tracker = tracker
+
+    async def apply(self) -> AsyncConnectionResult:
+        self.__tracker.enter()
+        try:
+            await asyncio.sleep(0.02)
+        finally:
+            self.__tracker.leave()
+        return await AsyncRespondWithData("data: a\n\n").apply()
+
+
+def test_limits_concurrent_connection_attempts():
+    governor = ReconnectGovernor(max_concurrent=2)
+    tracker = ConcurrencyTracker()
+
+    def run():
+        with SSEClient(
+            connect=MockConnectStrategy(SlowConnection(tracker)), reconnect_governor=governor
+        ) as client:
+            client.start()
+
+    threads = [threading.Thread(target=run) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert tracker.peak == 2
+    assert governor.in_flight == 0
+    assert governor.waiting == 0
+
+
+def test_limits_rate_of_connection_attempts():
+    governor = ReconnectGovernor(max_per_second=50, burst=1)
+    start = time.monotonic()
+    for _ in range(6):
+        with SSEClient(
+            connect=MockConnectStrategy(RespondWithData("data: a\n\n")), reconnect_governor=governor
+        ) as client:
+            client.start()
+    assert time.monotonic() - start >= 0.08
+
+
+def test_rate_limit_waits_on_virtual_clock():
+    clock = VirtualClock()
+    governor = ReconnectGovernor(max_per_second=1, burst=1, clock=clock)
+    start = time.monotonic()
+    for _ in range(5):
+        with SSEClient(
+            connect=MockConnectStrategy(RespondWithData("data: a\n\n")),
+            reconnect_governor=governor,
+            clock=clock,
+        ) as client:
+            client.start()
+    assert time.monotonic() - start < 1
+    assert clock.now() >= 4
+
+
+def test_waiting_clients_are_served_in_order():
+    governor = ReconnectGovernor(max_concurrent=1)
+    governor._acquire()
+    order = []
+
+    def wait(n):
+        governor._acquire()
+        order.append(n)
+        governor._release()
+
+    threads = []
+    for n in range(5):
+        threads.append(threading.Thread(target=wait, args=(n,)))
+        threads[-1].start()
+        while governor.waiting < n + 1:
+            time.sleep(0.001)
+    governor._release()
+    for t in threads:
+        t.join()
+    assert order == [0, 1, 2, 3, 4]
+
+
+def test_permission_is_released_when_connection_fails():
+    governor = ReconnectGovernor(max_concurrent=1)
+    with SSEClient(
+        connect=MockConnectStrategy(
+            RejectConnection(HTTPStatusError(503)),
+            RespondWithData("data: a\n\n"),
+        ),
+        error_strategy=ErrorStrategy.always_continue(),
+        retry_delay_strategy=no_delay(),
+        reconnect_governor=governor,
+    ) as client:
+        assert next(iter(client.events)).data == 'a'
+    assert governor.in_flight == 0
+
+
+@pytest.mark.asyncio
+async def test_async_limits_concurrent_connection_attempts():
+    governor = AsyncReconnectGovernor(max_concurrent=2, max_per_second=1000)
+    tracker = ConcurrencyTracker()
+
+    async def run():
+        async with AsyncSSEClient(
+            connect=MockAsyncConnectStrategy(AsyncSlowConnection(tracker)),
+            reconnect_governor=governor,
+        ) as client:
+            await client.start()
+
+    await asyncio.gather(*(run() for _ in range(8)))
+    assert tracker.peak == 2
+    assert governor.in_flight == 0
+
+
+@pytest.mark.asyncio
+async def test_async_waiting_clients_are_served_in_order_and_can_be_cancelled():
+    governor = AsyncReconnectGovernor(max_concurrent=1)
+    await governor._acquire()
+    order = []
+
+    async def wait(n):
+        await governor._acquire()
+        order.append(n)
+        governor._release()
+
+    tasks = [asyncio.ensure_future(wait(n)) for n in range(4)]
+    await asyncio.sleep(0)
+    assert governor.waiting == 4
+    tasks[1].cancel()
+    governor._release()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    assert order == [0, 2, 3]
+    assert governor.in_flight == 0
+    assert governor.waiting == 0
+
+
+@pytest.mark.asyncio
+async def test_async_rate_limit_waits_on_virtual_clock():
+    clock = VirtualClock()
+    governor = AsyncReconnectGovernor(max_per_second=1, burst=1, clock=clock)
+    start = time.monotonic()
+    for _ in range(5):
+        async with AsyncSSEClient(
+            connect=MockAsyncConnectStrategy(AsyncRespondWithData("data: a\n\n")),
+            reconnect_governor=governor,
+            clock=clock,
+        ) as client:
+            await client.start()
+    assert time.monotonic() - start < 1
+    assert clock.now() >= 4
@@ -0,0 +1,243 @@
+import asyncio
+import threading
+import time
+from logging import Logger
+from typing import List, Optional
+
+import pytest
+
+from ld_eventsource import *
+from ld_eventsource.actions import *
+from ld_eventsource.async_client import AsyncSSEClient
+from ld_eventsource.config import *
+from ld_eventsource.config.async_connect_strategy import (
+    AsyncConnectionResult, AsyncConnectStrategy)
+from ld_eventsource.errors import *
+from ld_eventsource.testing.async_helpers import *
+from ld_eventsource.testing.helpers import *
+
+
+class SlowFirstResponse(MockConnectionHandler):
+    """Responds after ``delay`` the first time it is used, and at once after that."""
+
+    def __init__(self, delay: float, data: str = "data: a\n\n"):
+        self.__delay = delay
+        self.__data = data
+        self.__calls = 0
+        self.closed = [threading.Event(), threading.Event()]
+
+    def apply(self) -> ConnectionResult:
+        call = self.__calls
+        self.__calls += 1
+        if call == 0:
+            time.sleep(self.__delay)
+        return ConnectionResult(iter([self.__data.encode()]), self.closed[call].set)
+
+
+class DelayedReject(MockConnectionHandler):
+    def __init__(self, delay: float, error: Exception):
+        self.__delay = delay
+        self.__error = error
+
+    def apply(self) -> ConnectionResult:
+        time.sleep(self.__delay)
+        raise self.__error
+
+
+def test_slow_attempt_is_hedged_and_loser_is_closed():
+    handler = SlowFirstResponse(0.5)
+    strategy = ConnectStrategy.hedged(MockConnectStrategy(handler), hedge_delay=0.05)
+    start = time.monotonic()
+    with SSEClient(connect=strategy) as client:
+        client.start()
+        assert time.monotonic() - start < 0.4
+        assert next(iter(client.events)).data == 'a'
+    assert handler.closed[0].wait(2)
+
+
+def test_fast_attempt_is_not_hedged():
+    alternate = MockConnectStrategy(RespondWithData("data: b\n\n"))
+    strategy = ConnectStrategy.hedged(
+        MockConnectStrategy(RespondWithData("data: a\n\n")), hedge_delay=1, alternate=alternate
+    )
+    with SSEClient(connect=strategy) as client:
+        assert next(iter(client.events)).data == 'a'
+    assert alternate.last_event_ids == []
+
+
+def test_fast_failure_is_not_hedged():
+    alternate = MockConnectStrategy(RespondWithData("data: b\n\n"))
+    strategy = ConnectStrategy.hedged(
+        MockConnectStrategy(RejectConnection(HTTPStatusError(503))), hedge_delay=1, alternate=alternate
+    )
+    with SSEClient(connect=strategy) as client:
+        with pytest.raises(HTTPStatusError):
+            client.start()
+    assert alternate.last_event_ids == []
+
+
+def test_alternate_wins_when_slow_attempt_fails():
+    alternate = MockConnectStrategy(RespondWithData("data: b\n\n"))
+    strategy = ConnectStrategy.hedged(
+        MockConnectStrategy(DelayedReject(0.1, HTTPStatusError(503))),
+        hedge_delay=0.02,
+        alternate=alternate,
+    )
+    with SSEClient(connect=strategy, last_event_id='x') as client:
+        assert next(iter(client.events)).data == 'b'
+    assert alternate.last_event_ids == ['x']
+
+
+def test_error_from_first_attempt_is_raised_when_both_fail():
+    strategy = ConnectStrategy.hedged(
+        MockConnectStrategy(DelayedReject(0.1, HTTPStatusError(503))),
+        hedge_delay=0.02,
+        alternate=MockConnectStrategy(RejectConnection(HTTPStatusError(502))),
+    )
+    with SSEClient(connect=strategy) as client:
+        with pytest.raises(HTTPStatusError) as e:
+            client.start()
+    assert e.value.status == 503
+
+
+class TimedConnectStrategy(ConnectStrategy):
+    """Reports timings with ``total`` set to ``base`` plus the attempt's number, whether it succeeded or not."""
+
+    def __init__(self, inner: ConnectStrategy, base: int):
+        self.__inner = inner
+        self.__base = base
+
+    def create_client(self, logger: Logger) -> ConnectionClient:
+        return TimedConnectionClient(self.__inner.create_client(logger), self.__base)
+
+
+class TimedConnectionClient(ConnectionClient):
+    def __init__(self, inner: ConnectionClient, base: int):
+        self.__inner = inner
+        self.__timings: Optional[ConnectionTimings] = None
+        self.__attempts = base
+
+    def connect(self, last_event_id: Optional[str]) -> ConnectionResult:
+        self.__attempts += 1
+        self.__timings = ConnectionTimings(total=self.__attempts)
+        return self.__inner.connect(last_event_id)
+
+    @property
+    def last_connect_timings(self) -> Optional[ConnectionTimings]:
+        return self.__timings
+
+
+def test_failed_race_does_not_report_timings_of_previous_winner():
+    primary = TimedConnectStrategy(MockConnectStrategy(DelayedReject(0.1, HTTPStatusError(503))), 0)
+    alternate = TimedConnectStrategy(
+        MockConnectStrategy(RespondWithData("data: b\n\n"), RejectConnection(HTTPStatusError(502))), 100
+    )
+    strategy = ConnectStrategy.hedged(primary, hedge_delay=0.02, alternate=alternate)
+    items: List[Action] = []
+    with SSEClient(
+        connect=strategy, error_strategy=ErrorStrategy.always_continue(), retry_delay_strategy=no_delay()
+    ) as client:
+        for item in client.all:
+            items.append(item)
+            if isinstance(item, Fault) and item.error is not None:
+                break
+    start, fault = items[0], items[-1]
+    assert isinstance(start, Start) and start.timings.total == 101
+    assert isinstance(fault.error, HTTPStatusError) and fault.error.status == 503
+    assert fault.timings.total == 2
+
+
+class StaleAttemptClient(ConnectionClient):
+    """
+    Its first attempt succeeds only once ``release`` is set. Each attempt reports timings with
+    ``total`` set to its number, once it is over.
+    """
+
+    def __init__(self):
+        self.release = threading.Event()
+        self.first_attempt_over = threading.Event()
+        self.__attempts = 0
+        self.__timings: Optional[ConnectionTimings] = None
+
+    def connect(self, last_event_id: Optional[str]) -> ConnectionResult:
+        self.__attempts += 1
+        attempt = self.__attempts
+        if attempt == 1:
+            self.release.wait(5)
+        self.__timings = ConnectionTimings(total=attempt)
+        if attempt == 1:
+            self.first_attempt_over.set()
+        return ConnectionResult(iter([b"data: a\n\n"]), None)
+
+    @property
+    def last_connect_timings(self) -> Optional[ConnectionTimings]:
+        return self.__timings
+
+
+class FixedClientStrategy(ConnectStrategy):
+    def __init__(self, client: ConnectionClient):
+        self.__client = client
+
+    def create_client(self, logger: Logger) -> ConnectionClient:
+        return self.__client
+
+
+def test_stale_attempt_of_previous_race_does_not_overwrite_timings():
+    primary = StaleAttemptClient()
+    strategy = ConnectStrategy.hedged(
+        FixedClientStrategy(primary),
+        hedge_delay=0.02,
+        alternate=MockConnectStrategy(RespondWithData("data: b\n\n")),
+    )
+    client = strategy.create_client(Logger('test'))
+    client.connect(None)  # the alternate wins, while the first primary attempt is still waiting
+    client.connect(None)  # the second primary attempt wins at once
+    assert client.last_connect_timings.total == 2
+    primary.release.set()
+    assert primary.first_attempt_over.wait(2)
+    assert client.last_connect_timings.total == 2
+
+
+class AsyncHangingConnection(MockAsyncConnectionHandler):
+    def __init__(self):
+        self.cancelled = False
+
+    async def apply(self) -> AsyncConnectionResult:
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            self.cancelled = True
+            raise
+        raise AssertionError("should have been cancelled")
+
+
+@pytest.mark.asyncio
+async def test_async_slow_attempt_is_hedged_and_loser_is_cancelled():
+    hanging = AsyncHangingConnection()
+    strategy = AsyncConnectStrategy.hedged(
+        MockAsyncConnectStrategy(hanging),
+        hedge_delay=0.02,
+        alternate=MockAsyncConnectStrategy(AsyncRespondWithData("data: b\n\n")),
+    )
+    start = time.monotonic()
+    async with AsyncSSEClient(connect=strategy) as client:
+        async for event in client.events:
+            assert event.data == 'b'
+            break
+    assert time.monotonic() - start < 1
+    await asyncio.sleep(0)
+    assert hanging.cancelled
+
+
+@pytest.mark.asyncio
+async def test_async_fast_failure_is_not_hedged():
+    alternate = MockAsyncConnectStrategy(AsyncRespondWithData("data: b\n\n"))
+    strategy = AsyncConnectStrategy.hedged(
+        MockAsyncConnectStrategy(AsyncRejectConnection(HTTPStatusError(503))),
+        hedge_delay=1,
+        alternate=alternate,
+    )
+    async with AsyncSSEClient(connect=strategy) as client:
+        with pytest.raises(HTTPStatusError):
+            await client.start()
+    assert alternate.last_event_ids == []
@@ -271,3 +271,43 @@ def test_close_clears_pool_it_created():
 
     connection_pool.close.assert_called_once()
     created_pool.clear.assert_called_once()
+
+
+def test_http_connect_timings():
+    with start_server() as server:
+        with make_stream() as stream:
+            server.for_path('/', stream)
+            with ConnectStrategy.http(server.uri).create_client(logger()) as client:
+                assert client.last_connect_timings is None
+                with client.connect(None):
+                    timings = client.last_connect_timings
+                    assert timings.connect is not None
+                    assert timings.tls is None
+                    assert timings.time_to_first_byte is not None
+                    assert timings.total >= timings.connect + timings.time_to_first_byte
+
+
+def test_http_connect_timings_for_failed_attempt():
+    with start_server() as server:
+        server.for_path('/', BasicResponse(503))
+        with ConnectStrategy.http(server.uri).create_client(logger()) as client:
+            try:
+                client.connect(None)
+                raise Exception("expected exception, did not get one")
+            except HTTPStatusError:
+                pass
+            timings = client.last_connect_timings
+            assert timings.time_to_first_byte is not None
+            assert timings.total is not None
+
+
+def test_http_connect_timings_with_caller_supplied_pool():
+    with start_server() as server:
+        with make_stream() as stream:
+            server.for_path('/', stream)
+            with ConnectStrategy.http(server.uri, pool=PoolManager()).create_client(logger()) as client:
+                with client.connect(None):
+                    timings = client.last_connect_timings
+                    assert timings.connect is None
+                    assert timings.time_to_first_byte is None
+                    assert timings.total is not None
@@ -0,0 +1,146 @@
+import math
+import time
+
+import pytest
+
+from ld_eventsource import *
+from ld_eventsource.actions import *
+from ld_eventsource.async_client import AsyncSSEClient
+from ld_eventsource.config import *
+from ld_eventsource.metrics import Histogram, InMemoryMetricsSink, MetricsSink
+from ld_eventsource.testing.async_helpers import *
+from ld_eventsource.testing.helpers import *
+
+STREAM_DATA = ":hello\nid: 1\ndata: a\n\nid: 2\ndata: b\n\n"
+
+
+def test_stream_metrics():
+    metrics = InMemoryMetricsSink()
+    mock = MockConnectStrategy(RespondWithData(STREAM_DATA))
+    with SSEClient(connect=mock, metrics=metrics) as client:
+        assert [e.data for e in client.events] == ['a', 'b']
+
+    assert metrics.counter(MetricsSink.CONNECT_ATTEMPTS) == 1
+    assert metrics.counter(MetricsSink.CONNECTIONS) == 1
+    assert metrics.counter(MetricsSink.CONNECT_FAILURES) == 0
+    assert metrics.counter(MetricsSink.BYTES_RECEIVED) == len(STREAM_DATA)
+    assert metrics.counter(MetricsSink.EVENTS_RECEIVED) == 2
+    assert metrics.counter(MetricsSink.COMMENTS_RECEIVED) == 1
+    assert metrics.histogram(MetricsSink.PARSE_TIME).count == 3
+    assert metrics.histogram(MetricsSink.READ_TIME).count > 0
+    assert metrics.histogram(MetricsSink.CONNECTION_DURATION).count == 1
+    assert metrics.gauge_value(MetricsSink.CONNECTION_AGE) is not None
+    assert metrics.gauge_value(MetricsSink.NEXT_RETRY_DELAY) == client.next_retry_delay
+
+
+def test_reconnect_metrics():
+    metrics = InMemoryMetricsSink()
+    mock = MockConnectStrategy(
+        RejectConnection(HTTPStatusError(503)),
+        RespondWithData("data: a\n\n"),
+        RespondWithData("data: b\n\n"),
+    )
+    with SSEClient(
+        connect=mock,
+        error_strategy=ErrorStrategy.always_continue(),
+        initial_retry_delay=0.01,
+        retry_delay_strategy=RetryDelayStrategy.default(jitter_multiplier=None),
+        metrics=metrics,
+    ) as client:
+        events = client.events
+        assert next(events).data == 'a'
+        assert next(events).data == 'b'
+
+    assert metrics.counter(MetricsSink.CONNECT_ATTEMPTS) == 3
+    assert metrics.counter(MetricsSink.CONNECT_FAILURES) == 1
+    assert metrics.counter(MetricsSink.CONNECTIONS) == 2
+    sleeps = metrics.histogram(MetricsSink.RETRY_DELAY_TIME)
+    assert sleeps.count == 2
+    assert sleeps.total > 0
+    assert metrics.gauge_value(MetricsSink.NEXT_RETRY_DELAY) == client.next_retry_delay
+
+
+def test_partial_sink_only_receives_what_it_overrides():
+    class EventCounter(MetricsSink):
+        def __init__(self):
+            self.counts = {}
+
+        def increment(self, name, value=1):
+            self.counts[name] = self.counts.get(name, 0) + value
+
+    sink = EventCounter()
+    mock = MockConnectStrategy(RespondWithData(STREAM_DATA))
+    with SSEClient(connect=mock, metrics=sink) as client:
+        list(client.events)
+    assert sink.counts[MetricsSink.EVENTS_RECEIVED] == 2
+
+
+def test_histogram_summary():
+    h = Histogram()
+    assert h.count == 0
+    assert math.isnan(h.mean)
+    assert math.isnan(h.percentile(0.5))
+    for value in (0.001, 0.002, 0.003, 0.1):
+        h._add(value)
+    assert h.count == 4
+    assert h.min == 0.001
+    assert h.max == 0.1
+    assert h.mean == pytest.approx(0.0265)
+    assert 0.002 <= h.percentile(0.5) <= 0.004
+    assert h.percentile(1) == 0.1
+
+
+@pytest.mark.asyncio
+async def test_async_stream_metrics():
+    metrics = InMemoryMetricsSink()
+    mock = MockAsyncConnectStrategy(AsyncRespondWithData(STREAM_DATA))
+    async with AsyncSSEClient(connect=mock, metrics=metrics) as client:
+        assert [e.data async for e in client.events] == ['a', 'b']
+
+    assert metrics.counter(MetricsSink.CONNECTIONS) == 1
+    assert metrics.counter(MetricsSink.BYTES_RECEIVED) == len(STREAM_DATA)
+    assert metrics.counter(MetricsSink.EVENTS_RECEIVED) == 2
+    assert metrics.counter(MetricsSink.COMMENTS_RECEIVED) == 1
+    assert metrics.histogram(MetricsSink.PARSE_TIME).count == 3
+    assert metrics.histogram(MetricsSink.CONNECTION_DURATION).count == 1
+    assert metrics.gauge_value(MetricsSink.NEXT_RETRY_DELAY) == client.next_retry_delay
+
+
+def test_event_latency_from_server_timestamp():
+    sent = time.time() - 5
+    metrics = InMemoryMetricsSink()
+    mock = MockConnectStrategy(RespondWithData("data: %f\n\ndata: no timestamp\n\n" % sent))
+
+    def server_timestamp(event):
+        try:
+            return float(event.data)
+        except ValueError:
+            return None
+
+    with SSEClient(connect=mock, metrics=metrics, server_timestamp=server_timestamp) as client:
+        events = list(client.events)
+    assert all(e.received_at is not None for e in events)
+    latency = metrics.histogram(MetricsSink.EVENT_LATENCY)
+    assert latency.count == 1
+    assert 5 <= latency.max < 6
+
+
+def test_receive_timestamps_without_metrics():
+    mock = MockConnectStrategy(RespondWithData("data: a\n\n"))
+    with SSEClient(connect=mock, receive_timestamps=True) as client:
+        before = time.monotonic()
+        event = next(iter(client.events))
+        assert before <= event.received_at <= time.monotonic()
+
+
+@pytest.mark.asyncio
+async def test_async_event_latency_from_server_timestamp():
+    sent = time.time() - 5
+    metrics = InMemoryMetricsSink()
+    mock = MockAsyncConnectStrategy(AsyncRespondWithData("data: %f\n\n" % sent))
+    async with AsyncSSEClient(
+        connect=mock, metrics=metrics, server_timestamp=lambda e: float(e.data)
+    ) as client:
+        events = [e async for e in client.events]
+    assert events[0].received_at is not None
+    assert 5 <= metrics.histogram(MetricsSink.EVENT_LATENCY).max < 6
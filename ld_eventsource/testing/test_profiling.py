@@ -0,0 +1,104 @@
+import time
+from typing import Set, Tuple
+
+import pytest
+
+from ld_eventsource import *
+from ld_eventsource.async_client import AsyncSSEClient
+from ld_eventsource.metrics import InMemoryMetricsSink, MetricsSink
+from ld_eventsource.profiling import StageProfiler
+from ld_eventsource.testing.async_helpers import *
+from ld_eventsource.testing.helpers import *
+
+STREAM_DATA = ":hello\nid: 1\ndata: a\n\nid: 2\ndata: b\n\n"
+
+
+def test_stage_counts_and_slow_consumer():
+    profiler = StageProfiler()
+    mock = MockConnectStrategy(RespondWithData(STREAM_DATA))
+    with SSEClient(connect=mock, profiler=profiler) as client:
+        for _ in client.all:
+            if profiler.current_stage == StageProfiler.CONSUMER:
+                time.sleep(0.01)
+    assert profiler.current_stage is None
+
+    assert len(profiler.connections) == 1
+    totals = profiler.totals()
+    assert totals[StageProfiler.BUILD].count == 2
+    assert totals[StageProfiler.CONSUMER].count == 3  # two events and a comment
+    assert totals[StageProfiler.SPLIT].count == 8  # seven lines, then the end of the stream
+    assert totals[StageProfiler.READ].count >= 2
+    # The consumer slept while the client was only reading from memory.
+    assert totals[StageProfiler.CONSUMER].wall >= 0.03
+    assert totals[StageProfiler.CONSUMER].wall > 10 * totals[StageProfiler.PARSE].wall
+    assert totals[StageProfiler.CONSUMER].cpu < totals[StageProfiler.CONSUMER].wall
+
+
+class StageRecordingSink(InMemoryMetricsSink):
+    """Records which stage of a profiler was running each time a metric was reported while reading."""
+
+    def __init__(self, profiler: StageProfiler):
+        super().__init__()
+        self.profiler = profiler
+        self.stages: Set[Tuple[str, str]] = set()
+
+    def increment(self, name: str, value: float = 1):
+        if self.profiler.current_stage is not None:
+            self.stages.add((name, self.profiler.current_stage))
+        super().increment(name, value)
+
+
+def test_client_bookkeeping_is_charged_to_the_stage_it_belongs_to():
+    profiler = StageProfiler()
+    sink = StageRecordingSink(profiler)
+    mock = MockConnectStrategy(RespondWithData(STREAM_DATA))
+    with SSEClient(connect=mock, profiler=profiler, metrics=sink, wire_tap_size=16) as client:
+        list(client.all)
+    assert sink.stages == {
+        (MetricsSink.BYTES_RECEIVED, StageProfiler.READ),
+        (MetricsSink.EVENTS_RECEIVED, StageProfiler.PARSE),
+        (MetricsSink.COMMENTS_RECEIVED, StageProfiler.PARSE),
+    }
+
+
+def test_keeps_most_recent_connections():
+    profiler = StageProfiler(max_connections=2)
+    mock = MockConnectStrategy(RespondWithData("data: a\n\n"))
+    with SSEClient(
+        connect=mock,
+        error_strategy=ErrorStrategy.always_continue(),
+        retry_delay_strategy=no_delay(),
+        profiler=profiler,
+    ) as client:
+        events = client.events
+        for _ in range(3):
+            next(events)
+    connections = profiler.connections
+    assert len(connections) == 2
+    assert connections[0].started <= connections[1].started
+    profiler.reset()
+    assert profiler.connections == []
+
+
+def test_report():
+    profiler = StageProfiler()
+    mock = MockConnectStrategy(RespondWithData(STREAM_DATA))
+    with SSEClient(connect=mock, profiler=profiler) as client:
+        list(client.events)
+    report = profiler.report()
+    for stage in StageProfiler.STAGES:
+        assert stage in report
+    assert report.endswith('1 connection(s)')
+
+
+@pytest.mark.asyncio
+async def test_async_stage_counts():
+    profiler = StageProfiler()
+    mock = MockAsyncConnectStrategy(AsyncRespondWithData(STREAM_DATA))
+    async with AsyncSSEClient(connect=mock, profiler=profiler) as client:
+        assert [e.data async for e in client.events] == ['a', 'b']
+    totals = profiler.totals()
+    assert totals[StageProfiler.BUILD].count == 2
+    assert totals[StageProfiler.CONSUMER].count == 3
+    assert totals[StageProfiler.SPLIT].count == 8
+    assert profiler.current_stage is None
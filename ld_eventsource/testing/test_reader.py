@@ -1,7 +1,8 @@
 import pytest
 
 from ld_eventsource.actions import Comment, Event
-from ld_eventsource.reader import _BufferedLineReader, _SSEReader
+from ld_eventsource.reader import (_BufferedLineReader, _ChunkTimestamps,
+                                   _SSEReader, _WireTap)
 
 
 class TestBufferedLineReader:
@@ -36,6 +37,10 @@ class TestBufferedLineReader:
             list(_BufferedLineReader.lines_from(inputs_outputs[0])) == inputs_outputs[1]
         )
 
+    def test_parsing_memoryviews(self, inputs_outputs):
+        chunks = [memoryview(chunk) for chunk in inputs_outputs[0]]
+        assert list(_BufferedLineReader.lines_from(chunks)) == inputs_outputs[1]
+
     def test_mixed_terminators(self):
         chunks = [
             b"first line\nsecond line\r\nthird line\r",
@@ -126,3 +131,43 @@ class TestSSEReader:
         ]
         output = list(_SSEReader(lines, last_event_id="a").events_and_comments())
         assert output == expected
+
+    def test_events_have_no_receive_time_by_default(self):
+        output = list(_SSEReader(["data: a", ""]).events_and_comments())
+        assert output[0].received_at is None
+
+    def test_events_are_stamped_with_receive_time_of_completing_chunk(self):
+        timestamps = _ChunkTimestamps()
+        chunks = [b"data: a\n\ndata: b\n\ndata: ", b"c\n", b"\n"]
+        lines = _BufferedLineReader.lines_from(timestamps.chunks(chunks))
+        output = list(_SSEReader(lines, timestamps=timestamps).events_and_comments())
+        assert [e.data for e in output] == ["a", "b", "c"]
+        assert output[0].received_at == output[1].received_at
+        assert output[2].received_at > output[1].received_at
+        assert output[0] == Event("message", "a")  # the timestamp is not part of equality
+
+
+class TestWireTap:
+    def test_keeps_everything_until_full(self):
+        tap = _WireTap(10)
+        assert tap.snapshot() == b""
+        assert list(tap.chunks([b"abc", b"", b"def"])) == [b"abc", b"", b"def"]
+        assert tap.snapshot() == b"abcdef"
+
+    @pytest.mark.parametrize("chunks", [
+        [b"abcdefgh", b"ijklm"],
+        [b"abc", b"defg", b"hijklm"],
+        [b"abcdefghijklm"],
+        [b"abcd", memoryview(b"efghijklm")],
+    ])
+    def test_keeps_most_recent_bytes_when_wrapping(self, chunks):
+        tap = _WireTap(10)
+        list(tap.chunks(chunks))
+        assert tap.snapshot() == b"defghijklm"
+
+    def test_reset_discards_previous_connection(self):
+        tap = _WireTap(4)
+        list(tap.chunks([b"abcdef"]))
+        tap.reset()
+        list(tap.chunks([b"xy"]))
+        assert tap.snapshot() == b"xy"
@@ -0,0 +1,134 @@
+import asyncio
+import time
+
+import pytest
+
+from ld_eventsource import *
+from ld_eventsource.actions import *
+from ld_eventsource.async_client import AsyncSSEClient
+from ld_eventsource.async_redundant import AsyncRedundantSSEClient
+from ld_eventsource.config import *
+from ld_eventsource.errors import *
+from ld_eventsource.redundant import (PathStats, RedundantSSEClient,
+                                      _MergeWindow)
+from ld_eventsource.testing.async_helpers import *
+from ld_eventsource.testing.helpers import *
+
+
+def numbered_stream(ids, delay=0.0):
+    for id in ids:
+        if delay:
+            time.sleep(delay)
+        yield ("id: %s\ndata: %s\n\n" % (id, id)).encode()
+
+
+async def async_numbered_stream(ids, delay=0.0):
+    for id in ids:
+        if delay:
+            await asyncio.sleep(delay)
+        yield ("id: %s\ndata: %s\n\n" % (id, id)).encode()
+
+
+def path(*handlers) -> SSEClient:
+    return SSEClient(connect=MockConnectStrategy(*handlers), error_strategy=ErrorStrategy.always_fail())
+
+
+def test_merge_window_keeps_first_copy_and_records_lead():
+    stats = [PathStats(), PathStats()]
+    window = _MergeWindow(stats, 2)
+    assert window.arrive(0, Event(id='1'), 10.0)
+    assert not window.arrive(1, Event(id='1'), 10.5)
+    assert not window.arrive(0, Event(id='1'), 11.0)
+    assert window.arrive(1, Event(id='2'), 12.0)
+    assert not window.arrive(0, Event(id='2'), 12.25)
+    assert (stats[0].wins, stats[0].losses, stats[0].mean_lead, stats[0].max_lead) == (1, 1, 0.5, 0.5)
+    assert (stats[1].wins, stats[1].losses, stats[1].mean_lead, stats[1].max_lead) == (1, 1, 0.25, 0.25)
+
+
+def test_merge_window_forgets_oldest_ids():
+    stats = [PathStats(), PathStats()]
+    window = _MergeWindow(stats, 2)
+    for id in ['1', '2', '3']:
+        assert window.arrive(0, Event(id=id), 0)
+    assert window.arrive(1, Event(id='1'), 0)
+    assert not window.arrive(1, Event(id='3'), 0)
+
+
+def test_events_without_ids_are_delivered_from_every_path():
+    stats = [PathStats(), PathStats()]
+    window = _MergeWindow(stats, 10)
+    assert window.arrive(0, Event(data='a'), 0)
+    assert window.arrive(1, Event(data='a'), 0)
+    assert stats[1].mean_lead is None
+
+
+def test_delivers_each_event_once_from_fastest_path():
+    fast = path(RespondWithStream(numbered_stream(['1', '2', '3'])))
+    slow = path(RespondWithStream(numbered_stream(['1', '2', '3'], delay=0.02)))
+    with RedundantSSEClient([slow, fast]) as client:
+        events = list(client.events)
+        stats = client.path_stats
+    assert [e.id for e in events] == ['1', '2', '3']
+    assert client.last_event_id == '3'
+    assert (stats[1].wins, stats[1].losses) == (3, 0)
+    assert (stats[0].wins, stats[0].losses) == (0, 3)
+    assert stats[1].max_lead > 0
+
+
+def test_each_path_recovers_with_its_own_retries():
+    flaky = SSEClient(
+        connect=MockConnectStrategy(
+            RejectConnection(HTTPStatusError(503)),
+            RespondWithStream(numbered_stream(['1', '2'])),
+            ExpectNoMoreRequests(),
+        ),
+        error_strategy=ErrorStrategy.from_lambda(
+            lambda e: (ErrorStrategy.CONTINUE if e is not None else ErrorStrategy.FAIL, None)
+        ),
+        retry_delay_strategy=no_delay(),
+    )
+    steady = path(RespondWithStream(numbered_stream(['1', '2', '3'], delay=0.02)))
+    with RedundantSSEClient([flaky, steady]) as client:
+        assert [e.id for e in client.events] == ['1', '2', '3']
+
+
+def test_error_is_raised_after_other_paths_end():
+    failed = path(RejectConnection(HTTPStatusError(503)))
+    working = path(RespondWithStream(numbered_stream(['1', '2'])))
+    with RedundantSSEClient([failed, working]) as client:
+        events = client.events
+        assert next(events).id == '1'
+        assert next(events).id == '2'
+        with pytest.raises(HTTPStatusError):
+            next(events)
+
+
+def test_close_stops_reading_paths():
+    endless = MockConnectStrategy(RespondWithStream(numbered_stream(range(1000), delay=0.01)))
+    with RedundantSSEClient([endless, endless]) as client:
+        assert next(iter(client.events)).id == '0'
+    connections = len(endless.last_event_ids)
+    time.sleep(0.05)
+    assert len(endless.last_event_ids) == connections
+
+
+def test_requires_a_path():
+    with pytest.raises(ValueError):
+        RedundantSSEClient([])
+
+
+@pytest.mark.asyncio
+async def test_async_delivers_each_event_once_from_fastest_path():
+    def path(stream):
+        return AsyncSSEClient(
+            connect=MockAsyncConnectStrategy(AsyncRespondWithStream(stream)),
+            error_strategy=ErrorStrategy.always_fail(),
+        )
+
+    fast = path(async_numbered_stream(['1', '2', '3']))
+    slow = path(async_numbered_stream(['1', '2', '3'], delay=0.02))
+    async with AsyncRedundantSSEClient([slow, fast]) as client:
+        events = [event async for event in client.events]
+        stats = client.path_stats
+    assert [e.id for e in events] == ['1', '2', '3']
+    assert (stats[1].wins, stats[0].losses) == (3, 3)
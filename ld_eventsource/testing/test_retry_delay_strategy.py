@@ -1,6 +1,9 @@
+import time
+from email.utils import formatdate
 from typing import Optional, Tuple
 
 from ld_eventsource.config import *
+from ld_eventsource.errors import HTTPStatusError
 
 
 def test_backoff_with_no_jitter_and_no_max():
@@ -81,6 +84,62 @@ def zero_base_delay_always_produces_zero():
         r = r
 
 
+def overloaded(retry_after: str) -> HTTPStatusError:
+    return HTTPStatusError(503, {'Retry-After': retry_after})
+
+
+def test_retry_after_seconds():
+    strategy = RetryDelayStrategy.retry_after(jitter_multiplier=0)
+    delay, _ = strategy.apply_for_error(1, overloaded('120'))
+    assert delay == 120
+
+
+def test_retry_after_http_date():
+    strategy = RetryDelayStrategy.retry_after(jitter_multiplier=0)
+    delay, _ = strategy.apply_for_error(1, overloaded(formatdate(time.time() + 60, usegmt=True)))
+    assert 58 <= delay <= 60
+    delay, _ = strategy.apply_for_error(1, overloaded('Wed, 21 Oct 2015 07:28:00 GMT'))
+    assert delay == 0
+
+
+def test_retry_after_is_capped_and_jittered_upward():
+    strategy = RetryDelayStrategy.retry_after(max_delay=10, jitter_multiplier=0.5)
+    delays = set()
+    for i in range(20):
+        delay, strategy = strategy.apply_for_error(1, overloaded('3600'))
+        assert 10 <= delay <= 15
+        delays.add(delay)
+    assert len(delays) > 1
+
+
+def test_retry_after_jitter_is_reproducible_from_seed():
+    def delays(seed):
+        strategy = RetryDelayStrategy.retry_after(jitter_multiplier=0.5, seed=seed)
+        result = []
+        for _ in range(5):
+            delay, strategy = strategy.apply_for_error(1, overloaded('10'))
+            result.append(delay)
+        return result
+
+    assert delays(1) == delays(1)
+    assert delays(1) != delays(2)
+    assert len(set(delays(1))) == 5
+
+
+def test_retry_after_uses_fallback_without_header():
+    fallback = RetryDelayStrategy.default(backoff_multiplier=2, jitter_multiplier=None)
+    strategy = RetryDelayStrategy.retry_after(fallback, jitter_multiplier=0)
+
+    delay, strategy = strategy.apply_for_error(1, HTTPStatusError(503))
+    assert delay == 1
+    delay, strategy = strategy.apply_for_error(1, overloaded('30'))
+    assert delay == 30
+    delay, strategy = strategy.apply_for_error(1, overloaded('soon'))
+    assert delay == 2
+    delay, strategy = strategy.apply(1)
+    assert delay == 4
+
+
 def verify_jitter(
     strategy: RetryDelayStrategy, base: float, base_with_backoff: float, jitter: float
 ) -> Tuple[float, Optional[RetryDelayStrategy]]:
@@ -100,3 +159,33 @@ def verify_jitter(
     assert at_least_one_was_different
     assert last_result is not None
     return last_result
+
+
+def test_full_jitter_stays_below_ceiling():
+    strategy = RetryDelayStrategy.full_jitter(max_delay=10, backoff_multiplier=2, seed=1)
+    delays = []
+    for ceiling in (1, 2, 4, 8, 10, 10):
+        delay, strategy = strategy.apply(1)
+        assert 0 <= delay < ceiling
+        delays.append(delay)
+    assert len(set(delays)) == len(delays)
+
+
+def test_decorrelated_jitter_stays_between_base_and_three_times_previous():
+    strategy = RetryDelayStrategy.decorrelated_jitter(max_delay=100, seed=1)
+    previous = 2
+    for i in range(20):
+        delay, strategy = strategy.apply(2)
+        assert 2 <= delay <= min(previous * 3, 100)
+        previous = delay
+
+
+def test_jitter_strategies_are_reproducible_by_seed_and_immutable():
+    for make in (RetryDelayStrategy.full_jitter, RetryDelayStrategy.decorrelated_jitter):
+        first = make(seed=42)
+        a, next_a = first.apply(1)
+        b, _ = make(seed=42).apply(1)
+        c, _ = make(seed=43).apply(1)
+        assert a == b != c
+        assert first.apply(1)[0] == a
+        assert next_a.apply(1)[0] != a
@@ -0,0 +1,195 @@
+import asyncio
+import logging
+import time
+from typing import List, Optional
+
+import pytest
+
+from ld_eventsource import *
+from ld_eventsource.actions import *
+from ld_eventsource.async_client import AsyncSSEClient
+from ld_eventsource.config import *
+from ld_eventsource.config.async_connect_strategy import (
+    AsyncConnectionClient, AsyncConnectionResult, AsyncConnectStrategy)
+from ld_eventsource.config.rotation import _event_blocks, _RecentIds
+
+
+class EventLog:
+    """
+    A server that publishes ``count`` numbered events, one every ``interval`` seconds of a virtual
+    clock. The tests move the clock forward as they read the events.
+    """
+
+    POLL_INTERVAL = 0.001
+
+    def __init__(self, count: int, interval: float, fail_connections: List[int] = []):
+        self.count = count
+        self.interval = interval
+        self.fail_connections = fail_connections
+        self.last_event_ids: List[Optional[str]] = []
+        self.clock = VirtualClock()
+
+    def connect(self) -> int:
+        self.last_event_ids.append(None)
+        if len(self.last_event_ids) in self.fail_connections:
+            raise ConnectionRefusedError()
+        return len(self.last_event_ids)
+
+    def available(self) -> int:
+        return min(self.count, int(self.clock.now() / self.interval) + 1)
+
+    @staticmethod
+    def event(n: int) -> bytes:
+        return ("id: %d\ndata: %d\n\n" % (n, n)).encode()
+
+
+class EventLogConnectStrategy(ConnectStrategy):
+    def __init__(self, log: EventLog):
+        self.__log = log
+
+    def create_client(self, logger: logging.Logger) -> ConnectionClient:
+        return EventLogConnectionClient(self.__log)
+
+
+class EventLogConnectionClient(ConnectionClient):
+    def __init__(self, log: EventLog):
+        self.__log = log
+
+    def connect(self, last_event_id: Optional[str]) -> ConnectionResult:
+        log = self.__log
+        log.connect()
+        log.last_event_ids[-1] = last_event_id
+        closed = False
+
+        def stream():
+            n = 0 if last_event_id is None else int(last_event_id)
+            while n < log.count and not closed:
+                if n < log.available():
+                    n += 1
+                    yield EventLog.event(n)
+                else:
+                    time.sleep(EventLog.POLL_INTERVAL)
+
+        def close():
+            nonlocal closed
+            closed = True
+
+        return ConnectionResult(stream(), close)
+
+
+class AsyncEventLogConnectStrategy(AsyncConnectStrategy):
+    def __init__(self, log: EventLog):
+        self.__log = log
+
+    def create_client(self, logger: logging.Logger) -> AsyncConnectionClient:
+        return AsyncEventLogConnectionClient(self.__log)
+
+
+class AsyncEventLogConnectionClient(AsyncConnectionClient):
+    def __init__(self, log: EventLog):
+        self.__log = log
+
+    async def connect(self, last_event_id: Optional[str]) -> AsyncConnectionResult:
+        log = self.__log
+        log.connect()
+        log.last_event_ids[-1] = last_event_id
+
+        async def stream():
+            n = 0 if last_event_id is None else int(last_event_id)
+            while n < log.count:
+                if n < log.available():
+                    n += 1
+                    yield EventLog.event(n)
+                else:
+                    await asyncio.sleep(EventLog.POLL_INTERVAL)
+
+        return AsyncConnectionResult(stream(), None)
+
+
+def read_all(client: SSEClient, log: EventLog) -> List[Action]:
+    items = []
+    for item in client.all:
+        items.append(item)
+        if isinstance(item, Fault):
+            return items
+        if isinstance(item, Event):
+            log.clock.advance(log.interval)
+    return items
+
+
+def test_event_blocks_keep_events_whole_and_find_ids():
+    lines = [':hi', 'id: 1', 'data: a', '', 'retry: 10', 'data: b', '', '', 'id:2', 'data: c', '']
+    assert list(_event_blocks(lines)) == [
+        (b':hi\n', None),
+        (b'id: 1\ndata: a\n\n', '1'),
+        (b'retry: 10\ndata: b\n\n', None),
+        (b'id:2\ndata: c\n\n', '2'),
+    ]
+
+
+def test_recent_ids_forget_oldest():
+    recent = _RecentIds(2)
+    assert recent.add('1') and recent.add('2') and recent.add('3')
+    assert not recent.add('3')
+    assert recent.add('1')
+    assert recent.add(None) and recent.add(None)
+    assert recent.last == '1'
+
+
+def test_rotates_without_gaps_or_duplicates():
+    log = EventLog(count=40, interval=0.25)
+    strategy = ConnectStrategy.rotating(
+        EventLogConnectStrategy(log), max_connection_age=2.5, clock=log.clock
+    )
+    with SSEClient(connect=strategy) as client:
+        items = read_all(client, log)
+    events = [item for item in items if isinstance(item, Event)]
+    assert [e.data for e in events] == [str(n) for n in range(1, 41)]
+    assert len([item for item in items if isinstance(item, Start)]) == 1
+    assert len(log.last_event_ids) >= 3
+    assert log.last_event_ids[0] is None
+    assert all(id is not None for id in log.last_event_ids[1:])
+
+
+def test_failed_rotation_keeps_old_connection():
+    log = EventLog(count=20, interval=0.25, fail_connections=[2])
+    strategy = ConnectStrategy.rotating(
+        EventLogConnectStrategy(log), max_connection_age=1.25, clock=log.clock
+    )
+    with SSEClient(connect=strategy) as client:
+        items = read_all(client, log)
+    events = [item for item in items if isinstance(item, Event)]
+    assert [e.data for e in events] == [str(n) for n in range(1, 21)]
+    assert len(log.last_event_ids) >= 3
+
+
+def test_close_stops_rotating_stream():
+    log = EventLog(count=1000, interval=0.25)
+    strategy = ConnectStrategy.rotating(
+        EventLogConnectStrategy(log), max_connection_age=1.25, clock=log.clock
+    )
+    with SSEClient(connect=strategy) as client:
+        events = client.events
+        assert next(events).data == '1'
+    connections = len(log.last_event_ids)
+    time.sleep(0.1)
+    assert len(log.last_event_ids) == connections
+
+
+@pytest.mark.asyncio
+async def test_async_rotates_without_gaps_or_duplicates():
+    log = EventLog(count=40, interval=0.25)
+    strategy = AsyncConnectStrategy.rotating(
+        AsyncEventLogConnectStrategy(log), max_connection_age=2.5, clock=log.clock
+    )
+    items = []
+    async with AsyncSSEClient(connect=strategy) as client:
+        async for item in client.all:
+            items.append(item)
+            if isinstance(item, Fault):
+                break
+            if isinstance(item, Event):
+                log.clock.advance(log.interval)
+    events = [item for item in items if isinstance(item, Event)]
+    assert [e.data for e in events] == [str(n) for n in range(1, 41)]
+    assert len(log.last_event_ids) >= 3
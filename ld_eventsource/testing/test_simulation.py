@@ -0,0 +1,54 @@
+from ld_eventsource.config import *
+from ld_eventsource.simulation import simulate_reconnects
+
+
+def run_outage(strategy):
+    return simulate_reconnects(
+        strategy, clients=1000, outages=[(10, 20)], capacity=100, max_time=600
+    )
+
+
+def test_synchronized_clients_reconnect_in_waves():
+    result = run_outage(lambda i: RetryDelayStrategy.default(max_delay=30))
+    assert result.peak_attempts_per_second == 1000
+    busy_seconds = [s for s in range(20, 600) if result.attempts_per_second[s]]
+    assert len(busy_seconds) == 10
+
+
+def test_full_jitter_recovers_faster_than_synchronized_clients():
+    default = run_outage(lambda i: RetryDelayStrategy.default(max_delay=30))
+    full = run_outage(lambda i: RetryDelayStrategy.full_jitter(max_delay=30, seed=i))
+    assert full.time_to_recovery is not None
+    assert default.time_to_recovery is None or full.time_to_recovery < default.time_to_recovery
+    assert full.failed_attempts < default.failed_attempts
+    assert full.total_attempts == full.failed_attempts + 1000
+
+
+def test_server_hint_reduces_failed_attempts_when_overloaded():
+    def run(strategy):
+        return simulate_reconnects(
+            strategy, clients=1000, outages=[(10, 11)], capacity=50, retry_after=20, max_time=600
+        )
+
+    plain = run(lambda i: RetryDelayStrategy.decorrelated_jitter(max_delay=5, seed=i))
+    hinted = run(lambda i: RetryDelayStrategy.retry_after(
+        RetryDelayStrategy.decorrelated_jitter(max_delay=5, seed=i), jitter_multiplier=1
+    ))
+    assert hinted.time_to_recovery is not None
+    assert hinted.failed_attempts * 2 < plain.failed_attempts
+
+
+def test_strategy_resets_after_long_connection():
+    # Two outages far apart: a client that was connected for longer than the threshold starts
+    # its backoff over, so it is back as quickly after the second outage as after the first.
+    result = simulate_reconnects(
+        lambda i: RetryDelayStrategy.default(),
+        clients=1,
+        outages=[(0, 100), (1000, 1100)],
+        retry_delay_reset_threshold=60,
+        initial_retry_delay=1,
+        max_time=2000,
+    )
+    first = [s for s in range(0, 200) if result.attempts_per_second[s]]
+    second = [s - 1000 for s in range(1000, 1200) if result.attempts_per_second[s]]
+    assert first == second
@@ -1,3 +1,4 @@
+from random import Random
 from time import sleep
 
 from ld_eventsource import *
@@ -117,13 +118,13 @@ def test_retry_delay_gets_reset_after_threshold():
         retry_delay_reset_threshold=retry_delay_reset_threshold,
         retry_delay_strategy=RetryDelayStrategy.default(jitter_multiplier=None),
     ) as client:
-        assert client._retry_reset_baseline == 0
+        assert client._retry_reset_baseline is None
         all = client.all
 
         # Establish a successful connection
         item1 = next(all)
         assert isinstance(item1, Start)
-        assert client._retry_reset_baseline != 0
+        assert client._retry_reset_baseline is not None
 
         item2 = next(all)
         assert isinstance(item2, Event)
@@ -227,3 +228,159 @@ def test_can_interrupt_and_restart_stream():
         item5 = next(all)
         assert isinstance(item5, Event)
         assert item5.data == 'data3'
+
+
+def test_start_and_fault_report_timings_and_downtime():
+    mock = MockConnectStrategy(
+        RespondWithData("data: data1\n\n"),
+        RejectConnection(HTTPStatusError(503)),
+        RespondWithData("data: data2\n\n"),
+    )
+    with SSEClient(
+        connect=mock,
+        error_strategy=ErrorStrategy.always_continue(),
+        initial_retry_delay=0.01,
+        retry_delay_strategy=RetryDelayStrategy.default(jitter_multiplier=None),
+    ) as client:
+        all = client.all
+
+        start1 = next(all)
+        assert isinstance(start1, Start)
+        assert start1.downtime is None
+        assert start1.timings.total is not None
+        assert next(all) == Event(data='data1')
+
+        end = next(all)
+        assert isinstance(end, Fault)
+        assert end.timings is None  # the stream ended, rather than a connection attempt failing
+
+        failed = next(all)
+        assert isinstance(failed, Fault)
+        assert isinstance(failed.error, HTTPStatusError)
+        assert failed.timings.total is not None
+
+        start2 = next(all)
+        assert isinstance(start2, Start)
+        # the downtime spans both retry delays and the failed attempt in between
+        assert start2.downtime >= 0.025
+
+
+def test_fault_and_client_have_recent_bytes():
+    data = b"data: a\n\nid: 1\ndata: b\n\n"
+    mock = MockConnectStrategy(
+        RespondWithData(data.decode()),
+        RespondWithData("data: c\n\n"),
+    )
+    with SSEClient(
+        connect=mock,
+        error_strategy=ErrorStrategy.always_continue(),
+        initial_retry_delay=0,
+        wire_tap_size=12,
+    ) as client:
+        all = client.all
+        assert isinstance(next(all), Start)
+        assert next(all).data == 'a'
+        assert client.recent_bytes == data[-12:]
+        assert next(all).data == 'b'
+        fault = next(all)
+        assert isinstance(fault, Fault)
+        assert fault.recent_bytes == data[-12:]
+        assert isinstance(next(all), Start)
+        assert next(all).data == 'c'
+        assert client.recent_bytes == b'data: c\n\n'
+
+
+def test_recent_bytes_are_not_kept_by_default():
+    with SSEClient(connect=MockConnectStrategy(RespondWithData("data: a\n\n"))) as client:
+        all = client.all
+        next(all)
+        assert next(all).data == 'a'
+        assert client.recent_bytes is None
+        assert next(all).recent_bytes is None
+
+
+def delay_after_stream(data, **kwargs):
+    # Reads one stream to the end and returns the delay the client would wait before reconnecting.
+    with SSEClient(
+        connect=MockConnectStrategy(RespondWithData(data)),
+        error_strategy=ErrorStrategy.always_continue(),
+        **kwargs
+    ) as client:
+        for item in client.all:
+            if isinstance(item, Fault):
+                return client.next_retry_delay
+
+
+def test_server_retry_field_sets_base_delay():
+    no_jitter = RetryDelayStrategy.default(jitter_multiplier=None)
+    assert delay_after_stream("data: a\n\n", retry_delay_strategy=no_jitter) == 1
+    assert delay_after_stream("retry: 5000\ndata: a\n\n", retry_delay_strategy=no_jitter) == 5
+    assert delay_after_stream("retry: nonsense\n\n", retry_delay_strategy=no_jitter) == 1
+
+
+def test_server_retry_field_is_clamped():
+    no_jitter = RetryDelayStrategy.default(jitter_multiplier=None)
+    assert delay_after_stream(
+        "retry: 0\n\n", retry_delay_strategy=no_jitter, min_server_retry_delay=0.5
+    ) == 0.5
+    assert delay_after_stream(
+        "retry: 3600000\n\n", retry_delay_strategy=no_jitter, max_server_retry_delay=60
+    ) == 60
+
+
+def test_server_retry_field_restarts_backoff():
+    mock = MockConnectStrategy(
+        RespondWithData("data: a\n\n"),
+        RespondWithData("retry: 20\n\n"),
+    )
+    with SSEClient(
+        connect=mock,
+        error_strategy=ErrorStrategy.always_continue(),
+        initial_retry_delay=0.01,
+        retry_delay_strategy=RetryDelayStrategy.default(jitter_multiplier=None),
+    ) as client:
+        faults = (item for item in client.all if isinstance(item, Fault))
+        next(faults)
+        assert client.next_retry_delay == 0.01
+        next(faults)
+        assert client.next_retry_delay == 0.02
+
+
+def test_server_retry_field_spreads_out_reconnect_storm():
+    # Simulates a fleet of clients that all lose their connections at the same moment, as in a
+    # deploy, and compares the peak number of reconnections in any one second with and without
+    # the server asking for a longer delay.
+    fleet_size = 200
+    random = Random(0)
+    jitter = RetryDelayStrategy.from_lambda(lambda base: (base - random.random() * base / 2, None))
+
+    def peak_reconnects_per_second(data):
+        buckets = {}
+        for _ in range(fleet_size):
+            delay = delay_after_stream(data, retry_delay_strategy=jitter)
+            buckets[int(delay)] = buckets.get(int(delay), 0) + 1
+        return max(buckets.values())
+
+    without_retry = peak_reconnects_per_second("data: a\n\n")
+    with_retry = peak_reconnects_per_second("retry: 60000\ndata: a\n\n")
+    assert without_retry == fleet_size  # every client reconnects within the first second
+    assert with_retry * 10 <= without_retry
+
+
+def test_overload_strategies_wait_as_long_as_server_asks():
+    mock = MockConnectStrategy(
+        RejectConnection(HTTPStatusError(429, {'Retry-After': '120'})),
+        RespondWithData("data: a\n\n"),
+    )
+    with SSEClient(
+        connect=mock,
+        error_strategy=ErrorStrategy.continue_on_overload(),
+        retry_delay_strategy=RetryDelayStrategy.retry_after(max_delay=0.01, jitter_multiplier=0),
+    ) as client:
+        all = client.all
+        fault = next(all)
+        assert isinstance(fault, Fault)
+        assert fault.headers['Retry-After'] == '120'
+        assert client.next_retry_delay == 0.01
+        assert isinstance(next(all), Start)
+        assert next(all).data == 'a'
@@ -0,0 +1,98 @@
+import pytest
+
+from ld_eventsource import *
+from ld_eventsource.actions import *
+from ld_eventsource.async_client import AsyncSSEClient
+from ld_eventsource.config import *
+from ld_eventsource.config.async_connect_strategy import AsyncConnectStrategy
+from ld_eventsource.journal import (_CHUNK, _END, _FAILURE, _START,
+                                    _decode_headers, _JournalReader)
+from ld_eventsource.testing.async_helpers import *
+from ld_eventsource.testing.async_helpers import _bytes_async_iter
+from ld_eventsource.testing.helpers import *
+
+
+def read_journal(path):
+    reader = _JournalReader(path)
+    try:
+        return [(r.type, bytes(r.payload)) for r in reader.records()]
+    finally:
+        reader.close()
+
+
+expected_records = [
+    (_FAILURE, b'HTTPStatusError: HTTP error 503'),
+    (_START, b'[["Content-Type", "text/event-stream"]]'),
+    (_CHUNK, b'data: a\n'),
+    (_CHUNK, b'\n'),
+    (_END, b''),
+    (_START, b'[]'),
+    (_CHUNK, b'data: b\n\n'),
+    (_END, b''),
+]
+
+
+@pytest.mark.parametrize('compress', [False, True])
+def test_records_chunks_and_connection_boundaries(tmp_path, compress):
+    path = str(tmp_path / 'journal')
+    mock = MockConnectStrategy(
+        RejectConnection(HTTPStatusError(503)),
+        RespondWithStream([b'data: a\n', b'\n'], {'Content-Type': 'text/event-stream'}),
+        RespondWithData('data: b\n\n'),
+        RejectConnection(HTTPStatusError(400)),
+    )
+    with SSEClient(
+        connect=ConnectStrategy.record(mock, path, compress=compress),
+        error_strategy=retry_for_status(503),
+        retry_delay_strategy=no_delay(),
+    ) as client:
+        client.start()
+        assert [e.data for e in client.events] == ['a']
+        assert [e.data for e in client.events] == ['b']
+
+    assert read_journal(path) == expected_records
+
+
+def test_recording_appends_to_existing_journal(tmp_path):
+    path = str(tmp_path / 'journal')
+    for data in ('data: a\n\n', 'data: b\n\n'):
+        with SSEClient(connect=ConnectStrategy.record(MockConnectStrategy(RespondWithData(data)), path)) as client:
+            list(client.events)
+    assert [p for t, p in read_journal(path) if t == _CHUNK] == [b'data: a\n\n', b'data: b\n\n']
+
+
+def test_recording_refuses_file_that_is_not_a_journal(tmp_path):
+    path = tmp_path / 'journal'
+    path.write_bytes(b'something else')
+    with pytest.raises(ValueError):
+        SSEClient(connect=ConnectStrategy.record(MockConnectStrategy(RespondWithData('')), str(path)))
+
+
+def test_decode_headers_is_case_insensitive():
+    headers = _decode_headers(b'[["Content-Type", "text/event-stream"]]')
+    assert headers is not None
+    assert headers.get('content-type') == 'text/event-stream'
+    assert _decode_headers(b'[]') is None
+
+
+@pytest.mark.asyncio
+async def test_async_records_chunks_and_connection_boundaries(tmp_path):
+    path = str(tmp_path / 'journal')
+    mock = MockAsyncConnectStrategy(
+        AsyncRejectConnection(HTTPStatusError(503)),
+        AsyncRespondWithStream(
+            _bytes_async_iter([b'data: a\n', b'\n']), {'Content-Type': 'text/event-stream'}
+        ),
+        AsyncRespondWithData('data: b\n\n'),
+        AsyncRejectConnection(HTTPStatusError(400)),
+    )
+    async with AsyncSSEClient(
+        connect=AsyncConnectStrategy.record(mock, path),
+        error_strategy=retry_for_status(503),
+        retry_delay_strategy=no_delay(),
+    ) as client:
+        await client.start()
+        assert [e.data async for e in client.events] == ['a']
+        assert [e.data async for e in client.events] == ['b']
+
+    assert read_journal(path) == expected_records
@@ -0,0 +1,151 @@
+import time
+
+import pytest
+
+from ld_eventsource import *
+from ld_eventsource.actions import *
+from ld_eventsource.async_client import AsyncSSEClient
+from ld_eventsource.config import *
+from ld_eventsource.config.async_connect_strategy import AsyncConnectStrategy
+from ld_eventsource.journal import (_CHUNK, _END, _FAILURE, _FILE_MAGIC,
+                                    _RECORD_HEADER, _START)
+from ld_eventsource.testing.helpers import *
+
+
+def write_journal(path, records):
+    with open(path, 'wb') as f:
+        f.write(_FILE_MAGIC)
+        for record_type, timestamp, payload in records:
+            f.write(_RECORD_HEADER.pack(record_type, 0, timestamp, len(payload)))
+            f.write(payload)
+
+
+journal_records = [
+    (_FAILURE, 10.0, b'HTTPStatusError: HTTP error 503'),
+    (_START, 11.0, b'[["X-Server", "a"]]'),
+    (_CHUNK, 11.0, b'id: 1\ndata: a\n'),
+    (_CHUNK, 11.2, b'\n'),
+    (_END, 11.5, b'ReadTimeoutError: read timed out'),
+    (_START, 13.0, b'[]'),
+    (_CHUNK, 13.0, b'data: b\n\n'),
+    (_END, 13.1, b''),
+]
+
+
+def describe(actions):
+    result = []
+    for a in actions:
+        if isinstance(a, Start):
+            result.append(('start', a.headers and a.headers.get('x-server')))
+        elif isinstance(a, Event):
+            result.append(('event', a.data))
+        elif isinstance(a, Fault):
+            result.append(('fault', type(a.error).__name__))
+        if len(result) == 8:
+            break
+    return result
+
+
+expected_actions = [
+    ('fault', 'OSError'),
+    ('start', 'a'),
+    ('event', 'a'),
+    ('fault', 'OSError'),
+    ('start', None),
+    ('event', 'b'),
+    ('fault', 'NoneType'),
+    ('fault', 'EOFError'),
+]
+
+
+def replay_client(connect):
+    return SSEClient(
+        connect=connect,
+        error_strategy=ErrorStrategy.always_continue(),
+        retry_delay_strategy=no_delay(),
+    )
+
+
+def test_replays_connections_and_failures(tmp_path):
+    path = str(tmp_path / 'journal')
+    write_journal(path, journal_records)
+    with replay_client(ConnectStrategy.replay(path)) as client:
+        assert describe(client.all) == expected_actions
+
+
+def test_replays_chunks_as_memoryviews(tmp_path):
+    path = str(tmp_path / 'journal')
+    write_journal(path, journal_records)
+    client = ConnectStrategy.replay(path).create_client(None)
+    with pytest.raises(OSError):
+        client.connect(None)
+    result = client.connect(None)
+    chunk = next(result.stream)
+    assert isinstance(chunk, memoryview)
+    assert bytes(chunk) == b'id: 1\ndata: a\n'
+    chunk.release()
+    client.close()
+
+
+def test_replay_reproduces_scaled_timing(tmp_path):
+    path = str(tmp_path / 'journal')
+    write_journal(path, journal_records)
+    with replay_client(ConnectStrategy.replay(path, speed=2)) as client:
+        all = client.all
+        start = time.monotonic()
+        for item in all:
+            if isinstance(item, Event):
+                break
+        assert time.monotonic() - start >= 0.1  # the terminating chunk came 0.2s after the start
+
+
+def test_replay_timing_can_run_on_virtual_clock(tmp_path):
+    path = str(tmp_path / 'journal')
+    write_journal(path, journal_records)
+    clock = VirtualClock()
+    with replay_client(ConnectStrategy.replay(path, speed=1, clock=clock)) as client:
+        assert describe(client.all) == expected_actions
+    assert clock.now() == pytest.approx(0.2)  # the terminating chunk came 0.2s after the start
+
+
+def test_connection_without_end_record_is_still_separated(tmp_path):
+    path = str(tmp_path / 'journal')
+    write_journal(path, [
+        (_START, 1.0, b'[]'),
+        (_CHUNK, 1.0, b'data: a\n\n'),
+        (_START, 2.0, b'[]'),
+        (_CHUNK, 2.0, b'data: b\n\n'),
+    ])
+    with replay_client(ConnectStrategy.replay(path)) as client:
+        events = client.events
+        assert [next(events).data, next(events).data] == ['a', 'b']
+
+
+def test_round_trip_through_recording(tmp_path):
+    path = str(tmp_path / 'journal')
+    mock = MockConnectStrategy(
+        RespondWithStream([b'event: x\ndata: a\n', b'\ndata: b\r\n\r\n'])
+    )
+    with SSEClient(connect=ConnectStrategy.record(mock, path)) as client:
+        live = list(client.all)
+    with SSEClient(connect=ConnectStrategy.replay(path)) as client:
+        replayed = list(client.all)
+    assert [type(a) for a in replayed] == [Start, Event, Event, Fault]
+    assert replayed[1:3] == live[1:3]
+
+
+@pytest.mark.asyncio
+async def test_async_replays_connections_and_failures(tmp_path):
+    path = str(tmp_path / 'journal')
+    write_journal(path, journal_records)
+    async with AsyncSSEClient(
+        connect=AsyncConnectStrategy.replay(path, speed=100),
+        error_strategy=ErrorStrategy.always_continue(),
+        retry_delay_strategy=no_delay(),
+    ) as client:
+        actions = []
+        async for a in client.all:
+            actions.append(a)
+            if len(actions) == 8:
+                break
+        assert describe(actions) == expected_actions
@@ -0,0 +1,161 @@
+import logging
+
+import pytest
+
+from ld_eventsource import *
+from ld_eventsource.actions import *
+from ld_eventsource.async_client import AsyncSSEClient
+from ld_eventsource.config import *
+from ld_eventsource.structured_logging import (_LogRateLimiter,
+                                               _reconnect_log_limiters,
+                                               set_reconnect_log_limit)
+from ld_eventsource.testing.async_helpers import *
+from ld_eventsource.testing.helpers import *
+
+
+@pytest.fixture
+def limit():
+    set_reconnect_log_limit(100, 0)
+    yield set_reconnect_log_limit
+    set_reconnect_log_limit()
+
+
+@pytest.fixture
+def logger(caplog):
+    caplog.set_level(logging.INFO, logger='test.structured')
+    return logging.getLogger('test.structured')
+
+
+def retrying_client(logger, *handlers):
+    return SSEClient(
+        connect=MockConnectStrategy(*handlers),
+        error_strategy=ErrorStrategy.always_continue(),
+        initial_retry_delay=0.01,
+        retry_delay_strategy=RetryDelayStrategy.default(jitter_multiplier=None),
+        logger=logger,
+        stream_key='my-stream',
+    )
+
+
+def test_reconnect_records_have_structured_fields(limit, logger, caplog):
+    with retrying_client(
+        logger,
+        RejectConnection(HTTPStatusError(503)),
+        RespondWithData("data: a\n\n"),
+    ) as client:
+        assert next(iter(client.events)).data == 'a'
+
+    failed, delay, connected = caplog.records
+    assert failed.getMessage().startswith('Connection attempt 1 failed: ')
+    assert failed.sse_stream == 'my-stream'
+    assert failed.sse_attempt == 1
+    assert failed.sse_error == 'HTTPStatusError'
+    assert 'total' in failed.sse_timings
+
+    assert delay.getMessage() == 'Will reconnect after delay of %fs' % delay.sse_delay
+    assert delay.sse_attempt == 2
+    assert 0 < delay.sse_delay <= 0.01
+
+    assert connected.getMessage() == 'Connected to stream after 2 attempt(s)'
+    assert connected.sse_attempt == 2
+    assert not hasattr(connected, 'sse_suppressed')
+
+
+def test_reconnect_records_are_rate_limited(limit, logger, caplog):
+    limit(2, 0)
+    with retrying_client(
+        logger,
+        RejectConnection(HTTPStatusError(503)),
+        RejectConnection(HTTPStatusError(503)),
+        RespondWithData("data: a\n\n"),
+    ) as client:
+        assert next(iter(client.events)).data == 'a'
+
+    messages = [r.getMessage() for r in caplog.records]
+    assert len(messages) == 3
+    assert messages[0].startswith('Connection attempt 1 failed')
+    assert messages[1].startswith('Will reconnect')
+    assert messages[2] == 'Connected to stream after 3 attempt(s)'
+
+
+def test_rate_limiter_reports_suppressed_count():
+    limiter = _LogRateLimiter(1, 1000)
+    assert limiter.acquire() == 0
+    assert limiter.acquire() is None
+    while True:
+        suppressed = limiter.acquire()
+        if suppressed is not None:
+            break
+    assert suppressed >= 1
+
+
+def test_nothing_is_logged_or_limited_when_logger_is_disabled(limit, caplog):
+    limit(1, 0)
+    logger = logging.getLogger('test.structured.disabled')
+    logger.setLevel(logging.WARNING)
+    with retrying_client(
+        logger,
+        RejectConnection(HTTPStatusError(503)),
+        RespondWithData("data: a\n\n"),
+    ) as client:
+        assert next(iter(client.events)).data == 'a'
+    assert caplog.records == []
+    assert _reconnect_log_limiters.acquire('test.structured.disabled', 'my-stream') == 0
+
+
+def test_rate_limit_is_separate_for_each_stream(limit, logger, caplog):
+    limit(1, 0)
+    for key in ['storming', 'storming', 'quiet']:
+        with SSEClient(
+            connect=MockConnectStrategy(RejectConnection(HTTPStatusError(503))),
+            logger=logger,
+            stream_key=key,
+        ) as client:
+            with pytest.raises(HTTPStatusError):
+                client.start()
+    assert [r.sse_stream for r in caplog.records] == ['storming', 'quiet']
+
+
+def test_connecting_messages_are_rate_limited(limit, logger, caplog):
+    limit(1, 0)
+    with SSEClient(
+        connect='http://localhost:1/stream',
+        error_strategy=ErrorStrategy.always_continue(),
+        retry_delay_strategy=no_delay(),
+        logger=logger,
+    ) as client:
+        all = iter(client.all)
+        for _ in range(3):
+            assert isinstance(next(all), Fault)
+    messages = [r.getMessage() for r in caplog.records]
+    assert messages == ['Connecting to stream at http://localhost:1/stream']
+
+
+def test_stream_key_defaults_to_url(limit, logger, caplog):
+    url = 'http://localhost:1/stream'
+    with SSEClient(connect=url, logger=logger) as client:
+        with pytest.raises(Exception):
+            client.start()
+    assert all(r.sse_stream == url for r in caplog.records if r.getMessage().startswith('Connection'))
+
+
+@pytest.mark.asyncio
+async def test_async_reconnect_records_have_structured_fields(limit, logger, caplog):
+    async with AsyncSSEClient(
+        connect=MockAsyncConnectStrategy(
+            AsyncRejectConnection(HTTPStatusError(503)),
+            AsyncRespondWithData("data: a\n\n"),
+        ),
+        error_strategy=ErrorStrategy.always_continue(),
+        initial_retry_delay=0.01,
+        logger=logger,
+        stream_key='my-stream',
+    ) as client:
+        async for event in client.events:
+            assert event.data == 'a'
+            break
+
+    failed, delay, connected = caplog.records
+    assert failed.sse_error == 'HTTPStatusError'
+    assert delay.sse_attempt == 2
+    assert connected.sse_stream == 'my-stream'
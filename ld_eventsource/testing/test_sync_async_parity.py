@@ -12,11 +12,13 @@ public attribute names (anything not starting with ``_``) rather than callables
 import pytest
 
 from ld_eventsource.async_client import AsyncSSEClient
+from ld_eventsource.async_redundant import AsyncRedundantSSEClient
 from ld_eventsource.config.async_connect_strategy import (
     AsyncConnectionClient, AsyncConnectionResult, AsyncConnectStrategy)
 from ld_eventsource.config.connect_strategy import (ConnectionClient,
                                                     ConnectionResult,
                                                     ConnectStrategy)
+from ld_eventsource.redundant import RedundantSSEClient
 from ld_eventsource.sse_client import SSEClient
 
 
@@ -35,6 +37,9 @@ def _public_names(cls):
         pytest.param(ConnectStrategy, AsyncConnectStrategy, set(), set(), id="ConnectStrategy/AsyncConnectStrategy"),
         pytest.param(ConnectionClient, AsyncConnectionClient, set(), set(), id="ConnectionClient/AsyncConnectionClient"),
         pytest.param(ConnectionResult, AsyncConnectionResult, set(), set(), id="ConnectionResult/AsyncConnectionResult"),
+        pytest.param(
+            RedundantSSEClient, AsyncRedundantSSEClient, set(), set(), id="RedundantSSEClient/AsyncRedundantSSEClient"
+        ),
     ],
 )
 def test_sync_async_public_surface_matches(sync_cls, async_cls, sync_only, async_only):